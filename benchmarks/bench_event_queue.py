@@ -0,0 +1,64 @@
+'''
+EventQueue: pushing and popping events, in bulk and as in a simulation (the "hold" model:
+each handled event adds an event later in time, so the size of the queue stays the same).
+'''
+import random
+
+from suite import QUICK, benchmark
+
+
+def _kinds():
+    from base.prototype import JobSubmissionEvent, JobTerminationEvent, RunSchedulerEvent
+    return [JobSubmissionEvent, JobTerminationEvent, RunSchedulerEvent]
+
+
+def _events(scale, count):
+    rng = random.Random(0)
+    kinds = _kinds()
+    return [rng.choice(kinds)(rng.randint(0, 10 ** 7), None) for _ in range(count // 10 if scale == QUICK else count)]
+
+
+@benchmark('event_queue/push_pop')
+def push_pop(scale):
+    from base.event_queue import EventQueue
+    events = _events(scale, 200000)
+
+    def run():
+        queue = EventQueue()
+        handled = [0]
+
+        def handler(event):
+            handled[0] += 1
+        for kind in _kinds():
+            queue.add_handler(kind, handler)
+        for event in events:
+            queue.add_event(event)
+        while not queue.is_empty:
+            queue.advance()
+        return handled[0]
+    return run
+
+
+@benchmark('event_queue/hold')
+def hold(scale):
+    from base.event_queue import EventQueue
+    events = _events(scale, 10000)
+    rng = random.Random(1)
+    delays = [rng.randint(1, 10 ** 5) for _ in range(len(events) * 10)]
+    kinds = _kinds()
+
+    def run():
+        queue = EventQueue()
+        for event in events:
+            queue.add_event(event)
+        handled = [0]
+
+        def handler(event):
+            queue.add_event(kinds[handled[0] % 3](event.timestamp + delays[handled[0]], None))
+            handled[0] += 1
+        for kind in kinds:
+            queue.add_handler(kind, handler)
+        while handled[0] < len(delays):
+            queue.advance()
+        return handled[0]
+    return run
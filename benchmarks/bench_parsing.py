@@ -0,0 +1,34 @@
+'''
+SWF parsing: the lines (base.workload_parser) and the Job objects (as the simulator reads its input).
+'''
+from suite import WORKLOADS, register, workload_lines
+
+
+def _parse_lines(name):
+    def setup(scale):
+        from base.workload_parser import parse_lines
+        lines = workload_lines(name, scale)
+
+        def run():
+            return sum(1 for _ in parse_lines(lines))
+        return run
+    return setup
+
+
+def _parse_jobs(name):
+    def setup(scale):
+        from base.workload_parser import parse_lines
+        from base.prototype import _job_inputs_to_jobs
+        from predictors.replay import read_max_procs
+        lines = workload_lines(name, scale)
+        num_processors = read_max_procs(WORKLOADS[name])
+
+        def run():
+            return sum(1 for _ in _job_inputs_to_jobs(parse_lines(lines), num_processors))
+        return run
+    return setup
+
+
+for workload in WORKLOADS:
+    register('parsing/lines/' + workload, _parse_lines(workload))
+    register('parsing/jobs/' + workload, _parse_jobs(workload))
@@ -0,0 +1,70 @@
+'''
+The predictors: the throughput of predict (at the submission of each job) and fit (at its end) when the workload
+is replayed offline (see predictors/replay.py). Each predictor used by the configurations of configs/algorithms
+and configs/predcompare is benchmarked with the options of the first configuration that uses it.
+'''
+import glob
+import os
+import tempfile
+import time
+
+from suite import CONFIGS_FOLDER, WORKLOADS, register, workload_lines
+
+
+def _predictor_options():
+    """{predictor name: options of the simulation}"""
+    from config_schema import load_config_file
+    predictors = {}
+    for folder in ('algorithms', 'predcompare'):
+        for config_file in sorted(glob.glob(os.path.join(CONFIGS_FOLDER, folder, '*.py'))):
+            config = load_config_file(config_file)
+            predictor = config["scheduler"].get("predictor")
+            if predictor is not None and predictor["name"] not in predictors:
+                predictors[predictor["name"]] = config
+    return predictors
+
+
+def _replay(options, workload):
+    def setup(scale):
+        from predictors.replay import END, SUBMIT, Trace
+        from schedulers.common import load_predictor
+        handle, filename = tempfile.mkstemp(suffix='.swf')
+        try:
+            with os.fdopen(handle, 'w') as f:
+                f.writelines(workload_lines(workload, scale))
+            trace = Trace.from_swf(filename)
+        finally:
+            os.remove(filename)
+        events = list(trace.events())
+
+        def run():
+            predictor = load_predictor(options)
+            jobs = trace.jobs()
+            running_jobs = []
+            predict_seconds = fit_seconds = 0.0
+            for when, kind, i in events:
+                job = jobs[i]
+                if kind == SUBMIT:
+                    start = time.time()
+                    predictor.predict(job, when, running_jobs)
+                    predict_seconds += time.time() - start
+                elif kind == END:
+                    running_jobs.remove(job)
+                    start = time.time()
+                    predictor.fit(job, when)
+                    fit_seconds += time.time() - start
+                else:
+                    running_jobs.append(job)
+            return {
+                "items": 2 * len(jobs),
+                "predict_rate": len(jobs) / predict_seconds if predict_seconds > 0 else None,
+                "fit_rate": len(jobs) / fit_seconds if fit_seconds > 0 else None,
+            }
+        return run
+    return setup
+
+
+predictor_options = sorted(_predictor_options().items())
+for workload in WORKLOADS:
+    for name, options in predictor_options:
+        register('predictor/{}/{}'.format(name, workload), _replay(options, workload))
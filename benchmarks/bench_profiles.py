@@ -0,0 +1,61 @@
+'''
+The availability profiles of the schedulers on a synthetic workload: CpuSnapshot (schedulers.common,
+used by the EASY-like schedulers) and UsageTracker (schedulers.comod20, used by the CP schedulers).
+
+Each job is reserved at the earliest time it fits after its submission, as a conservative backfilling
+scheduler does; the past of the CpuSnapshot is archived as the time advances.
+'''
+import math
+import random
+
+from suite import QUICK, benchmark
+
+PROCESSORS = 1024
+# the profile is cut every ARCHIVE_EVERY jobs
+ARCHIVE_EVERY = 20
+
+
+def _workload(scale, count):
+    """(submit time, predicted run time, processors) with a load of about 0.9"""
+    rng = random.Random(0)
+    jobs = []
+    submit_time = 0
+    for _ in range(count // 10 if scale == QUICK else count):
+        submit_time += rng.randint(0, 600)
+        run_time = int(math.exp(rng.uniform(math.log(60), math.log(36000))))
+        jobs.append((submit_time, run_time, 2 ** rng.randint(0, 8)))
+    return jobs
+
+
+@benchmark('profiles/cpu_snapshot')
+def cpu_snapshot(scale):
+    from base.prototype import Job
+    from schedulers.common import CpuSnapshot
+    workload = _workload(scale, 5000)
+
+    def run():
+        snapshot = CpuSnapshot(PROCESSORS, False)
+        for i, (submit_time, run_time, processors) in enumerate(workload):
+            job = Job(i, run_time, run_time, processors, submit_time)
+            if i % ARCHIVE_EVERY == 0:
+                snapshot.archive_old_slices(submit_time)
+            if not snapshot.canJobStartNow(job, submit_time):
+                snapshot.free_processors_available_at(submit_time)
+            snapshot.assignJobEarliest(job, submit_time)
+        return len(workload)
+    return run
+
+
+@benchmark('profiles/usage_tracker')
+def usage_tracker(scale):
+    from schedulers.comod20.usage_tracker import UsageTracker
+    workload = _workload(scale, 5000)
+
+    def run():
+        tracker = UsageTracker(-PROCESSORS)
+        for submit_time, run_time, processors in workload:
+            start = tracker.when_not_above(submit_time, run_time, -processors)
+            tracker.add_usage(start, start + run_time, processors)
+            tracker.value_at(submit_time)
+        return len(workload)
+    return run
@@ -0,0 +1,47 @@
+'''
+The schedulers end to end: the simulation of each workload with the configurations of configs/algorithms
+that use the requested times (one per scheduling algorithm), from the lines of the workload to
+the output (written to the null device).
+'''
+import glob
+import os
+
+from suite import CONFIGS_FOLDER, WORKLOADS, register, workload_lines
+
+CONFIGS = sorted(glob.glob(os.path.join(CONFIGS_FOLDER, 'algorithms', '*_reqtime.py')))
+
+
+def _simulation(config_file, workload):
+    def setup(scale):
+        from base.prototype import _job_inputs_to_jobs
+        from base.workload_parser import parse_lines
+        from config_schema import SCHEDULERS, load_config_file, validate, variant
+        from predictors.replay import read_max_procs
+        import schedulers.simulator as simulator
+        lines = workload_lines(workload, scale)
+        num_processors = read_max_procs(WORKLOADS[workload])
+        config = variant(validate(load_config_file(config_file)), {
+            "input_file": WORKLOADS[workload],
+            "output_swf": os.devnull,
+            "num_processors": num_processors,
+            "stats": False,
+            "scheduler.progressbar": False,
+        })
+
+        def run():
+            options = variant(config, {})
+            jobs = list(_job_inputs_to_jobs(parse_lines(lines), num_processors))
+            scheduler = SCHEDULERS.get(options["scheduler"]["name"])(options)
+            the_simulator = simulator.Simulator(jobs, num_processors, scheduler, options["output_swf"],
+                                                options["input_file"], options)
+            the_simulator.run()
+            simulator.finish_simulation(the_simulator, no_stats=True)
+            return len(jobs)
+        return run
+    return setup
+
+
+for workload in WORKLOADS:
+    for config_file in CONFIGS:
+        name = os.path.splitext(os.path.basename(config_file))[0]
+        register('scheduler/{}/{}'.format(name, workload), _simulation(config_file, workload), repeat=1)
@@ -0,0 +1,11 @@
+"""
+
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'pyss')))
+
+# print (sys.path)
\ No newline at end of file
@@ -0,0 +1,101 @@
+'''
+Runs the benchmarks of the simulator and compares them with a baseline.
+
+    run_benchmarks.py [--quick] [--list] [--output FILE] [--baseline FILE] [--save-baseline] [--tolerance T] [pattern ...]
+
+The patterns select the benchmarks by name (glob patterns, e.g., 'profiles/*' or 'scheduler/EASY*').
+The results are printed and saved as JSON (see suite.py). If the baseline file exists, each result is compared with
+the baseline and the script exits with status 1 if a benchmark is slower than the baseline by more than the tolerance
+(or fails when it did not fail in the baseline). With --save-baseline, the results become the baseline instead.
+
+--quick runs each benchmark once on small inputs (the first jobs of the workloads); quick results are compared only
+with quick baselines (the number of the processed items must be the same).
+
+Copyright (C) 2022 University of Central Florida
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+
+import suite
+import bench_parsing
+import bench_event_queue
+import bench_profiles
+import bench_schedulers
+import bench_predictors
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+
+def default_baseline(scale):
+    return os.path.join(BENCHMARKS_FOLDER, 'baseline_{}.json'.format(scale))
+
+
+def main(args):
+    benchmarks = suite.select(args.patterns)
+    if args.list:
+        for bench in benchmarks:
+            print(bench.name)
+        return 0
+    if not benchmarks:
+        print("no benchmarks match", file=sys.stderr)
+        return 1
+    scale = suite.QUICK if args.quick else suite.FULL
+    results = suite.run_benchmarks(benchmarks, scale)
+    if args.output:
+        suite.save_results(results, args.output)
+    baseline_name = args.baseline or default_baseline(scale)
+    if args.save_baseline:
+        if os.path.isfile(baseline_name):
+            # the results of the benchmarks that did not run are kept
+            baseline = suite.load_results(baseline_name)
+            baseline["results"].update(results["results"])
+            results = dict(baseline, **dict((key, value) for key, value in results.items() if key != "results"))
+        suite.save_results(results, baseline_name)
+        print("baseline saved to {}".format(baseline_name))
+        return 0
+    if not os.path.isfile(baseline_name):
+        print("no baseline ({}), see --save-baseline".format(baseline_name))
+        return 0
+    baseline = suite.load_results(baseline_name)
+    print("\ncompared with {} (version {}, host {}):".format(baseline_name, baseline.get("version"),
+                                                            baseline.get("host")))
+    failed = 0
+    for name, ratio, status in suite.compare(results, baseline, args.tolerance):
+        print(suite.format_comparison(name, ratio, status))
+        if status in ('regression', 'error'):
+            failed += 1
+    if failed:
+        print("{} benchmarks regressed".format(failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('patterns', nargs='*', help="glob patterns of the names of the benchmarks to run (default: all)")
+    parser.add_argument('--quick', action='store_true', help="run each benchmark once on small inputs")
+    parser.add_argument('--list', action='store_true', help="list the benchmarks and exit")
+    parser.add_argument('--output', type=str, default=None, help="save the results to this JSON file")
+    parser.add_argument('--baseline', type=str, default=None,
+                        help="the results to compare with (default: baseline_<full|quick>.json in this folder)")
+    parser.add_argument('--save-baseline', action='store_true', help="save the results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=suite.DEFAULT_TOLERANCE,
+                        help="the relative slowdown that is reported as a regression")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,211 @@
+'''
+The benchmarks: registration, timing, results and comparison with a baseline.
+
+A benchmark is registered with a name and a setup function. The setup function is called once with
+the scale of the run (QUICK or FULL) and returns a function that runs the measured operation and returns
+the number of the items it processed (jobs, events, predictions...), or a dictionary with the number of the items
+("items") and other measures of the run; the operation is run several times (once in a quick run) and
+the shortest time is kept.
+
+The results are saved as JSON:
+    {"version": ..., "python": ..., "host": ..., "scale": ..., "results": {name: result}}
+where result is {"seconds", "median", "repeat", "items", "rate"} (rate = items per second of the shortest run)
+and the other measures of the shortest run, or {"error": message} if the benchmark failed.
+
+A result is compared with the result of the same name in a baseline (results saved before, e.g., by another
+version of the code) when both processed the same number of items: it is a regression if it took more than
+(1 + tolerance) times the time of the baseline.
+
+Copyright (C) 2022 University of Central Florida
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+from __future__ import print_function
+
+import collections
+import contextlib
+import fnmatch
+import json
+import os
+import platform
+import socket
+import sys
+import time
+import traceback
+
+import context
+
+REPOSITORY_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PYSS_FOLDER = os.path.join(REPOSITORY_FOLDER, 'pyss')
+CONFIGS_FOLDER = os.path.join(REPOSITORY_FOLDER, 'configs')
+
+# the workloads of the end-to-end benchmarks
+WORKLOADS = collections.OrderedDict([
+    ('KTH-SP2', os.path.join(REPOSITORY_FOLDER, 'data', 'swf_filtered', 'KTH-SP2.swf')),
+    ('5K_sample', os.path.join(PYSS_FOLDER, '5K_sample')),
+])
+
+# the scales of a run
+QUICK, FULL = 'quick', 'full'
+# the number of the jobs of the workloads in a quick run
+QUICK_JOBS = 1000
+
+DEFAULT_TOLERANCE = 0.25
+
+Benchmark = collections.namedtuple('Benchmark', ['name', 'setup', 'repeat'])
+
+BENCHMARKS = collections.OrderedDict()
+
+
+def register(name, setup, repeat=3):
+    if name in BENCHMARKS:
+        raise ValueError("benchmark '{}' is registered already".format(name))
+    BENCHMARKS[name] = Benchmark(name, setup, repeat)
+
+
+def benchmark(name, repeat=3):
+    """Decorator that registers a setup function"""
+    def decorator(setup):
+        register(name, setup, repeat)
+        return setup
+    return decorator
+
+
+def select(patterns=None):
+    """The benchmarks which names match one of the glob patterns (all the benchmarks if there are no patterns)"""
+    return [b for b in BENCHMARKS.values()
+            if not patterns or any(fnmatch.fnmatchcase(b.name, pattern) for pattern in patterns)]
+
+
+def workload_lines(name, scale):
+    """The lines of the workload (the header and the first QUICK_JOBS jobs in a quick run)"""
+    lines = []
+    jobs = 0
+    with open(WORKLOADS[name]) as f:
+        for line in f:
+            if not line.lstrip().startswith(';') and line.strip():
+                if scale == QUICK and jobs == QUICK_JOBS:
+                    break
+                jobs += 1
+            lines.append(line)
+    return lines
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Discards what is printed by the benchmarked code (e.g., the warnings about the invalid jobs)"""
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            yield
+        finally:
+            sys.stdout = stdout
+
+
+def measure(bench, scale, verbose=True):
+    """Runs the benchmark and returns its result"""
+    try:
+        with _quiet():
+            run = bench.setup(scale)
+            runs = []
+            for _ in range(1 if scale == QUICK else bench.repeat):
+                start = time.time()
+                output = run()
+                runs.append((time.time() - start, output))
+    except Exception as e:
+        if verbose:
+            traceback.print_exc()
+        return {"error": "{}: {}".format(type(e).__name__, e)}
+    runs.sort(key=lambda r: r[0])
+    seconds, output = runs[0]
+    result = {
+        "seconds": seconds,
+        "median": runs[len(runs) // 2][0],
+        "repeat": len(runs),
+    }
+    if isinstance(output, dict):
+        result.update(output)
+    else:
+        result["items"] = output
+    result["rate"] = result["items"] / seconds if seconds > 0 else None
+    return result
+
+
+def run_benchmarks(benchmarks, scale, verbose=True):
+    from schedulers.simulator import code_version
+    results = collections.OrderedDict()
+    for bench in benchmarks:
+        result = measure(bench, scale, verbose)
+        results[bench.name] = result
+        if verbose:
+            print(format_result(bench.name, result))
+    return {
+        "version": code_version(),
+        "python": platform.python_version(),
+        "host": socket.gethostname(),
+        "scale": scale,
+        "results": results,
+    }
+
+
+def format_result(name, result):
+    if "error" in result:
+        return "{:<48} ERROR {}".format(name, result["error"])
+    return "{:<48} {:10.4f} s {:>10} items {:14.1f} items/s".format(
+        name, result["seconds"], result["items"], result["rate"] or 0)
+
+
+def save_results(results, filename):
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'w') as f:
+        json.dump(results, f, indent=1, separators=(',', ': '))
+    os.rename(tmp_filename, filename)
+
+
+def load_results(filename):
+    with open(filename) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    :return: list of (name, ratio of the times, status), status is one of
+             'regression', 'improvement', 'same', 'error' (the benchmark failed now but not in the baseline)
+             or 'not comparable' (a different number of items)
+    """
+    comparison = []
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or "error" in base:
+            continue
+        if "error" in result:
+            comparison.append((name, None, 'error'))
+        elif result["items"] != base["items"]:
+            comparison.append((name, None, 'not comparable'))
+        else:
+            ratio = result["seconds"] / base["seconds"] if base["seconds"] > 0 else 1.0
+            if ratio > 1 + tolerance:
+                status = 'regression'
+            elif ratio < 1 - tolerance:
+                status = 'improvement'
+            else:
+                status = 'same'
+            comparison.append((name, ratio, status))
+    return comparison
+
+
+def format_comparison(name, ratio, status):
+    return "{:<48} {:>8} {}".format(name, "" if ratio is None else "{:.2f}x".format(ratio), status)
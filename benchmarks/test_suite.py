@@ -0,0 +1,56 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import os
+import shutil
+import tempfile
+
+import suite
+import bench_event_queue
+import bench_profiles
+
+
+class test_suite(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_quick_run_and_results_file(self):
+        results = suite.run_benchmarks(suite.select(['profiles/*', 'event_queue/*']), suite.QUICK, verbose=False)
+        self.assertEqual(list(results["results"]),
+                         ['event_queue/push_pop', 'event_queue/hold', 'profiles/cpu_snapshot', 'profiles/usage_tracker'])
+        for result in results["results"].values():
+            self.assertNotIn("error", result)
+            self.assertGreater(result["items"], 0)
+            self.assertEqual(result["repeat"], 1)
+        filename = os.path.join(self.folder, 'results.json')
+        suite.save_results(results, filename)
+        self.assertEqual(suite.load_results(filename), results)
+
+    def test_failing_benchmark(self):
+        def setup(scale):
+            def run():
+                raise ValueError("broken")
+            return run
+        result = suite.measure(suite.Benchmark('broken', setup, 3), suite.FULL, verbose=False)
+        self.assertEqual(result, {"error": "ValueError: broken"})
+
+    def test_compare(self):
+        def results(**seconds):
+            return {"results": dict((name, {"seconds": s, "items": 10}) for name, s in seconds.items())}
+        baseline = results(slower=1.0, faster=1.0, same=1.0, new=1.0)
+        baseline["results"]["broken"] = {"seconds": 1.0, "items": 10}
+        baseline["results"]["resized"] = {"seconds": 1.0, "items": 20}
+        current = results(slower=1.5, faster=0.5, same=1.1, added=1.0, resized=1.0)
+        current["results"]["broken"] = {"error": "ValueError: broken"}
+        comparison = dict((name, status) for name, _, status in suite.compare(current, baseline, 0.25))
+        self.assertEqual(comparison, {"slower": "regression", "faster": "improvement", "same": "same",
+                                      "broken": "error", "resized": "not comparable"})
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
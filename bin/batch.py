@@ -0,0 +1,337 @@
+'''
+Batch of experiments (simulations) that can be interrupted and restarted.
+
+Each experiment (source file, config file, output file) is identified by a key: a hash of
+the contents of the source file, the contents of the config file and the version of the code.
+The batch keeps a manifest (a JSON file) with the completed experiments, their keys, the size and
+the hash of their outputs and their run times. When the batch is started again, the experiments
+whose outputs are still valid are skipped; the interrupted and failed experiments are run again
+(an interrupted simulation resumes from its snapshot if the snapshots are enabled in its config).
+
+The experiments are run longest first by a pool of workers, each worker takes the next experiment
+when it finishes the previous one. The run times are estimated from the run times recorded in
+the manifest (for the same source and config, or per byte of the source for the same config);
+the experiments without history are estimated with the 'slowdowns' heuristic.
+
+Each source is parsed once, by the batch, into a trace file (in shared memory if available);
+the workers map the trace file in memory instead of parsing the source again.
+
+Copyright (C) 2022 University of Central Florida
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+from __future__ import print_function
+
+import datetime
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import traceback
+
+import context
+from config_schema import load_config_file, validate
+from schedulers.simulator import share_code_version
+
+# the relative run times of the configs which names contain the keys (used when there is no history)
+slowdowns = {
+    'CPLEX': 1000,
+    'PureBF': 50,
+    'CVH': 10,
+}
+
+# the run time estimate for the experiments without history (seconds per byte of the source, times the slowdown)
+DEFAULT_SECONDS_PER_BYTE = 2e-6
+
+MANIFEST_VERSION = 1
+
+
+def code_version():
+    """The version of the simulator code: the git commit (with '+' if there are uncommitted changes)"""
+    folder = os.path.dirname(os.path.realpath(__file__))
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=folder, stderr=subprocess.STDOUT).strip()
+        changes = subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no", "--", "pyss"],
+                                          cwd=os.path.join(folder, '..'), stderr=subprocess.STDOUT).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("+" if changes else "")
+
+
+def file_digest(filename, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def count_jobs(filename):
+    """The number of the jobs in a SWF file (possibly compressed)"""
+    with (gzip.open(filename) if filename.endswith('.gz') else open(filename)) as f:
+        return sum(1 for line in f if line.strip() and not line.lstrip().startswith(';'))
+
+
+def config_slowdown(config_name):
+    slowdown = 1
+    for key in slowdowns:
+        if key in config_name:
+            slowdown *= slowdowns[key]
+    return slowdown
+
+
+class Manifest(object):
+    """
+    The persistent record of the batch: the completed experiments (by output file) and
+    the hashes of the files (by name; rehashed only if the size or the modification time changes).
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.experiments = {}
+        self.files = {}
+        if os.path.isfile(filename):
+            with open(filename) as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.experiments = data['experiments']
+                self.files = data['files']
+
+    def save(self):
+        """Atomically replaces the manifest file"""
+        folder = os.path.dirname(os.path.abspath(self.filename))
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'experiments': self.experiments, 'files': self.files},
+                      f, indent=1, sort_keys=True, separators=(',', ': '))
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp_filename, self.filename)
+
+    def digest(self, filename):
+        """The hash of the contents of the file (cached while the size and the modification time do not change)"""
+        stat = os.stat(filename)
+        entry = self.files.get(filename)
+        if entry is None or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime:
+            entry = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha1': file_digest(filename)}
+            self.files[filename] = entry
+        return entry['sha1']
+
+    def job_count(self, filename):
+        """The number of the jobs in the SWF file (cached with the hash)"""
+        self.digest(filename)
+        entry = self.files[filename]
+        if 'jobs' not in entry:
+            entry['jobs'] = count_jobs(filename)
+        return entry['jobs']
+
+    def is_done(self, experiment):
+        """Whether the experiment was completed and its output is unchanged"""
+        entry = self.experiments.get(experiment.output)
+        if entry is None or entry['key'] != experiment.key or entry['status'] != 'done':
+            return False
+        if not os.path.isfile(experiment.output) or os.path.getsize(experiment.output) != entry['output_size']:
+            return False
+        return self.digest(experiment.output) == entry['output_sha1']
+
+    def record(self, experiment, status, run_time):
+        entry = {
+            'key': experiment.key,
+            'source': experiment.source,
+            'config': experiment.config,
+            'source_size': experiment.source_size,
+            'status': status,
+            'run_time': run_time,
+            'finished': datetime.datetime.now().isoformat(),
+        }
+        if status == 'done':
+            if not os.path.isfile(experiment.output):
+                entry['status'] = 'invalid'
+            elif self.job_count(experiment.output) != self.job_count(experiment.source):
+                # the simulation stopped before all the jobs terminated
+                entry['status'] = 'invalid'
+            else:
+                entry['output_size'] = os.path.getsize(experiment.output)
+                entry['output_sha1'] = self.digest(experiment.output)
+        self.experiments[experiment.output] = entry
+        return entry['status']
+
+    def estimate(self, experiment):
+        """The estimated run time of the experiment (seconds)"""
+        same_config = [entry for entry in self.experiments.values()
+                       if entry['status'] == 'done' and entry['config'] == experiment.config]
+        for entry in same_config:
+            if entry['source'] == experiment.source:
+                return entry['run_time']
+        if same_config:
+            rate = sum(entry['run_time'] for entry in same_config) / max(1, sum(entry['source_size'] for entry in same_config))
+            return rate * experiment.source_size
+        return DEFAULT_SECONDS_PER_BYTE * experiment.source_size * config_slowdown(experiment.config)
+
+
+class Experiment(object):
+
+    def __init__(self, source, config, output, key, source_size):
+        self.source = source
+        self.config = config
+        self.output = output
+        self.key = key
+        self.source_size = source_size
+        self.estimate = None
+
+    def __repr__(self):
+        return "({}, {}, {})".format(self.source, self.config, self.output)
+
+
+def make_experiments(scs, manifest, version=None):
+    """
+    :param scs: list of (source file, config file, output file)
+    :param version: the version of the code (by default, code_version())
+    :return: list of Experiment
+    """
+    if version is None:
+        version = code_version()
+    experiments = []
+    for s_name, c_name, o_name in scs:
+        key = hashlib.sha1("\n".join([manifest.digest(s_name), manifest.digest(c_name), version])).hexdigest()
+        experiments.append(Experiment(s_name, c_name, o_name, key, os.path.getsize(s_name)))
+    return experiments
+
+
+def plan(experiments, manifest, force=False):
+    """
+    :return: (the experiments to run, longest first; the experiments to skip)
+    """
+    to_run = []
+    to_skip = []
+    for experiment in experiments:
+        if not force and manifest.is_done(experiment):
+            to_skip.append(experiment)
+        else:
+            experiment.estimate = manifest.estimate(experiment)
+            to_run.append(experiment)
+    to_run.sort(key=lambda experiment: experiment.estimate, reverse=True)
+    return to_run, to_skip
+
+
+def load_config(c_name, s_name, o_name, with_progress_freq=None):
+    """The options of the experiment (the config file is parsed and validated)"""
+    config = load_config_file(c_name)
+    config["input_file"] = s_name
+    config["output_swf"] = o_name
+    config["stats"] = False
+    if with_progress_freq:
+        config['scheduler']['progressfile_freq'] = with_progress_freq
+    return validate(config)
+
+
+def share_traces(configs, folder):
+    """
+    Parses each source of the configs once and saves it to a trace file in the folder
+    (the trace depends on the number of processors the jobs are validated for).
+    :return: list of the names of the trace files, one per config (None if the source could not be parsed)
+    """
+    from predictors.replay import Trace, read_max_procs
+    names = {}
+    trace_names = []
+    for config in configs:
+        source = config["input_file"]
+        num_processors = config.get("num_processors")
+        if num_processors is None and os.path.isfile(source):
+            num_processors = read_max_procs(source)
+        if (source, num_processors) not in names:
+            name = None
+            if num_processors is not None and os.path.isfile(source) and not source.endswith('.gz'):
+                name = os.path.join(folder, "{}.trace".format(len(names)))
+                try:
+                    Trace.from_swf(source, num_processors).save(name)
+                except (IOError, ValueError):
+                    # the workers read the source themselves (and report the error)
+                    name = None
+            names[(source, num_processors)] = name
+        trace_names.append(names[(source, num_processors)])
+    return trace_names
+
+
+def _trace_folder():
+    # a RAM-backed folder if there is one
+    return tempfile.mkdtemp(prefix="pyss_traces_", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+
+def _run_experiment(arg):
+    from pyss.run_simulator import parse_and_run_simulator
+    from predictors.replay import Trace
+    index, config, trace_name = arg
+    start = time.time()
+    try:
+        trace = Trace.load(trace_name) if trace_name else None
+        parse_and_run_simulator(config, Exception, trace)
+    except Exception:
+        traceback.print_exc()
+        return index, 'failed', time.time() - start
+    return index, 'done', time.time() - start
+
+
+def run_batch(experiments, manifest, n_workers=None, with_progress_freq=None, force=False, verbose=True):
+    """
+    Runs the experiments which are not done yet; the manifest is saved after each completed experiment.
+    An experiment fails if the simulation raises an exception or its output does not have all the jobs of the source.
+    :return: the number of the failed experiments
+    """
+    to_run, to_skip = plan(experiments, manifest, force)
+    if verbose:
+        print("{} experiments done already, {} to run".format(len(to_skip), len(to_run)))
+    manifest.save()
+    if not to_run:
+        return 0
+    configs = [load_config(experiment.config, experiment.source, experiment.output, with_progress_freq)
+               for experiment in to_run]
+    for experiment in to_run:
+        folder = os.path.dirname(os.path.abspath(experiment.output))
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+    failed = 0
+    trace_folder = _trace_folder()
+    pool = None
+    try:
+        args = zip(range(len(configs)), configs, share_traces(configs, trace_folder))
+        share_code_version()
+        pool = multiprocessing.Pool(processes=n_workers)
+        for index, status, run_time in pool.imap_unordered(_run_experiment, args, chunksize=1):
+            experiment = to_run[index]
+            status = manifest.record(experiment, status, run_time)
+            manifest.save()
+            if status != 'done':
+                failed += 1
+            if verbose:
+                print("{}: {} in {:.1f} s".format(experiment.output, status, run_time))
+        pool.close()
+    except BaseException:
+        # e.g., the batch is interrupted: the completed experiments are already in the manifest
+        if pool is not None:
+            pool.terminate()
+        raise
+    finally:
+        if pool is not None:
+            pool.join()
+        shutil.rmtree(trace_folder, ignore_errors=True)
+    return failed
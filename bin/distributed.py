@@ -0,0 +1,486 @@
+'''
+Experiments (simulations) distributed to the workers of several nodes by a coordinator (HTTP, stdlib only).
+
+The coordinator owns the batch: the experiments, their manifest (see batch.py) and the source and config files.
+A worker process repeatedly leases the next experiment (longest first), downloads the source and the config
+(cached by hash on its node), runs the simulation and uploads the output. The coordinator writes the output
+next to the others and records it in the manifest.
+
+While the simulation runs, the worker sends heartbeats that extend its lease. A lease that is not extended
+in time expires (the worker or its node died, or the network is down) and the experiment is leased again;
+a result uploaded for an expired lease is rejected. A failed experiment (an exception, a missing or incomplete
+output, an expired lease) is tried again, up to max_attempts times.
+
+Protocol (JSON replies; the requests carry the header X-Pyss-Token if the coordinator has a token):
+    POST /lease                 {"worker": name} -> {"lease", "source", "source_extension", "config", "output",
+                                "lease_seconds"} (source, config: the sha1 of the files; source_extension: the extension
+                                of the source, e.g. ".swf.gz") or {"wait": seconds} or {"done": true}
+    GET  /files/<sha1>          the contents of a source or a config file
+    POST /heartbeat/<lease>     extends the lease (410 if the lease expired)
+    PUT  /result/<lease>?status=<done|failed>&run_time=<seconds>
+                                the output file (if done)
+
+Copyright (C) 2022 University of Central Florida
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+from __future__ import print_function
+
+import BaseHTTPServer
+import SocketServer
+import collections
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+import urllib
+import urllib2
+import urlparse
+import uuid
+
+import context
+from batch import plan, load_config
+from config_schema import ConfigError
+from schedulers.simulator import share_code_version
+
+DEFAULT_PORT = 8765
+TOKEN_HEADER = 'X-Pyss-Token'
+BLOCK_SIZE = 1 << 20
+# the time an idle worker waits before asking again (while the other workers finish)
+WAIT_SECONDS = 2
+
+
+def _copy(src, dst, length=None):
+    """Copies a stream (at most length bytes)"""
+    while length is None or length > 0:
+        block = src.read(BLOCK_SIZE if length is None else min(BLOCK_SIZE, length))
+        if not block:
+            break
+        dst.write(block)
+        if length is not None:
+            length -= len(block)
+
+
+def _extension(filename):
+    """The extension of the file, including the extension before a compression suffix (e.g. ".swf.gz")"""
+    root, extension = os.path.splitext(filename)
+    if extension == '.gz':
+        extension = os.path.splitext(root)[1] + extension
+    return extension
+
+
+class Coordinator(object):
+    """
+    The queue of the experiments and their leases.
+    The methods are called by the threads of the HTTP server.
+    """
+
+    def __init__(self, experiments, manifest, lease_seconds=60, max_attempts=3, force=False, verbose=True):
+        self.manifest = manifest
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.verbose = verbose
+        self.experiments, to_skip = plan(experiments, manifest, force)
+        if verbose:
+            print("{} experiments done already, {} to run".format(len(to_skip), len(self.experiments)))
+        self.queue = collections.deque(range(len(self.experiments)))
+        self.attempts = [0] * len(self.experiments)
+        # lease -> [index of the experiment, worker, deadline]
+        self.leases = {}
+        # index of the experiment -> final status
+        self.results = {}
+        # sha1 -> name of the file (only the files of the experiments are served)
+        self.files = {}
+        for experiment in self.experiments:
+            experiment.source_sha1 = manifest.digest(experiment.source)
+            experiment.config_sha1 = manifest.digest(experiment.config)
+            self.files[experiment.source_sha1] = experiment.source
+            self.files[experiment.config_sha1] = experiment.config
+            folder = os.path.dirname(os.path.abspath(experiment.output))
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+        manifest.save()
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        if not self.experiments:
+            self.finished.set()
+
+    @property
+    def failed(self):
+        return sum(1 for status in self.results.values() if status != 'done')
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def _expire_leases(self):
+        now = time.time()
+        for lease, (index, worker, deadline) in self.leases.items():
+            if deadline < now:
+                del self.leases[lease]
+                self._log("{}: lease of {} expired".format(self.experiments[index].output, worker))
+                self._attempt_failed(index, 'expired', self.lease_seconds)
+
+    def _attempt_failed(self, index, status, run_time):
+        experiment = self.experiments[index]
+        self.attempts[index] += 1
+        if self.attempts[index] < self.max_attempts:
+            # the experiment is tried again before the shorter ones
+            self.queue.appendleft(index)
+        else:
+            self.manifest.record(experiment, status, run_time)
+            self.manifest.save()
+            self._finish(index, status)
+
+    def _finish(self, index, status):
+        self.results[index] = status
+        if len(self.results) == len(self.experiments):
+            self.finished.set()
+
+    def lease(self, worker):
+        with self.lock:
+            self._expire_leases()
+            if self.queue:
+                index = self.queue.popleft()
+                experiment = self.experiments[index]
+                lease = uuid.uuid4().hex
+                self.leases[lease] = [index, worker, time.time() + self.lease_seconds]
+                self._log("{}: leased to {}".format(experiment.output, worker))
+                return {'lease': lease, 'source': experiment.source_sha1,
+                        'source_extension': _extension(experiment.source), 'config': experiment.config_sha1,
+                        'output': os.path.basename(experiment.output), 'lease_seconds': self.lease_seconds}
+            if self.leases:
+                # the experiments of the expiring leases may be leased again
+                return {'wait': WAIT_SECONDS}
+            return {'done': True}
+
+    def heartbeat(self, lease):
+        with self.lock:
+            self._expire_leases()
+            if lease not in self.leases:
+                return False
+            self.leases[lease][2] = time.time() + self.lease_seconds
+            return True
+
+    def result(self, lease, status, run_time, stream, length):
+        """
+        Records the result of a lease; the output (if done) is read from the stream.
+        :return: False if the lease expired (the result is discarded)
+        """
+        with self.lock:
+            self._expire_leases()
+            entry = self.leases.pop(lease, None)
+        if entry is None:
+            _copy(stream, open(os.devnull, 'wb'), length)
+            return False
+        index, worker, _ = entry
+        experiment = self.experiments[index]
+        if status == 'done':
+            tmp_filename = experiment.output + ".part"
+            try:
+                with open(tmp_filename, 'wb') as f:
+                    _copy(stream, f, length)
+                if os.path.getsize(tmp_filename) != length:
+                    raise IOError("incomplete upload")
+                os.rename(tmp_filename, experiment.output)
+            except (IOError, OSError, socket.error):
+                status = 'failed'
+        with self.lock:
+            if status == 'done':
+                status = self.manifest.record(experiment, status, run_time)
+            self._log("{}: {} by {} in {:.1f} s".format(experiment.output, status, worker, run_time))
+            if status == 'done':
+                self.manifest.save()
+                self._finish(index, status)
+            else:
+                self._attempt_failed(index, status, run_time)
+        return True
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def _reply(self, code, data=None):
+        body = json.dumps(data) if data is not None else ''
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        """:return: (path parts, query) or None if the request is not authorized (the reply is sent)"""
+        token = self.server.token
+        if token is not None and self.headers.get(TOKEN_HEADER) != token:
+            self._reply(403, {'error': 'invalid token'})
+            return None
+        url = urlparse.urlparse(self.path)
+        return [part for part in url.path.split('/') if part], urlparse.parse_qs(url.query)
+
+    def do_POST(self):
+        route = self._route()
+        if route is None:
+            return
+        parts, _ = route
+        coordinator = self.server.coordinator
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length)) if length else {}
+        if parts == ['lease']:
+            self._reply(200, coordinator.lease(body.get('worker', self.client_address[0])))
+        elif len(parts) == 2 and parts[0] == 'heartbeat':
+            if coordinator.heartbeat(parts[1]):
+                self._reply(200, {'ok': True})
+            else:
+                self._reply(410, {'error': 'lease expired'})
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_PUT(self):
+        route = self._route()
+        if route is None:
+            return
+        parts, query = route
+        if len(parts) != 2 or parts[0] != 'result':
+            self._reply(404, {'error': 'not found'})
+            return
+        status = query.get('status', ['failed'])[0]
+        run_time = float(query.get('run_time', [0])[0])
+        length = int(self.headers.get('Content-Length', 0))
+        if self.server.coordinator.result(parts[1], status, run_time, self.rfile, length):
+            self._reply(200, {'ok': True})
+        else:
+            self._reply(410, {'error': 'lease expired'})
+
+    def do_GET(self):
+        route = self._route()
+        if route is None:
+            return
+        parts, _ = route
+        filename = self.server.coordinator.files.get(parts[1]) if len(parts) == 2 and parts[0] == 'files' else None
+        if filename is None:
+            self._reply(404, {'error': 'not found'})
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(os.path.getsize(filename)))
+        self.end_headers()
+        with open(filename, 'rb') as f:
+            _copy(f, self.wfile)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CoordinatorServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, coordinator, host='127.0.0.1', port=DEFAULT_PORT, token=None):
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port), _Handler)
+        self.coordinator = coordinator
+        self.token = token
+
+
+def serve(coordinator, host='127.0.0.1', port=DEFAULT_PORT, token=None, linger=None):
+    """
+    Serves the experiments until all of them are done or failed.
+    :param linger: the time (seconds) the coordinator still answers after the end, so that the waiting workers
+                   learn that they are done (by default, the lease time, at most 30 seconds)
+    :return: the number of the failed experiments
+    """
+    server = CoordinatorServer(coordinator, host, port, token)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        # wait with a timeout (an untimed wait cannot be interrupted)
+        while not coordinator.finished.wait(1):
+            pass
+        time.sleep(min(coordinator.lease_seconds, 30) if linger is None else linger)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return coordinator.failed
+
+
+class LeaseExpired(Exception):
+    pass
+
+
+class _Client(object):
+
+    def __init__(self, url, token=None, timeout=60):
+        self.url = url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+
+    def request(self, method, path, data=None, length=None, headers=None):
+        request = urllib2.Request(self.url + path, data=data, headers=headers or {})
+        request.get_method = lambda: method
+        if self.token is not None:
+            request.add_header(TOKEN_HEADER, self.token)
+        if length is not None:
+            request.add_header('Content-Length', str(length))
+        try:
+            return urllib2.urlopen(request, timeout=self.timeout)
+        except urllib2.HTTPError as e:
+            if e.code == 410:
+                raise LeaseExpired()
+            raise
+
+    def json(self, method, path, data=None):
+        response = self.request(method, path, json.dumps(data) if data is not None else '',
+                                headers={'Content-Type': 'application/json'})
+        return json.loads(response.read())
+
+    def fetch(self, sha1, filename):
+        """Downloads the file (if it is not in the cache)"""
+        if os.path.isfile(filename):
+            return
+        tmp_filename = "{}.{}.tmp".format(filename, os.getpid())
+        with open(tmp_filename, 'wb') as f:
+            _copy(self.request('GET', '/files/' + sha1), f)
+        os.rename(tmp_filename, filename)
+
+    def upload(self, lease, status, run_time, filename=None):
+        query = urllib.urlencode({'status': status, 'run_time': run_time})
+        if filename is None:
+            self.request('PUT', '/result/{}?{}'.format(lease, query), '', 0)
+            return
+        with open(filename, 'rb') as f:
+            self.request('PUT', '/result/{}?{}'.format(lease, query), f, os.path.getsize(filename),
+                         headers={'Content-Type': 'application/octet-stream'})
+
+
+def _simulate(config):
+    from pyss.run_simulator import parse_and_run_simulator
+    parse_and_run_simulator(config, Exception)
+
+
+def _run_lease(client, reply, cache_folder, with_progress_freq=None):
+    """Runs the experiment of the lease (in a child process, while sending the heartbeats) and uploads the output"""
+    # (the extension tells how the source is read, e.g. a compressed trace or a synthetic workload)
+    source = os.path.join(cache_folder, reply['source'] + reply['source_extension'])
+    config_name = os.path.join(cache_folder, reply['config'] + '.py')
+    client.fetch(reply['source'], source)
+    client.fetch(reply['config'], config_name)
+    output = os.path.join(cache_folder, reply['lease'] + '_' + reply['output'])
+    start = time.time()
+    try:
+        config = load_config(config_name, source, output, with_progress_freq)
+    except ConfigError as e:
+        print("{}: {}".format(reply['config'], e), file=sys.stderr)
+        client.upload(reply['lease'], 'failed', time.time() - start)
+        return 'failed'
+    child = multiprocessing.Process(target=_simulate, args=(config,))
+    child.start()
+    try:
+        while True:
+            child.join(max(1, reply['lease_seconds'] / 3.0))
+            if not child.is_alive():
+                break
+            client.json('POST', '/heartbeat/' + reply['lease'])
+        run_time = time.time() - start
+        if child.exitcode == 0 and os.path.isfile(output):
+            client.upload(reply['lease'], 'done', run_time, output)
+            return 'done'
+        client.upload(reply['lease'], 'failed', run_time)
+        return 'failed'
+    finally:
+        if child.is_alive():
+            child.terminate()
+            child.join()
+        for filename in (output, output + '.progress', output + '.snapshot'):
+            if os.path.isfile(filename):
+                os.remove(filename)
+
+
+def work(url, cache_folder, name=None, token=None, with_progress_freq=None, connect_timeout=60, verbose=True):
+    """
+    Leases and runs experiments until the coordinator has none left.
+    :param cache_folder: the folder of the downloaded files and of the outputs being computed
+    :param connect_timeout: the worker stops if the coordinator is unreachable for that long (seconds)
+    :return: the number of the experiments done
+    """
+    if name is None:
+        name = "{}-{}".format(socket.gethostname(), os.getpid())
+    if not os.path.isdir(cache_folder):
+        try:
+            os.makedirs(cache_folder)
+        except OSError:
+            # created by another worker
+            pass
+    client = _Client(url, token)
+    n_done = 0
+    unreachable_since = None
+    while True:
+        try:
+            reply = client.json('POST', '/lease', {'worker': name})
+            unreachable_since = None
+        except (urllib2.URLError, socket.error) as e:
+            if isinstance(e, urllib2.HTTPError):
+                raise
+            if unreachable_since is None:
+                unreachable_since = time.time()
+            elif time.time() - unreachable_since > connect_timeout:
+                return n_done
+            time.sleep(1)
+            continue
+        if reply.get('done'):
+            return n_done
+        if 'wait' in reply:
+            time.sleep(reply['wait'])
+            continue
+        try:
+            status = _run_lease(client, reply, cache_folder, with_progress_freq)
+        except LeaseExpired:
+            status = 'expired'
+        except (urllib2.URLError, socket.error, IOError):
+            # the coordinator will lease the experiment again when the lease expires
+            traceback.print_exc()
+            status = 'lost'
+        if status == 'done':
+            n_done += 1
+        if verbose:
+            print("{}: {} {}".format(name, reply['output'], status))
+
+
+def _work(counter, args):
+    n_done = work(*args)
+    with counter.get_lock():
+        counter.value += n_done
+
+
+def run_workers(url, cache_folder, n_workers=None, token=None, with_progress_freq=None, connect_timeout=60):
+    """
+    Runs n_workers workers (by default, one per CPU) on this node.
+    :return: the number of the experiments done
+    """
+    if n_workers is None:
+        n_workers = multiprocessing.cpu_count()
+    hostname = socket.gethostname()
+    share_code_version()
+    counter = multiprocessing.Value('i', 0)
+    # the workers are not daemonic: each runs its simulations in child processes
+    processes = [multiprocessing.Process(target=_work, args=(counter, (url, cache_folder, "{}-{}".format(hostname, i),
+                                                                      token, with_progress_freq, connect_timeout)))
+                 for i in range(n_workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return counter.value
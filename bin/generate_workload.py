@@ -0,0 +1,66 @@
+'''
+Writes a synthetic workload (see pyss/base/workload_generator.py) as a SWF file.
+
+    generate_workload.py [--jobs N] [--processors N] [--load L] [--seed S] [--users N] [workload_file] output_file
+
+The parameters are read from the workload file (the defaults of the model are used without it) and the options
+override them. The output file "-" is the standard output.
+
+Copyright (C) 2022 University of Central Florida
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+from __future__ import print_function
+
+import argparse
+import sys
+
+import context
+from base.workload_generator import WorkloadModel, write_swf
+
+
+def model_from_args(args):
+    changes = dict((name, value) for name, value in (
+        ('num_jobs', args.jobs),
+        ('num_processors', args.processors),
+        ('load', args.load),
+        ('seed', args.seed),
+        ('users', args.users),
+    ) if value is not None)
+    if args.workload_file:
+        return WorkloadModel.from_file(args.workload_file, **changes)
+    return WorkloadModel(**changes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=None, help="the number of the jobs")
+    parser.add_argument('--processors', type=int, default=None, help="the number of the processors of the machine")
+    parser.add_argument('--load', type=float, default=None, help="the offered load")
+    parser.add_argument('--seed', type=int, default=None, help="the seed of the random generator")
+    parser.add_argument('--users', type=int, default=None, help="the number of the users")
+    parser.add_argument('workload_file', nargs='?', default=None, help="the parameters of the workload (.workload)")
+    parser.add_argument('output_file', help="the output file (.swf), - for the standard output")
+    args = parser.parse_args()
+    try:
+        model = model_from_args(args)
+    except ValueError as e:
+        print("invalid workload: {}".format(e), file=sys.stderr)
+        sys.exit(1)
+    if args.output_file == '-':
+        write_swf(model, sys.stdout)
+    else:
+        with open(args.output_file, 'w') as f:
+            write_swf(model, f)
@@ -22,49 +22,28 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 from __future__ import print_function
 
 import argparse
-import multiprocessing
 import os.path
 import sys
 import glob
 import csv
 
 import context
-from pyss.run_simulator import parse_and_run_simulator
+from batch import Manifest, make_experiments, plan, run_batch
+from config_schema import ConfigError
 
-slowdowns = {
-    'CPLEX': 1000,
-    'PureBF': 50,
-    'CVH': 10,
-}
-
-
-def mp_worker(arg):
-    # print("Running with parameters: {}".format(arg[0]))
-    return parse_and_run_simulator(arg[0], arg[1])
+MANIFEST_NAME = "batch_manifest.json"
 
 
 def scs_from_dirs(sources, configs, output_folder, output_filename_template="{}___{}.swf"):
-    # add sizes of sources
-    ss = [(os.path.getsize(name), name) for name in sources]
-    # add slowdowns of configs
-    cs = []
-    for name in configs:
-        slowdown = 1
-        for key in slowdowns:
-            if key in name:
-                slowdown *= slowdowns[key]
-        cs.append((slowdown, name))
     scs = []
-    for s_sld, s_name in ss:
-        for c_sld, c_name in cs:
-            scs.append((s_sld*c_sld,
-                        s_name,
+    for s_name in sources:
+        for c_name in configs:
+            scs.append((s_name,
                         c_name,
                         os.path.join(output_folder,
                                      output_filename_template.format(os.path.basename(s_name).split('.')[0],
                                                                      os.path.basename(c_name).split('.')[0]))))
-    scs.sort(reverse=True)
-    return [(s_name, c_name, o_name) for _, s_name, c_name, o_name in scs]
+    return scs
 
 
 
@@ -75,33 +54,34 @@ def scs_from_file(filename):
     return scs
 
 
-def run_batch_list(n_workers, scs, with_progress_freq=None):
-    args = []
-    exception = Exception
-    for s_name, c_name, o_name in scs:
-        config = {}
-        execfile(c_name, config)
-        del config['__builtins__']
-        config["input_file"] = s_name
-        config["output_swf"] = o_name
-        config["stats"] = False
-        # python 3: exec(open("example.conf").read(), config)
-        if with_progress_freq:
-            config['scheduler']['progressfile_freq'] = with_progress_freq
-        args.append((config, exception))
-    # create Pool
-    pool = multiprocessing.Pool(processes=n_workers)
-    # start jobs
-    pool.map(mp_worker, args, chunksize=1)
-    pool.close()
-    pool.join()
+def run_batch_list(n_workers, scs, with_progress_freq=None, manifest_name=None, force=False, is_dry=False):
+    """
+    Runs the experiments (longest first); the experiments completed by the previous runs are skipped.
+    :param manifest_name: the manifest of the batch (by default, in the folder of the first output file)
+    :return: the number of the failed experiments
+    """
+    if manifest_name is None:
+        manifest_name = os.path.join(os.path.dirname(scs[0][2]), MANIFEST_NAME)
+    manifest = Manifest(manifest_name)
+    experiments = make_experiments(scs, manifest)
+    if is_dry:
+        to_run, to_skip = plan(experiments, manifest, force)
+        for experiment in to_skip:
+            print("done: {}".format(experiment))
+        for experiment in to_run:
+            print("run (~{:.0f} s): {}".format(experiment.estimate, experiment))
+        return 0
+    return run_batch(experiments, manifest, n_workers, with_progress_freq=with_progress_freq, force=force)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument('--dry', action='store_true', help="if set, the arguments will be printed and the experiments will not run")
+    parser.add_argument('--dry', action='store_true', help="if set, the plan will be printed and the experiments will not run")
     parser.add_argument('--processes', type=int, default=None, help="number of parallel processes")
     parser.add_argument('--progress_freq', type=int, default=None, help='if set, the "progress" option will be forced')
+    parser.add_argument('--manifest', type=str, default=None,
+                        help="the manifest of the batch (by default, " + MANIFEST_NAME + " in the folder of the first output)")
+    parser.add_argument('--force', action='store_true', help="if set, the experiments done already will run again")
     subparsers = parser.add_subparsers()
     parser_glob = subparsers.add_parser('d', help='experiments are defined with a set of globs/dirs')
     parser_glob.add_argument('source_glob', help="glob/dir of source files (.swf)")
@@ -140,7 +120,15 @@ if __name__ == "__main__":
                 writer = csv.writer(f)
                 writer.writerows(scs)
             exit()
-    if is_dry:
-        print(*scs, sep='\n')
-    else:
-        run_batch_list(num_processes, scs, with_progress_freq=args.progress_freq)
\ No newline at end of file
+    if not scs:
+        print("no experiments")
+        exit()
+    try:
+        failed = run_batch_list(num_processes, scs, with_progress_freq=args.progress_freq,
+                                manifest_name=args.manifest, force=args.force, is_dry=is_dry)
+    except ConfigError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    if failed:
+        print("{} experiments failed".format(failed))
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,120 @@
+'''
+Runs a batch of experiments on several nodes.
+
+On one node, the coordinator serves the experiments (defined as for run_batch.py):
+    run_distributed.py serve [--port PORT] [--token TOKEN] d <source_glob> <config_glob> <output_folder>
+    run_distributed.py serve [--port PORT] [--token TOKEN] f <csv file>
+on each node (including the coordinator's, if it should compute too), the workers run them:
+    run_distributed.py work http://<coordinator>:<port> [--processes N] [--token TOKEN]
+
+The outputs and the manifest of the batch are written by the coordinator; a restarted coordinator
+skips the experiments done already (as run_batch.py).
+
+Copyright (C) 2022 University of Central Florida
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+'''
+from __future__ import print_function
+
+import argparse
+import glob
+import os.path
+import sys
+import tempfile
+
+import context
+from batch import Manifest, make_experiments
+from config_schema import ConfigError, load_config_file, validate
+from distributed import Coordinator, DEFAULT_PORT, serve, run_workers
+from run_batch import MANIFEST_NAME, scs_from_dirs, scs_from_file
+
+
+def _scs(args):
+    if hasattr(args, 'filename'):
+        return scs_from_file(args.filename)
+    if os.path.isdir(args.source_glob):
+        sources = glob.glob(os.path.join(args.source_glob, "*.swf"))
+    else:
+        sources = [s for s in glob.glob(args.source_glob) if s.endswith('.swf')]
+    if os.path.isdir(args.config_glob):
+        configs = glob.glob(os.path.join(args.config_glob, "*.py"))
+    else:
+        configs = [s for s in glob.glob(args.config_glob) if s.endswith('.py')]
+    return scs_from_dirs(sources, configs, args.output_folder)
+
+
+def run_serve(args):
+    scs = _scs(args)
+    if not scs:
+        print("no experiments")
+        return 0
+    try:
+        for c_name in sorted(set(c_name for _, c_name, _ in scs)):
+            validate(load_config_file(c_name))
+    except ConfigError as e:
+        print(e, file=sys.stderr)
+        return 1
+    manifest_name = args.manifest or os.path.join(os.path.dirname(scs[0][2]), MANIFEST_NAME)
+    manifest = Manifest(manifest_name)
+    coordinator = Coordinator(make_experiments(scs, manifest), manifest, lease_seconds=args.lease,
+                              max_attempts=args.attempts, force=args.force)
+    print("serving on {}:{}".format(args.host, args.port))
+    return serve(coordinator, args.host, args.port, args.token)
+
+
+def run_work(args):
+    cache_folder = args.cache or os.path.join(tempfile.gettempdir(), "pyss_worker_cache")
+    n_done = run_workers(args.url, cache_folder, args.processes, args.token, args.progress_freq, args.connect_timeout)
+    print("{} experiments done".format(n_done))
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers()
+
+    parser_serve = subparsers.add_parser('serve', help='coordinate the experiments')
+    parser_serve.set_defaults(function=run_serve)
+    parser_serve.add_argument('--host', type=str, default='0.0.0.0', help="the address to listen on")
+    parser_serve.add_argument('--port', type=int, default=DEFAULT_PORT, help="the port to listen on")
+    parser_serve.add_argument('--token', type=str, default=None, help="if set, the workers must give this token")
+    parser_serve.add_argument('--lease', type=int, default=60,
+                              help="seconds without heartbeat before an experiment is given to another worker")
+    parser_serve.add_argument('--attempts', type=int, default=3, help="number of attempts of a failing experiment")
+    parser_serve.add_argument('--manifest', type=str, default=None,
+                              help="the manifest of the batch (by default, " + MANIFEST_NAME + " in the folder of the first output)")
+    parser_serve.add_argument('--force', action='store_true', help="if set, the experiments done already will run again")
+    experiments_parsers = parser_serve.add_subparsers()
+    parser_glob = experiments_parsers.add_parser('d', help='experiments are defined with a set of globs/dirs')
+    parser_glob.add_argument('source_glob', help="glob/dir of source files (.swf)")
+    parser_glob.add_argument('config_glob', help="glob/dir of config files (.py)")
+    parser_glob.add_argument('output_folder', help="folder for the result files (.swf)")
+    parser_file = experiments_parsers.add_parser('f', help='experiments are defined in a csv file')
+    parser_file.add_argument('filename', help='csv file that defines experiments')
+
+    parser_work = subparsers.add_parser('work', help='run the experiments of a coordinator')
+    parser_work.set_defaults(function=run_work)
+    parser_work.add_argument('url', help="the address of the coordinator (http://host:port)")
+    parser_work.add_argument('--processes', type=int, default=None, help="number of parallel workers (default: one per CPU)")
+    parser_work.add_argument('--token', type=str, default=None, help="the token of the coordinator")
+    parser_work.add_argument('--cache', type=str, default=None, help="folder for the downloaded sources and configs")
+    parser_work.add_argument('--progress_freq', type=int, default=None, help='if set, the "progress" option will be forced')
+    parser_work.add_argument('--connect_timeout', type=int, default=60,
+                             help="seconds before giving up when the coordinator is unreachable")
+
+    args = parser.parse_args()
+    if args.function(args):
+        sys.exit(1)
@@ -28,7 +28,10 @@ import glob
 import csv
 
 import context
+from config_schema import load_config_file, validate, variant
+from schedulers.simulator import share_code_version
 from pyss.run_simulator import parse_and_run_simulator
+from predictors.replay import Trace, replay_configs, accuracy_metrics, write_metrics
 
 N_STEPS = 50
 EXTENT = 2.0
@@ -37,6 +40,15 @@ def make_filename(folder, template, coeff):
     return os.path.join(folder, template.format(int(coeff*1000)))
 
 
+def fork_filename(o_name, fork_at):
+    """
+    The output of a branch of a fork sweep: it is not the result of a standalone run with the coefficient
+    (the jobs submitted before fork_at are predicted with the multiplier of the config file), so it is marked
+    """
+    root, ext = os.path.splitext(o_name)
+    return "{}.fork_at_{}{}".format(root, fork_at, ext)
+
+
 def mp_worker(arg):
     # print("Running with parameters: {}".format(arg[0]))
     return parse_and_run_simulator(arg[0], arg[1])
@@ -57,21 +69,32 @@ def scs_from_params(source, config, output_folder, output_filename_template="{}.
     return scs
 
 
-def run_batch_sweep(n_workers, scs, with_progress_freq=None):
-    args = []
-    exception = Exception
+def sweep_options(scs, with_progress_freq=None):
+    """
+    The options of the experiments of the sweep: the config file is parsed and validated once and
+    the options of each coefficient are made from it in memory
+    """
+    bases = {}
+    options = []
     for s_name, c_name, coeff, o_name in scs:
-        config = {}
-        execfile(c_name, config)
-        # python 3: exec(open("example.conf").read(), config)
-        del config['__builtins__']
-        config["input_file"] = s_name
-        config["output_swf"] = o_name
-        config["stats"] = False
-        config["scheduler"]["predictor"]["predict_multiplier"] = coeff
+        if c_name not in bases:
+            bases[c_name] = validate(load_config_file(c_name))
+        changes = {
+            "input_file": s_name,
+            "output_swf": o_name,
+            "stats": False,
+            "scheduler.predictor.predict_multiplier": coeff,
+        }
         if with_progress_freq:
-            config['scheduler']['progressfile_freq'] = with_progress_freq
-        args.append((config, exception))
+            changes["scheduler.progressfile_freq"] = with_progress_freq
+        options.append(variant(bases[c_name], changes))
+    return options
+
+
+def run_batch_sweep(n_workers, scs, with_progress_freq=None):
+    exception = Exception
+    args = [(config, exception) for config in sweep_options(scs, with_progress_freq)]
+    share_code_version()
     # create Pool
     pool = multiprocessing.Pool(processes=n_workers)
     # start jobs
@@ -80,11 +103,78 @@ def run_batch_sweep(n_workers, scs, with_progress_freq=None):
     pool.join()
 
 
+def _predict_multiplier_setter(coeff):
+    def apply(simulator):
+        predictor = simulator.scheduler.predictor
+        if not hasattr(predictor, "predict_multiplier"):
+            raise ValueError("the predictor {} has no predict_multiplier".format(type(predictor).__name__))
+        predictor.predict_multiplier = coeff
+    return apply
+
+
+def run_fork_sweep(n_workers, scs, fork_at, with_progress_freq=None):
+    """
+    Simulates the source once until the time fork_at (with the predict_multiplier of the config file), then
+    forks a process per coefficient that continues the simulation with that coefficient.
+    The jobs submitted before fork_at are predicted with the multiplier of the config file in all the outputs,
+    so the outputs are approximate results: they are written to the names marked with fork_at (see fork_filename).
+    :return: the number of the failed branches
+    """
+    scs = [(s_name, c_name, coeff, fork_filename(o_name, fork_at)) for s_name, c_name, coeff, o_name in scs]
+    branches = []
+    for (_, _, coeff, o_name), options in zip(scs, sweep_options(scs, with_progress_freq)):
+        # a snapshot of the shared part could not be resumed by the branches
+        options["snapshot_freq"] = 0
+        # (shown in the header of the output)
+        options["fork_at"] = fork_at
+        branches.append((o_name, options, _predict_multiplier_setter(coeff)))
+    config = validate(load_config_file(scs[0][1]))
+    config = variant(config, {
+        "input_file": scs[0][0],
+        "stats": False,
+        "snapshot_freq": 0,
+        # the output of the shared part (copied to the outputs of the branches)
+        "output_swf": os.path.join(os.path.dirname(scs[0][3]), ".fork_prefix_{}.swf".format(os.getpid())),
+    })
+    if with_progress_freq:
+        config['scheduler']['progressfile_freq'] = with_progress_freq
+    try:
+        codes = parse_and_run_simulator(config, Exception, fork_at=fork_at, branches=branches,
+                                        max_processes=n_workers or multiprocessing.cpu_count())
+    finally:
+        # (with the files written next to it by the simulator and the scheduler)
+        for suffix in ("", ".progress", ".checkpointing", ".telemetry.csv"):
+            if os.path.isfile(config["output_swf"] + suffix):
+                os.remove(config["output_swf"] + suffix)
+    return sum(1 for code in codes if code != 0)
+
+
+def run_predictor_sweep(n_workers, scs, metrics_file):
+    """
+    Evaluates the predictors of the sweep offline (by replaying the source file, without simulating the scheduling)
+    and writes their accuracy metrics to metrics_file (a row per coefficient)
+    """
+    s_name = scs[0][0]
+    configs = sweep_options(scs)
+    trace = Trace.from_swf(s_name)
+    predictions = replay_configs(trace, configs, processes=n_workers)
+    write_metrics(metrics_file, [coeff for _, _, coeff, _ in scs],
+                  [accuracy_metrics(predicted, trace.actual_run_time) for predicted in predictions])
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('--dry', action='store_true', help="if set, the arguments will be printed and the experiments will not run")
     parser.add_argument('--processes', type=int, default=None, help="number of parallel processes")
     parser.add_argument('--progress_freq', type=int, default=None, help='if set, the "progress" option will be forced')
+    parser.add_argument('--predictor_only', action='store_true',
+                        help="if set, only the predictors are evaluated (offline, without simulating the scheduling); "
+                             "their accuracy metrics are written to predictor_metrics.csv in the output folder")
+    parser.add_argument('--fork_at', type=int, default=None,
+                        help="if set, the simulation before this time (in the time of the trace) is shared: "
+                             "it runs once (with the predict_multiplier of the config file), then a process is forked "
+                             "for each coefficient; the results are approximate and their names are marked with "
+                             "'.fork_at_<time>'")
     parser.add_argument('source_file', help="data source file (.swf)")
     parser.add_argument('config_file', help="base config file (.py)")
     parser.add_argument('output_folder', help="folder for the result files (.swf)")
@@ -107,6 +197,15 @@ if __name__ == "__main__":
     #         writer.writerows(scs)
     #     exit()
     if is_dry:
+        if args.fork_at is not None and not args.predictor_only:
+            scs = [(s_name, c_name, coeff, fork_filename(o_name, args.fork_at)) for s_name, c_name, coeff, o_name in scs]
         print(*scs, sep='\n')
+    elif args.predictor_only:
+        run_predictor_sweep(num_processes, scs, os.path.join(output_folder, "predictor_metrics.csv"))
+    elif args.fork_at is not None:
+        failed = run_fork_sweep(num_processes, scs, args.fork_at, with_progress_freq=args.progress_freq)
+        if failed:
+            print("{} simulations failed".format(failed))
+            sys.exit(1)
     else:
         run_batch_sweep(num_processes, scs, with_progress_freq=args.progress_freq)
\ No newline at end of file
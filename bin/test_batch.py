@@ -0,0 +1,93 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import os
+import shutil
+import tempfile
+
+from batch import Manifest, make_experiments, plan, run_batch
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyss', '5K_sample')
+
+CONFIG = """
+scheduler = {
+  "name": 'easy_backfill_scheduler',
+  'progressbar': False,
+}
+"""
+
+
+class test_batch(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.source = os.path.join(self.folder, 'input.swf')
+        with open(SAMPLE) as sample, open(self.source, 'w') as f:
+            f.writelines(sample.readlines()[:200])
+        self.configs = [os.path.join(self.folder, name) for name in ('first.py', 'second.py')]
+        for name in self.configs:
+            with open(name, 'w') as f:
+                f.write(CONFIG)
+        self.scs = [(self.source, name, os.path.join(self.folder, 'out', os.path.basename(name) + '.swf'))
+                    for name in self.configs]
+        self.manifest_name = os.path.join(self.folder, 'out', 'manifest.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _plan(self):
+        manifest = Manifest(self.manifest_name)
+        to_run, to_skip = plan(make_experiments(self.scs, manifest, version='test'), manifest)
+        return [experiment.config for experiment in to_run], [experiment.config for experiment in to_skip]
+
+    def _run(self):
+        manifest = Manifest(self.manifest_name)
+        return run_batch(make_experiments(self.scs, manifest, version='test'), manifest, 1, verbose=False)
+
+    def test_completed_experiments_are_skipped(self):
+        self.assertEqual(self._run(), 0)
+        self.assertEqual(self._plan(), ([], self.configs))
+        entry = Manifest(self.manifest_name).experiments[self.scs[0][2]]
+        self.assertEqual(entry['status'], 'done')
+        self.assertTrue(entry['run_time'] > 0)
+
+    def test_changed_experiments_run_again(self):
+        self._run()
+        with open(self.configs[1], 'a') as f:
+            f.write("# changed\n")
+        self.assertEqual(self._plan(), ([self.configs[1]], [self.configs[0]]))
+        # a new version of the code changes all the keys
+        manifest = Manifest(self.manifest_name)
+        to_run, _ = plan(make_experiments(self.scs, manifest, version='other'), manifest)
+        self.assertEqual(len(to_run), 2)
+
+    def test_damaged_output_runs_again(self):
+        self._run()
+        with open(self.scs[0][2], 'a') as f:
+            f.write("1 2 3\n")
+        self.assertEqual(self._plan(), ([self.configs[0]], [self.configs[1]]))
+
+    def test_incomplete_output_is_invalid(self):
+        manifest = Manifest(self.manifest_name)
+        experiment = make_experiments(self.scs, manifest, version='test')[0]
+        os.makedirs(os.path.dirname(experiment.output))
+        with open(experiment.output, 'w') as f:
+            f.write("; header\n1 0 0 10 1 -1 -1 1 10 -1 1 1 1 1 1 -1 -1 -1\n")
+        self.assertEqual(manifest.record(experiment, 'done', 1.0), 'invalid')
+        self.assertFalse(manifest.is_done(experiment))
+
+    def test_estimates_come_from_the_history(self):
+        manifest = Manifest(self.manifest_name)
+        first, second = make_experiments(self.scs, manifest, version='test')
+        # without history, the experiments are estimated by the size of the source
+        self.assertEqual(manifest.estimate(first), manifest.estimate(second))
+        manifest.experiments['elsewhere.swf'] = {'status': 'done', 'config': second.config, 'source': 'other.swf',
+                                                 'source_size': second.source_size * 2, 'run_time': 100.0, 'key': ''}
+        self.assertEqual(manifest.estimate(second), 50.0)
+        to_run, _ = plan([first, second], manifest)
+        self.assertEqual(to_run, [second, first])
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
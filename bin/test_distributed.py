@@ -0,0 +1,121 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib2
+
+from batch import Manifest, make_experiments, plan, count_jobs
+from distributed import Coordinator, CoordinatorServer, run_workers, TOKEN_HEADER, _extension
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyss', '5K_sample')
+
+CONFIG = """
+scheduler = {
+  "name": 'easy_backfill_scheduler',
+  'progressbar': False,
+}
+"""
+
+
+class test_distributed(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.source = os.path.join(self.folder, 'input.swf')
+        with open(SAMPLE) as sample, open(self.source, 'w') as f:
+            f.writelines(sample.readlines()[:200])
+        self.configs = [os.path.join(self.folder, name) for name in ('first.py', 'second.py', 'third.py')]
+        for name in self.configs:
+            with open(name, 'w') as f:
+                f.write(CONFIG + "# " + name + "\n")
+        self.scs = [(self.source, name, os.path.join(self.folder, 'out', os.path.basename(name) + '.swf'))
+                    for name in self.configs]
+        self.manifest_name = os.path.join(self.folder, 'out', 'manifest.json')
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        shutil.rmtree(self.folder)
+
+    def _coordinator(self, **kwargs):
+        manifest = Manifest(self.manifest_name)
+        return Coordinator(make_experiments(self.scs, manifest, version='test'), manifest, verbose=False, **kwargs)
+
+    def _serve(self, coordinator, token=None):
+        self.server = CoordinatorServer(coordinator, '127.0.0.1', 0, token)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return "http://127.0.0.1:{}".format(self.server.server_address[1])
+
+    def test_workers_on_localhost(self):
+        coordinator = self._coordinator()
+        url = self._serve(coordinator)
+        n_done = run_workers(url, os.path.join(self.folder, 'cache'), 2, connect_timeout=5)
+        self.assertEqual(n_done, 3)
+        self.assertTrue(coordinator.finished.is_set())
+        self.assertEqual(coordinator.failed, 0)
+        manifest = Manifest(self.manifest_name)
+        to_run, to_skip = plan(make_experiments(self.scs, manifest, version='test'), manifest)
+        self.assertEqual((len(to_run), len(to_skip)), (0, 3))
+        # the outputs of the same simulation are the same
+        outputs = []
+        for _, _, output in self.scs:
+            with open(output) as f:
+                outputs.append([line for line in f if not line.startswith(';')])
+        self.assertEqual(len(outputs[0]), count_jobs(self.source))
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], outputs[2])
+
+    def test_cached_source_keeps_its_extension(self):
+        self.assertEqual(_extension('/data/trace.swf.gz'), '.swf.gz')
+        self.assertEqual(_extension('/data/trace.swf'), '.swf')
+        self.source = os.path.join(self.folder, 'input.swf.gz')
+        with open(SAMPLE) as sample, gzip.open(self.source, 'w') as f:
+            f.writelines(sample.readlines()[:200])
+        self.scs = [(self.source, name, output) for _, name, output in self.scs[:1]]
+        coordinator = self._coordinator()
+        url = self._serve(coordinator)
+        self.assertEqual(run_workers(url, os.path.join(self.folder, 'cache'), 1, connect_timeout=5), 1)
+        self.assertEqual(coordinator.failed, 0)
+        with open(self.scs[0][2]) as f:
+            self.assertEqual(len([line for line in f if not line.startswith(';')]), count_jobs(self.source))
+        self.assertTrue(any(name.endswith('.swf.gz') for name in os.listdir(os.path.join(self.folder, 'cache'))))
+
+    def test_expired_lease_is_leased_again(self):
+        coordinator = self._coordinator(lease_seconds=0.5, max_attempts=2)
+        first = coordinator.lease('first')
+        time.sleep(0.6)
+        second = coordinator.lease('second')
+        self.assertEqual(second['output'], first['output'])
+        self.assertFalse(coordinator.heartbeat(first['lease']))
+        self.assertTrue(coordinator.heartbeat(second['lease']))
+        # the result of an expired lease is discarded
+        self.assertFalse(coordinator.result(first['lease'], 'failed', 1.0, None, 0))
+        self.assertTrue(coordinator.result(second['lease'], 'failed', 1.0, None, 0))
+        # no more attempts for the failed experiment
+        leased = [coordinator.lease('third')['output'] for _ in range(2)]
+        self.assertNotIn(first['output'], leased)
+        self.assertEqual(coordinator.failed, 1)
+        self.assertIn('wait', coordinator.lease('third'))
+
+    def test_token_is_required(self):
+        url = self._serve(self._coordinator(), token='secret')
+        request = urllib2.Request(url + '/lease', data='{}')
+        with self.assertRaises(urllib2.HTTPError) as context:
+            urllib2.urlopen(request)
+        self.assertEqual(context.exception.code, 403)
+        request.add_header(TOKEN_HEADER, 'secret')
+        self.assertIn('"lease"', urllib2.urlopen(request).read())
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
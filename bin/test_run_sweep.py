@@ -0,0 +1,52 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import os
+import shutil
+import tempfile
+
+from run_sweep import fork_filename, run_fork_sweep
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyss', '5K_sample')
+
+CONFIG = """
+scheduler = {
+  "name": 'easy_prediction_backfill_scheduler',
+  'progressbar': False,
+  'predictor': {"name": "predictor_reqtime"},
+  'corrector': {"name": "reqtime"},
+}
+"""
+
+
+class test_fork_sweep(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.source = os.path.join(self.folder, 'input.swf')
+        with open(SAMPLE) as sample, open(self.source, 'w') as f:
+            f.writelines(sample.readlines()[:300])
+        self.config = os.path.join(self.folder, 'config.py')
+        with open(self.config, 'w') as f:
+            f.write(CONFIG)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_fork_filename(self):
+        self.assertEqual(fork_filename('/out/1000.swf', 3600), '/out/1000.fork_at_3600.swf')
+
+    def test_outputs_are_marked(self):
+        scs = [(self.source, self.config, coeff, os.path.join(self.folder, '{}.swf'.format(int(coeff * 1000))))
+               for coeff in (0.5, 2.0)]
+        self.assertEqual(run_fork_sweep(1, scs, 86400), 0)
+        self.assertEqual(sorted(name for name in os.listdir(self.folder) if name.endswith('.swf')),
+                         ['2000.fork_at_86400.swf', '500.fork_at_86400.swf', 'input.swf'])
+        with open(os.path.join(self.folder, '500.fork_at_86400.swf')) as f:
+            header = [line for line in f if line.startswith(';')]
+        self.assertTrue(any("'fork_at': 86400" in line for line in header))
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Instrumentation of the event loop of the simulator (enabled with the options event_profile and event_timeline_freq).
+
+EventProfile accumulates, for each type of event, the number of the handled events and the wall-clock time
+spent in their handlers. Handling an event is a pass of the scheduler (the handlers call the scheduler):
+the durations of the passes are also counted in histograms, one per length of the queue of the waiting jobs
+(in powers of two), and the durations in each histogram are in powers of two of microseconds.
+
+If timeline_freq is set, a sample of the progress of the simulation is taken every timeline_freq seconds of the time
+spent in the handlers: the (simulated) time, the number of the handled events, the number of the waiting jobs and
+the number of the events in the queue. The samples show which periods of the workload are slow to simulate.
+
+The profile is written at the end of the simulation, as JSON to "<output>.events.json" and the timeline as CSV to
+"<output>.timeline.csv".
+
+When the instrumentation is disabled, the simulator uses the plain EventQueue (no overhead);
+ProfiledEventQueue times the handlers of each event.
+"""
+
+import csv
+import json
+import time
+
+from .event_queue import EventQueue
+
+
+class EventProfile(object):
+
+    TIMELINE_FIELDS = ['handler_seconds', 'time', 'events', 'waiting_jobs', 'queued_events']
+
+    def __init__(self, queue_length, timeline_freq=0):
+        """
+        :param queue_length: a function that returns the number of the waiting jobs
+        :param timeline_freq: seconds (of the time spent in the handlers) between the samples of the timeline;
+                              0 disables the timeline
+        """
+        self.queue_length = queue_length
+        self.timeline_freq = timeline_freq
+        self.counts = {}  # event type name -> number of the handled events
+        self.seconds = {}  # event type name -> seconds spent in the handlers
+        self.max_seconds = {}  # event type name -> the longest handling
+        self.passes = {}  # queue length bucket -> {duration bucket: number of the passes}
+        self.pass_seconds = {}  # queue length bucket -> seconds
+        self.total_seconds = 0.0
+        self.events = 0
+        self.timeline = []
+        self.next_sample = 0.0
+
+    def count(self, event_type):
+        return self.counts.get(event_type.__name__, 0)
+
+    def record(self, event, queue_length, elapsed, queued_events):
+        name = type(event).__name__
+        self.counts[name] = self.counts.get(name, 0) + 1
+        self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+        if elapsed > self.max_seconds.get(name, 0.0):
+            self.max_seconds[name] = elapsed
+        queue_bucket = queue_length.bit_length() if queue_length > 0 else 0
+        duration_bucket = int(elapsed * 1e6).bit_length()
+        histogram = self.passes.setdefault(queue_bucket, {})
+        histogram[duration_bucket] = histogram.get(duration_bucket, 0) + 1
+        self.pass_seconds[queue_bucket] = self.pass_seconds.get(queue_bucket, 0.0) + elapsed
+        self.total_seconds += elapsed
+        self.events += 1
+        if self.timeline_freq and self.total_seconds >= self.next_sample:
+            self.timeline.append((self.total_seconds, event.timestamp, self.events, queue_length, queued_events))
+            self.next_sample = self.total_seconds + self.timeline_freq
+
+    @staticmethod
+    def _bucket_range(bucket):
+        """The range [low, high] of the values of a power-of-two bucket"""
+        return [0, 0] if bucket == 0 else [1 << (bucket - 1), (1 << bucket) - 1]
+
+    def summary(self):
+        return {
+            "events": self.events,
+            "seconds": self.total_seconds,
+            "event_types": dict(
+                (name, {"count": count, "seconds": self.seconds[name], "max_seconds": self.max_seconds.get(name, 0.0)})
+                for name, count in self.counts.items()),
+            "passes": [
+                {
+                    "queue_length": self._bucket_range(queue_bucket),
+                    "count": sum(histogram.values()),
+                    "seconds": self.pass_seconds[queue_bucket],
+                    "duration_us": [self._bucket_range(bucket) + [count]
+                                    for bucket, count in sorted(histogram.items())],
+                }
+                for queue_bucket, histogram in sorted(self.passes.items())
+            ],
+        }
+
+    def write(self, output_name):
+        with open(output_name + ".events.json", 'w') as f:
+            json.dump(self.summary(), f, indent=1, sort_keys=True, separators=(',', ': '))
+        if self.timeline_freq:
+            with open(output_name + ".timeline.csv", 'wb') as f:
+                writer = csv.writer(f)
+                writer.writerow(self.TIMELINE_FIELDS)
+                writer.writerows(self.timeline)
+
+
+class ProfiledEventQueue(EventQueue):
+    """EventQueue that records the handling of each event in an EventProfile"""
+
+    def __init__(self, profile):
+        EventQueue.__init__(self)
+        self.profile = profile
+
+    def advance(self):
+        "pop and handle the next event in the queue"
+        event = self.pop()
+        queue_length = self.profile.queue_length()
+        start = time.time()
+        for handler in self._get_event_handlers(type(event)):
+            handler(event)
+        elapsed = time.time() - start
+        self._latest_handled_timestamp = event.timestamp
+        self.profile.record(event, queue_length, elapsed, len(self))
@@ -49,6 +49,12 @@ class EventQueue(object):
         "Sorted events, used for testing"
         return sorted(self.events)
 
+    @property
+    def next_timestamp(self):
+        "The timestamp of the next event"
+        pass #assert not self.is_empty
+        return self._events_heap.peek()[0]
+
     @property
     def is_empty(self):
         return len(self) == 0
@@ -9,6 +9,9 @@ class Heap(object):
     def pop(self):
         return heapq.heappop(self.contents)
 
+    def peek(self):
+        return self.contents[0]
+
     def remove(self, item):
         # warning: inefficient, O(n)
         self.contents.remove(item)
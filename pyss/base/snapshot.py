@@ -0,0 +1,37 @@
+"""
+Saving and loading of the simulation state ("snapshots").
+
+The state is pickled. Bound methods (e.g., the event handlers registered in the
+event queue) are pickled by reference to their object and name; everything else
+that is not picklable (open files, progress bars, etc.) must be handled by
+__getstate__/__setstate__ of the objects that own it.
+"""
+
+import copy_reg
+import cPickle
+import os
+import types
+
+
+def _reduce_method(method):
+    return getattr, (method.im_self, method.im_func.__name__)
+
+copy_reg.pickle(types.MethodType, _reduce_method)
+
+
+def save_snapshot(state, filename):
+    """
+    Atomically replaces 'filename' with the pickled 'state'
+    (the snapshot is first written to a temporary file).
+    """
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'wb') as f:
+        cPickle.dump(state, f, cPickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.rename(tmp_filename, filename)
+
+
+def load_snapshot(filename):
+    with open(filename, 'rb') as f:
+        return cPickle.load(f)
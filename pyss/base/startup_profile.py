@@ -0,0 +1,85 @@
+"""
+Timing of the startup of a simulation (run_simulator.py --profile-startup).
+
+The profiler times the imports (by wrapping the import statement, like "python3 -X importtime")
+and the named phases of the startup (reading the configuration, making the scheduler, parsing the jobs...).
+"""
+
+from __future__ import print_function
+
+import __builtin__
+import contextlib
+import sys
+import time
+
+
+class StartupProfiler(object):
+
+    def __init__(self):
+        self.imports = {}  # module name -> [self seconds, cumulative seconds]
+        self.phases = []  # (name, seconds)
+        self._stack = []  # the imports in progress: [module name, seconds of the nested imports]
+        self._original_import = None
+        self.start_time = None
+        self.total = None
+
+    def start(self):
+        self.start_time = time.time()
+        self._original_import = __builtin__.__import__
+        __builtin__.__import__ = self._import
+
+    def stop(self):
+        if self._original_import is not None:
+            __builtin__.__import__ = self._original_import
+            self._original_import = None
+            self.total = time.time() - self.start_time
+
+    def _import(self, name, *args):
+        if name in sys.modules:
+            return self._original_import(name, *args)
+        label = name
+        if not label:
+            # from . import module
+            label = "." + ",".join(args[2] if len(args) > 2 and args[2] else ())
+        frame = [label, 0.0]
+        self._stack.append(frame)
+        start = time.time()
+        try:
+            return self._original_import(name, *args)
+        finally:
+            elapsed = time.time() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] += elapsed
+            if label not in self.imports:
+                self.imports[label] = [elapsed - frame[1], elapsed]
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.time() - start))
+
+    def report(self, out=sys.stderr, limit=20):
+        print("startup: {:.3f} s".format(self.total if self.total is not None else time.time() - self.start_time),
+              file=out)
+        for name, seconds in self.phases:
+            print("  {:<24} {:8.3f} s".format(name, seconds), file=out)
+        top = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        print("imports (of {} modules): {:.3f} s".format(
+            len(self.imports), sum(self_time for self_time, _ in self.imports.values())), file=out)
+        print("  {:>10} {:>10}  module".format("self [s]", "cumul [s]"), file=out)
+        for name, (self_time, cumulative) in top:
+            print("  {:10.4f} {:10.4f}  {}".format(self_time, cumulative, name), file=out)
+
+
+@contextlib.contextmanager
+def phase(profiler, name):
+    """Times a phase of the startup if there is a profiler"""
+    if profiler is None:
+        yield
+    else:
+        with profiler.phase(name):
+            yield
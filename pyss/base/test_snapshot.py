@@ -0,0 +1,62 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import os
+import shutil
+import tempfile
+
+from pyss.base.prototype import Job
+from pyss.base.snapshot import save_snapshot, load_snapshot
+from pyss.schedulers.common import CpuSnapshot
+
+
+class _Counter(object):
+    def __init__(self):
+        self.count = 0
+
+    def increment(self):
+        self.count += 1
+
+
+class test_Snapshot(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, "out.swf.snapshot")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_bound_method(self):
+        counter = _Counter()
+        save_snapshot((counter, counter.increment), self.filename)
+        restored, increment = load_snapshot(self.filename)
+        increment()
+        self.assertEqual(restored.count, 1)
+        self.assertFalse(os.path.exists(self.filename + ".tmp"))
+
+    def test_cpu_snapshot(self):
+        cpu_snapshot = CpuSnapshot(10, False)
+        # long enough to exceed the recursion limit if pickled as a linked list
+        for i in range(2000):
+            job = Job(id=i, user_estimated_run_time=10, actual_run_time=10, num_required_processors=1 + i % 2)
+            cpu_snapshot.assignJob(job, 10 * i)
+        save_snapshot(cpu_snapshot, self.filename)
+        restored = load_snapshot(self.filename)
+        self.assertEqual(self._slices(restored), self._slices(cpu_snapshot))
+        self.assertEqual(restored.slices.last.start_time, cpu_snapshot.slices.last.start_time)
+        self.assertEqual(restored.slices.last.list_prev.list_next, restored.slices.last)
+
+    @staticmethod
+    def _slices(cpu_snapshot):
+        result = []
+        s = cpu_snapshot.slices.first
+        while s != None:
+            result.append(str(s))
+            s = s.list_next
+        return result
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
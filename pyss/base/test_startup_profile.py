@@ -0,0 +1,51 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import __builtin__
+import os
+import StringIO
+import sys
+
+from base.startup_profile import StartupProfiler, phase
+import schedulers.simulator as simulator
+
+
+class test_startup_profile(TestCase):
+
+    def test_imports_and_phases_are_timed(self):
+        original_import = __builtin__.__import__
+        profiler = StartupProfiler()
+        profiler.start()
+        try:
+            with phase(profiler, "scheduler"):
+                import schedulers.list_prediction_scheduler
+        finally:
+            profiler.stop()
+        self.assertIs(__builtin__.__import__, original_import)
+        self.assertIn("schedulers.list_prediction_scheduler", profiler.imports)
+        self.assertEqual([name for name, _ in profiler.phases], ["scheduler"])
+        self_time, cumulative = profiler.imports["schedulers.list_prediction_scheduler"]
+        self.assertLessEqual(self_time, cumulative)
+        # list scheduling does not need the CP solver
+        self.assertNotIn("docplex", sys.modules)
+        out = StringIO.StringIO()
+        profiler.report(out)
+        self.assertIn("schedulers.list_prediction_scheduler", out.getvalue())
+
+    def test_phase_without_profiler(self):
+        with phase(None, "nothing"):
+            pass
+
+    def test_code_version_is_shared(self):
+        version = simulator.code_version()
+        simulator.share_code_version()
+        try:
+            self.assertEqual(os.environ[simulator.CODE_VERSION_VARIABLE], version)
+            self.assertIs(simulator.code_version(), version)
+        finally:
+            del os.environ[simulator.CODE_VERSION_VARIABLE]
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
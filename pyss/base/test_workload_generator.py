@@ -0,0 +1,120 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+
+from pyss.base.workload_generator import DAY, WEEK, WorkloadModel, generate_jobs, write_swf
+from pyss.base.workload_parser import parse_lines
+from pyss.run_simulator import parse_and_run_simulator
+from pyss.schedulers.test_fork import _jobs, _options
+
+
+class test_workload_generator(TestCase):
+
+    def test_deterministic(self):
+        def fields(seed):
+            return [(job.submit_time, job.num_required_processors, job.actual_run_time, job.user_estimated_run_time,
+                     job.user_id) for job in generate_jobs(WorkloadModel(num_jobs=500, seed=seed))]
+        self.assertEqual(fields(3), fields(3))
+        self.assertNotEqual(fields(3), fields(4))
+
+    def test_jobs(self):
+        model = WorkloadModel(num_jobs=5000, num_processors=512, max_size=128, users=20)
+        jobs = list(generate_jobs(model))
+        self.assertEqual([job.id for job in jobs], range(1, 5001))
+        submit_times = [job.submit_time for job in jobs]
+        self.assertEqual(submit_times, sorted(submit_times))
+        sizes = set(job.num_required_processors for job in jobs)
+        self.assertTrue(sizes <= set(2 ** k for k in range(8)))
+        self.assertIn(1, sizes)
+        self.assertIn(128, sizes)
+        for job in jobs:
+            self.assertGreaterEqual(job.actual_run_time, 1)
+            self.assertLessEqual(job.actual_run_time, job.user_estimated_run_time)
+            self.assertEqual(job.user_estimated_run_time % model.request_granularity, 0)
+            self.assertTrue(1 <= job.user_id <= 20)
+        # the users repeat their applications
+        self.assertLess(len(set(job.executable_id for job in jobs)), len(jobs) / 2)
+
+    def test_load_and_cycles(self):
+        model = WorkloadModel(num_jobs=20000, killed_probability=0, run_time_jitter=0)
+        jobs = list(generate_jobs(model))
+        duration = jobs[-1].submit_time - jobs[0].submit_time
+        work = sum(job.num_required_processors * job.actual_run_time for job in jobs)
+        self.assertAlmostEqual(float(work) / duration / model.num_processors, model.load, delta=0.25 * model.load)
+
+        def arrivals(in_period):
+            return sum(1 for job in jobs if in_period(job.submit_time))
+        weekdays = arrivals(lambda t: t % WEEK < 5 * DAY)
+        self.assertAlmostEqual(float(len(jobs) - weekdays) / 2 / (weekdays / 5.0), model.weekend_factor, delta=0.1)
+        afternoon = arrivals(lambda t: 12 * 3600 <= t % DAY < 16 * 3600)
+        night = arrivals(lambda t: t % DAY < 4 * 3600)
+        self.assertGreater(afternoon, 2 * night)
+
+    def test_invalid_parameters(self):
+        self.assertRaises(ValueError, WorkloadModel, runtime=1)
+        self.assertRaises(ValueError, WorkloadModel, num_processors=64, max_size=128)
+
+    def test_swf(self):
+        model = WorkloadModel(num_jobs=100, num_processors=64)
+        output = StringIO()
+        write_swf(model, output)
+        output.seek(0)
+        self.assertIn("; MaxProcs: 64\n", output.getvalue())
+        parsed = list(parse_lines(output))
+        self.assertEqual([(job.number, job.submit_time, job.run_time, job.num_requested_processors, job.requested_time)
+                          for job in parsed],
+                         [(job.id, job.submit_time, job.actual_run_time, job.num_required_processors,
+                           job.user_estimated_run_time) for job in generate_jobs(model)])
+
+
+class test_workload_stream(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.workload = os.path.join(self.folder, 'test.workload')
+        with open(self.workload, 'w') as f:
+            f.write("num_jobs = 1500\nnum_processors = 256\nload = 0.9\nseed = 7\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_stream_is_the_same_as_the_swf(self):
+        swf = os.path.join(self.folder, 'test.swf')
+        with open(swf, 'w') as f:
+            write_swf(WorkloadModel.from_file(self.workload), f)
+        from_swf = os.path.join(self.folder, 'from_swf.swf')
+        streamed = os.path.join(self.folder, 'streamed.swf')
+        parse_and_run_simulator(_options(swf, from_swf), Exception)
+        parse_and_run_simulator(_options(self.workload, streamed), Exception)
+        self.assertEqual(len(_jobs(streamed)), 1500)
+        self.assertEqual(_jobs(streamed), _jobs(from_swf))
+
+    def test_terminated_jobs_are_not_kept(self):
+        from pyss.schedulers.simulator import Simulator
+        from config_schema import SCHEDULERS
+        model = WorkloadModel.from_file(self.workload)
+        options = _options(self.workload, os.path.join(self.folder, 'out.swf'))
+        options['num_processors'] = model.num_processors
+        scheduler = SCHEDULERS.get(options['scheduler']['name'])(options)
+        simulator = Simulator(generate_jobs(model), model.num_processors, scheduler, options['output_swf'],
+                              self.workload, options, stream=True)
+        simulator.run()
+        simulator.output_swf.close()
+        self.assertEqual(simulator.num_terminated_jobs, 1500)
+        self.assertEqual(simulator.terminated_jobs, [])
+        self.assertEqual(len(_jobs(options['output_swf'])), 1500)
+
+    def test_invalid_workload(self):
+        with open(self.workload, 'a') as f:
+            f.write("max_size = 512\n")
+        self.assertRaises(Exception, parse_and_run_simulator,
+                          _options(self.workload, os.path.join(self.folder, 'out.swf')), Exception)
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
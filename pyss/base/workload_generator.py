@@ -0,0 +1,200 @@
+"""
+Synthetic workloads: a parameterized model of the jobs of a parallel machine.
+
+- Arrivals: a Poisson process which rate follows a daily cycle (a cosine with its peak at peak_hour)
+  and a weekly cycle (the rate on the weekends is weekend_factor times the rate on the weekdays);
+  the average rate is set so that the offered load (the requested processor-seconds per second
+  divided by the number of processors) is load. The time 0 is a Monday, midnight.
+- Jobs: the run times are log-uniform between min_run_time and max_run_time; the sizes are powers of two
+  (a job is serial with the probability serial_probability, otherwise its size is 2^k with k uniform
+  between 1 and log2(max_size)).
+- Users: the jobs are submitted by users chosen with a Zipf distribution (exponent user_skew). A user repeats
+  one of its recent applications (same size, similar run time, same request and executable) with the probability
+  repeat_probability, otherwise it submits a new application. Each user overestimates the run times of its jobs by
+  its own factor (log-uniform between 1 and overestimate); the requests are rounded up to request_granularity
+  seconds, and a job is killed at its requested time with the probability killed_probability.
+
+The jobs are generated lazily, in the order of submission, so a simulation can stream them (see
+schedulers.simulator.Simulator) without storing the workload; they can also be written as a SWF file.
+A workload is described by a file of parameters (a ".workload" file: Python literals or JSON, as the configuration
+files); the missing parameters have the default values of WorkloadModel.PARAMETERS.
+"""
+
+import bisect
+import math
+import random
+
+from .prototype import Job
+
+WORKLOAD_EXTENSION = ".workload"
+
+DAY = 24 * 3600
+WEEK = 7 * DAY
+
+
+class WorkloadModel(object):
+
+    PARAMETERS = {
+        'num_jobs': 10000,
+        'seed': 0,
+        'num_processors': 1024,
+        'load': 0.8,
+        'daily_amplitude': 0.5,
+        'peak_hour': 14,
+        'weekend_factor': 0.5,
+        'min_run_time': 30,
+        'max_run_time': 86400,
+        'serial_probability': 0.2,
+        'max_size': None,  # by default, the number of processors
+        'users': 200,
+        'user_skew': 1.0,
+        'repeat_probability': 0.8,
+        'recent_applications': 5,
+        'run_time_jitter': 0.1,
+        'overestimate': 4.0,
+        'request_granularity': 300,
+        'killed_probability': 0.05,
+        'groups': 10,
+    }
+
+    def __init__(self, **parameters):
+        unknown = sorted(set(parameters) - set(self.PARAMETERS))
+        if unknown:
+            raise ValueError("unknown workload parameters: " + ", ".join(unknown))
+        for name, default in self.PARAMETERS.items():
+            setattr(self, name, parameters.get(name, default))
+        if self.max_size is None:
+            self.max_size = self.num_processors
+        if not 1 <= self.max_size <= self.num_processors:
+            raise ValueError("max_size must be between 1 and num_processors")
+        if not 0 < self.min_run_time <= self.max_run_time:
+            raise ValueError("min_run_time must be positive and at most max_run_time")
+        if self.load <= 0:
+            raise ValueError("load must be positive")
+
+    @classmethod
+    def from_file(cls, filename, **changes):
+        """The model of a workload file (with some parameters changed)"""
+        from config_schema import load_config_file
+        parameters = load_config_file(filename)
+        parameters.pop('__doc__', None)
+        parameters.update(changes)
+        return cls(**parameters)
+
+    def parameters(self):
+        """The (name, value) pairs of the parameters, sorted by name"""
+        return [(name, getattr(self, name)) for name in sorted(self.PARAMETERS)]
+
+    @property
+    def max_size_log2(self):
+        return int(math.log(self.max_size, 2))
+
+    def mean_size(self):
+        sizes = [2 ** k for k in range(1, self.max_size_log2 + 1)]
+        if not sizes:
+            return 1.0
+        return self.serial_probability + (1 - self.serial_probability) * float(sum(sizes)) / len(sizes)
+
+    def mean_run_time(self):
+        if self.min_run_time == self.max_run_time:
+            return float(self.min_run_time)
+        return (self.max_run_time - self.min_run_time) / math.log(float(self.max_run_time) / self.min_run_time)
+
+    def mean_arrival_rate(self):
+        """Jobs per second"""
+        return self.load * self.num_processors / (self.mean_size() * self.mean_run_time())
+
+    def relative_rate(self, time):
+        """The arrival rate at the time, relative to the mean rate"""
+        day, seconds = divmod(time % WEEK, DAY)
+        daily = 1 + self.daily_amplitude * math.cos(2 * math.pi * (float(seconds) / DAY - self.peak_hour / 24.0))
+        weekly = self.weekend_factor if day >= 5 else 1.0
+        return daily * weekly * 7 / (5 + 2 * self.weekend_factor)
+
+    def max_relative_rate(self):
+        return (1 + self.daily_amplitude) * max(1.0, self.weekend_factor) * 7 / (5 + 2 * self.weekend_factor)
+
+
+class _User(object):
+
+    def __init__(self, user_id, group_id, overestimate):
+        self.user_id = user_id
+        self.group_id = group_id
+        self.overestimate = overestimate
+        self.applications = []  # the recent (size, run time, request, executable id)
+
+
+def generate_jobs(model):
+    """Yields the jobs of the workload (base.prototype.Job), in the order of submission"""
+    rng = random.Random(model.seed)
+    mean_rate = model.mean_arrival_rate()
+    max_rate = mean_rate * model.max_relative_rate()
+    log_min_run_time = math.log(model.min_run_time)
+    log_max_run_time = math.log(model.max_run_time)
+    max_size_log2 = model.max_size_log2
+
+    users = [_User(user_id, user_id % model.groups + 1,
+                   math.exp(rng.uniform(0, math.log(model.overestimate))) if model.overestimate > 1 else 1.0)
+             for user_id in range(1, model.users + 1)]
+    cumulative_weights = []
+    total = 0.0
+    for rank in range(1, model.users + 1):
+        total += 1.0 / rank ** model.user_skew
+        cumulative_weights.append(total)
+
+    submit_time = 0.0
+    executables = 0
+    for job_id in xrange(1, model.num_jobs + 1):
+        # thinning of a Poisson process at the maximal rate
+        while True:
+            submit_time += rng.expovariate(max_rate)
+            if rng.random() * model.max_relative_rate() <= model.relative_rate(submit_time):
+                break
+        user = users[min(bisect.bisect(cumulative_weights, rng.random() * total), model.users - 1)]
+        if user.applications and rng.random() < model.repeat_probability:
+            size, base_run_time, requested_time, executable_id = rng.choice(user.applications)
+        else:
+            if max_size_log2 == 0 or rng.random() < model.serial_probability:
+                size = 1
+            else:
+                size = 2 ** rng.randint(1, max_size_log2)
+            base_run_time = math.exp(rng.uniform(log_min_run_time, log_max_run_time))
+            granularity = model.request_granularity
+            requested_time = base_run_time * (1 + model.run_time_jitter) * user.overestimate
+            requested_time = max(granularity, int(math.ceil(requested_time / granularity)) * granularity)
+            executables += 1
+            executable_id = executables
+            user.applications.append((size, base_run_time, requested_time, executable_id))
+            if len(user.applications) > model.recent_applications:
+                del user.applications[0]
+        if rng.random() < model.killed_probability:
+            run_time = requested_time
+        else:
+            jitter = model.run_time_jitter
+            run_time = min(requested_time, max(1, int(base_run_time * rng.uniform(1 - jitter, 1 + jitter))))
+        yield Job(id=job_id, user_estimated_run_time=requested_time, actual_run_time=run_time,
+                  num_required_processors=size, submit_time=int(submit_time), user_id=user.user_id,
+                  think_time=-1, group_id=user.group_id, executable_id=executable_id)
+
+
+def swf_header(model):
+    return [
+        "; Computer: Pyss synthetic workload\n",
+        "; MaxNodes: {}\n".format(model.num_processors),
+        "; MaxProcs: {}\n".format(model.num_processors),
+        "; Note: workload parameters: {}\n".format(
+            ", ".join("{}={}".format(name, value) for name, value in model.parameters())),
+    ]
+
+
+def swf_line(job):
+    return "{} {} 0 {} {} -1 -1 {} {} -1 1 {} {} {} 1 -1 -1 -1\n".format(
+        job.id, job.submit_time, job.actual_run_time, job.num_required_processors, job.num_required_processors,
+        job.user_estimated_run_time, job.user_id, job.group_id, job.executable_id)
+
+
+def write_swf(model, output_file):
+    """Writes the workload to a file object as SWF"""
+    output_file.writelines(swf_header(model))
+    for job in generate_jobs(model):
+        output_file.write(swf_line(job))
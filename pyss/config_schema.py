@@ -0,0 +1,325 @@
+"""
+Configurations of the simulations: loading, validation and the registry of the components they name.
+
+A configuration file is a Python file made of assignments of literals (strings, numbers, booleans, None,
+lists, tuples and dictionaries), e.g.:
+
+    scheduler = {
+      "name": 'easy_prediction_backfill_scheduler',
+      'predictor': {"name": "predictor_tsafrir"},
+      'corrector': {"name": "reqtime"},
+    }
+
+or a JSON file with the same structure. The files are parsed, not executed; the configurations of a sweep
+are made in memory from a parsed configuration (see variant).
+
+The schedulers and the predictors are named after their modules (in the packages schedulers and predictors),
+their classes after the modules (see module_to_class). The registry finds them by reading the sources of
+the packages, without importing them: a module (and its dependencies, e.g., docplex or pandas) is imported
+when its class is first used. The correctors are the functions of schedulers/common_correctors.py and
+the sorters are listed in schedulers/sorters.py.
+"""
+
+import ast
+import copy
+import importlib
+import json
+import os
+import re
+
+PYSS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+# the options of the simulation (the options of the scheduler and of its components are in "scheduler")
+OPTIONS = {
+    'scheduler': dict,
+    'input_file': basestring,
+    'output_swf': basestring,
+    'num_processors': int,
+    'stats': bool,
+    'snapshot_freq': (int, float),
+    'use_checkpointing': bool,
+    'checkpointing_sync_interval': (int, float),
+    'event_profile': bool,
+    'event_timeline_freq': (int, float),
+    'large_machine': bool,
+    '__doc__': basestring,
+}
+
+# the options of the scheduler that name sorters (a name or a list of names)
+SORTER_OPTIONS = ('presorter', 'postsorter', 'alternative_presorter')
+
+NUMBER = (int, float)
+SORTERS = (basestring, list, tuple, type(None))
+
+# the options of all the schedulers (in "scheduler")
+SCHEDULER_OPTIONS = {
+    'name': basestring,
+    # (the components are checked on their own)
+    'predictor': object,
+    'corrector': object,
+    'progressbar': bool,
+    'progressfile_freq': NUMBER,
+}
+
+# the options of all the predictors (in "scheduler.predictor")
+PREDICTOR_OPTIONS = {
+    'name': (basestring, type(None)),
+    'warm_start': (basestring, type(None)),
+    # (used by run_predictor.py)
+    'max_cores': (basestring, int),
+}
+
+# the options of all the correctors (in "scheduler.corrector")
+CORRECTOR_OPTIONS = {
+    'name': (basestring, type(None)),
+}
+
+_PREDICTION = {'predictor': object, 'corrector': object}
+_CP = {
+    'running_jobs_prediction_enabled': bool,
+    'limit_n_scheduled': int,
+    'scheduling_timelimit': NUMBER,
+}
+_CP_OBJECTIVE = dict(_CP, objective_function=basestring, BSLD_bound=NUMBER)
+_PERCENT = {'alpha': NUMBER, 'start_weight': NUMBER, 'confidence': NUMBER, 'use_weights': bool}
+_COMPLETE = {'decay': NUMBER, 'sigma_factor': NUMBER + (type(None),), 'use_weights': bool}
+_MULTIPLIER = {'predict_multiplier': NUMBER}
+
+# the options of the components in addition to the options of all of them:
+# {name: (required options, optional options)}; the components that are not listed have no other options
+SCHEDULER_COMPONENT_OPTIONS = {
+    'alpha_easy_scheduler': (_PREDICTION, {}),
+    'common_dist_easy_plus_plus_scheduler': (_PREDICTION, {}),
+    'cplex_basic_scheduler': (_PREDICTION, _CP),
+    'cplex_bestof2_scheduler': (_PREDICTION, dict(_CP_OBJECTIVE, alternative_presorter=SORTERS)),
+    'cplex_bestofn_scheduler': (_PREDICTION, dict(_CP_OBJECTIVE, alternative_presorter=SORTERS,
+                                                  use_plan_cache=bool, solver_telemetry=bool)),
+    'cplex_tuned_scheduler': (_PREDICTION, dict(_CP_OBJECTIVE, use_plan_cache=bool, solver_telemetry=bool)),
+    'easy_cust_scheduler': (_PREDICTION, {'presorter': SORTERS, 'postsorter': SORTERS}),
+    'easy_labf_scheduler': (_PREDICTION, {}),
+    'easy_plus_plus_scheduler': (_PREDICTION, {}),
+    'easy_prediction_backfill_scheduler': (_PREDICTION, {}),
+    'easy_sjbf_scheduler': (_PREDICTION, {}),
+    'l_a_f_scheduler': (_PREDICTION, {}),
+    'l_j_f_scheduler': (_PREDICTION, {}),
+    'l_r_f_scheduler': (_PREDICTION, {}),
+    'list_prediction_scheduler': (_PREDICTION, {}),
+    'pure_b_f_scheduler': (_PREDICTION, {'running_jobs_prediction_enabled': bool, 'limit_n_scheduled': int,
+                                         'presorter': SORTERS}),
+    's_a_f_scheduler': (_PREDICTION, {}),
+    's_j_f_scheduler': (_PREDICTION, {}),
+}
+
+PREDICTOR_COMPONENT_OPTIONS = {
+    'predictor_clairvoyant': ({}, _MULTIPLIER),
+    'predictor_complete': ({}, _COMPLETE),
+    'predictor_conditional_percent': ({}, dict(_PERCENT, conditional_quantile=bool)),
+    'predictor_exact': ({}, _COMPLETE),
+    'predictor_knn': (
+        {'alpha_mas': NUMBER, 'alpha_umean': NUMBER, 'alpha_think': NUMBER, 'alpha_cores': NUMBER,
+         'alpha_hod': NUMBER, 'alpha_dow': NUMBER, 'alpha_uid': NUMBER, 'k': int},
+        {'max_runtime': NUMBER, 'index': basestring, 'window': (int, type(None))}),
+    'predictor_reqtime': ({}, _MULTIPLIER),
+    # (the options of the loss are needed only by the loss that uses them, e.g. leftside by "composite")
+    'predictor_sgdlinear': (
+        {'quadratic': (bool, int), 'loss': basestring, 'gd': basestring, 'eta': NUMBER,
+         'weight': (basestring, bool, type(None))},
+        dict(_MULTIPLIER, cubic=(bool, int), max_runtime=NUMBER, leftside=basestring, leftparam=NUMBER,
+             rightside=basestring, rightparam=NUMBER, threshold=NUMBER, regularization=basestring, **{'lambda': NUMBER})),
+    'predictor_top_percent': ({}, dict(_PERCENT, exact_quantile=bool)),
+    'predictor_tsafrir': ({}, _MULTIPLIER),
+}
+
+
+class ConfigError(Exception):
+    pass
+
+
+def module_to_class(module):
+    """
+    transform foo_bar to FooBar
+    """
+    return ''.join(w.title() for w in str.split(str(module), "_"))
+
+
+class Registry(object):
+    """The classes of a package that can be named in a configuration, imported on first use"""
+
+    def __init__(self, kind, package, pattern):
+        """
+        :param pattern: the regular expression that the names of the components match
+        """
+        self.kind = kind
+        self.package = package
+        self.pattern = re.compile(pattern)
+        self._names = None
+        self._classes = {}
+
+    def names(self):
+        """The names of the modules that define the class named after them (the modules are not imported)"""
+        if self._names is None:
+            folder = os.path.join(PYSS_FOLDER, self.package)
+            names = set()
+            for filename in os.listdir(folder):
+                name, extension = os.path.splitext(filename)
+                filename = os.path.join(folder, filename)
+                if extension != '.py' or not self.pattern.search(name) or not os.path.isfile(filename):
+                    continue
+                with open(filename) as f:
+                    source = f.read()
+                if re.search(r'^(class\s+{0}\b|{0}\s*=)'.format(module_to_class(name)), source, re.MULTILINE):
+                    names.add(name)
+            self._names = frozenset(names)
+        return self._names
+
+    def __contains__(self, name):
+        return name in self.names()
+
+    def get(self, name):
+        """The class of the component (its module is imported the first time)"""
+        if name not in self._classes:
+            if name not in self:
+                raise ConfigError("No such {} '{}' (known: {}).".format(self.kind, name, ", ".join(sorted(self.names()))))
+            module = importlib.import_module(self.package + '.' + name)
+            self._classes[name] = getattr(module, module_to_class(name))
+        return self._classes[name]
+
+
+SCHEDULERS = Registry('scheduler', 'schedulers', r'_scheduler$')
+PREDICTORS = Registry('predictor', 'predictors', r'^predictor_')
+
+
+def correctors():
+    import schedulers.common_correctors as common_correctors
+    return dict((name, value) for name, value in vars(common_correctors).items()
+                if callable(value) and not name.startswith('_'))
+
+
+def sorters():
+    import schedulers.sorters
+    return schedulers.sorters.sorters
+
+
+def _parse_literals(source, filename):
+    """The assignments of literals of a Python file, as a dictionary"""
+    try:
+        tree = ast.parse(source, filename)
+    except SyntaxError as e:
+        raise ConfigError("{}:{}: {}".format(filename, e.lineno, e.msg))
+    config = {}
+    docstring = ast.get_docstring(tree, clean=False)
+    if docstring is not None:
+        config['__doc__'] = docstring
+    for statement in tree.body:
+        if isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Str):
+            continue
+        if not (isinstance(statement, ast.Assign) and all(isinstance(target, ast.Name) for target in statement.targets)):
+            raise ConfigError("{}:{}: only assignments of literals are allowed in a configuration file".format(
+                filename, statement.lineno))
+        try:
+            value = ast.literal_eval(statement.value)
+        except ValueError:
+            raise ConfigError("{}:{}: the value is not a literal (configuration files are not executed)".format(
+                filename, statement.lineno))
+        for target in statement.targets:
+            config[target.id] = copy.deepcopy(value)
+    return config
+
+
+def load_config_file(filename):
+    """Reads a configuration file (.json or Python literals)"""
+    with open(filename) as f:
+        source = f.read()
+    if filename.endswith('.json'):
+        try:
+            return json.loads(source)
+        except ValueError as e:
+            raise ConfigError("{}: {}".format(filename, e))
+    return _parse_literals(source, filename)
+
+
+def _check_name(errors, where, name, known):
+    if name is not None and name not in known:
+        errors.append("{}: unknown name '{}'".format(where, name))
+
+
+def _check_options(errors, where, values, known, required=None):
+    """
+    :param known: {option: type} of all the options that are allowed
+    :param required: {option: type} of the options that must be set (they are allowed too)
+    """
+    prefix = where + "." if where else ""
+    for key in sorted(required or ()):
+        if key not in values:
+            errors.append("missing option '{}{}'".format(prefix, key))
+    for key, value in values.items():
+        expected = known.get(key, (required or {}).get(key))
+        if expected is None:
+            errors.append("unknown option '{}{}'".format(prefix, key))
+        elif not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            errors.append("option '{}{}' has the wrong type ({})".format(prefix, key, type(value).__name__))
+
+
+def _check_component(errors, where, values, common, components, name):
+    """Checks the options of a component (only if its name is known)"""
+    if name is None or not isinstance(name, basestring):
+        return
+    required, optional = components.get(name, ({}, {}))
+    _check_options(errors, where, values, dict(common, **optional), required)
+
+
+def validate(options):
+    """
+    Checks the options of a simulation, the names of its components (without importing them)
+    and the options of the components (see SCHEDULER_COMPONENT_OPTIONS and PREDICTOR_COMPONENT_OPTIONS)
+    :return: options
+    :raise ConfigError: listing all the problems
+    """
+    errors = []
+    _check_options(errors, "", options, OPTIONS)
+    scheduler = options.get('scheduler')
+    if scheduler is None:
+        errors.append("missing scheduler")
+    elif isinstance(scheduler, dict):
+        if scheduler.get('name') is None:
+            errors.append("missing scheduler name")
+        else:
+            _check_name(errors, "scheduler", scheduler['name'], SCHEDULERS)
+            if scheduler['name'] in SCHEDULERS:
+                _check_component(errors, "scheduler", scheduler, SCHEDULER_OPTIONS, SCHEDULER_COMPONENT_OPTIONS,
+                                 scheduler['name'])
+        for component, known, common, components in (
+                ('predictor', PREDICTORS, PREDICTOR_OPTIONS, PREDICTOR_COMPONENT_OPTIONS),
+                ('corrector', None, CORRECTOR_OPTIONS, {})):
+            value = scheduler.get(component)
+            if value is None:
+                continue
+            if not isinstance(value, dict):
+                errors.append("scheduler.{} must be a dictionary".format(component))
+                continue
+            known = known if known is not None else correctors()
+            _check_name(errors, "scheduler." + component, value.get('name'), known)
+            if value.get('name') in known:
+                _check_component(errors, "scheduler." + component, value, common, components, value['name'])
+        for key in SORTER_OPTIONS:
+            value = scheduler.get(key)
+            for name in (value if isinstance(value, (list, tuple)) else [value]):
+                _check_name(errors, "scheduler." + key, name, sorters())
+    if errors:
+        raise ConfigError("invalid configuration: " + "; ".join(errors))
+    return options
+
+
+def variant(options, changes):
+    """
+    A copy of the options with some options changed
+    :param changes: dictionary {dotted path of the option (e.g., "scheduler.predictor.predict_multiplier"): value}
+    """
+    result = copy.deepcopy(options)
+    for path, value in changes.items():
+        keys = path.split('.')
+        target = result
+        for key in keys[:-1]:
+            target = target[key]
+        target[keys[-1]] = value
+    return result
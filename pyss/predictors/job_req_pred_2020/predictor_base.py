@@ -18,6 +18,9 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 from __future__ import division
 
+import numpy as np
+
+
 def normalizeRecord(record):
   return record if record else (0.0, 0.0, 0.0, 0.0)
 
@@ -62,6 +65,11 @@ class PredictBase(object):
     self.sigma_factor = sigma_factor
     self.use_weights = use_weights
     # print("Base: Sigma_factor: {}".format(sigma_factor))
+    # tags are interned: each tag (a tuple of the tag components) gets an integer id
+    self.tag_ids = {}
+    self.tag_list = []
+    # the tag ids for each combination of the job attributes used in the tags
+    self.job_tags = {}
 
 
   def get_tags(self, job):
@@ -76,6 +84,51 @@ class PredictBase(object):
     return ('///',)
 
 
+  def _job_tags(self, key, masks):
+    """ makes the tuple of the tag ids for the job attributes 'key' (cached)
+
+    :param key: tuple of the job attributes used in the tags
+    :param masks: for each tag, tuple of flags telling which attributes are used in the tag
+                  (the attributes which are not used are replaced by '')
+    :return: tuple of tag ids
+    """
+    tags = self.job_tags.get(key)
+    if tags is None:
+      tags = tuple(self._intern_tag(tuple(value if used else '' for value, used in zip(key, mask)))
+                   for mask in masks)
+      self.job_tags[key] = tags
+    return tags
+
+
+  def _intern_tag(self, tag):
+    tag_id = self.tag_ids.get(tag)
+    if tag_id is None:
+      tag_id = len(self.tag_list)
+      self.tag_ids[tag] = tag_id
+      self.tag_list.append(tag)
+    return tag_id
+
+
+  def export_state(self):
+    """ the records of the tags (the tags are stored as tuples, not as the interned ids)
+
+    :return: dictionary of the columns of the records
+    """
+    records = self.db.records()
+    return {
+      'tags': [self.tag_list[record[0]] for record in records],
+      'params': [record[1] for record in records],
+      'values': np.array([record[2:] for record in records], dtype=np.float64).reshape(-1, 4),
+    }
+
+
+  def import_state(self, state):
+    """ stores the records exported by export_state (the existing records of the same tags are replaced)
+    """
+    for tag, param, values in zip(state['tags'], state['params'], state['values'].tolist()):
+      self.db.saveRecord(self._intern_tag(tag), param, *values)
+
+
   def update_param(self, job, param_name, value, var=None):
     """updates prediction  for 'param_name' of the 'job'
 
@@ -23,6 +23,8 @@ class PredictComplete(PredictBase):
   This predictor has 16 kind of tags, with pre-set priorities (see get_tags).
   The prediction is calculated using highest priority record that is found.
   During update of the prediction, all 16 records corresponding to the record are updated.
+  The tags are interned integer ids (see PredictBase._job_tags), the order of the tags is
+  the same as in get_tags_names.
 
   NOTE: modified to exclude the base predictor
         also it can return None instead of prediction
@@ -41,26 +43,12 @@ class PredictComplete(PredictBase):
     #   self.count[param] = np.zeros((self.taglen, self.taglen))
 
 
-  def get_tags(self, job):
-    return (
-      '{}|{}|{}|{}'.format(job["job_name"], job["user"], job["timelimit"], job["nodes"]),
-      '{}|{}|{}|{}'.format(job["job_name"], job["user"], job["timelimit"], ''),
-      '{}|{}|{}|{}'.format(job["job_name"], job["user"], '', job["nodes"]),
-      '{}|{}|{}|{}'.format(job["job_name"], job["user"], '', ''),
-      '{}|{}|{}|{}'.format(job["job_name"], '', job["timelimit"], job["nodes"]),
-      '{}|{}|{}|{}'.format(job["job_name"], '', job["timelimit"], ''),
-      '{}|{}|{}|{}'.format(job["job_name"], '', '', job["nodes"]),
-      '{}|{}|{}|{}'.format(job["job_name"], '', '', ''),
+  # the attributes (job_name, user, timelimit, nodes) used by each tag, in the order of priority
+  TAG_MASKS = tuple(tuple(bool(code & bit) for bit in (8, 4, 2, 1)) for code in range(15, 0, -1))
 
-      '{}|{}|{}|{}'.format('', job["user"], job["timelimit"], job["nodes"]),
-      '{}|{}|{}|{}'.format('', job["user"], job["timelimit"], ''),
-      '{}|{}|{}|{}'.format('', job["user"], '', job["nodes"]),
-      '{}|{}|{}|{}'.format('', job["user"], '', ''),
-      '{}|{}|{}|{}'.format('', '', job["timelimit"], job["nodes"]),
-      '{}|{}|{}|{}'.format('', '', job["timelimit"], ''),
-      '{}|{}|{}|{}'.format('', '', '', job["nodes"]),
-      # '{}|{}|{}|{}'.format('', '', '', ''),
-    )
+
+  def get_tags(self, job):
+    return self._job_tags((job["job_name"], job["user"], job["timelimit"], job["nodes"]), self.TAG_MASKS)
 
 
   def get_tags_names(self):
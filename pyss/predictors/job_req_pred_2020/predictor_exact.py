@@ -30,10 +30,11 @@ class PredictExact(PredictBase):
     super(PredictExact, self).__init__(recorder, decays, sigma_factor, use_weights)
 
 
+  TAG_MASKS = ((True, True, True, True),)
+
+
   def get_tags(self, job):
-    return (
-      '{}|{}|{}|{}'.format(job["job_name"], job["user"], job["timelimit"], job["nodes"]),
-    )
+    return self._job_tags((job["job_name"], job["user"], job["timelimit"], job["nodes"]), self.TAG_MASKS)
 
 
   def get_tags_names(self):
@@ -46,6 +46,25 @@ class PredictorWrapper(object):
         return
 
 
+    def predict_batch(self, jobs, current_time, list_running_jobs):
+        """
+        Same as predict for each of the jobs.
+        The jobs with the same attributes share one lookup
+        (the actual run time is not passed to the predictor: the predictors wrapped here do not use it).
+        """
+        results = {}
+        for job in jobs:
+            key = (job.executable_id, job.user_id, job.user_estimated_run_time, job.num_required_processors)
+            if key not in results:
+                results[key] = self.predictor.predict_requirements(self._make_jrp_job(job), self.param)
+            result = results[key]
+            if result is None:
+                job.predicted_run_time = job.user_estimated_run_time
+            else:
+                job.predicted_run_time = min(int(round(result)), job.user_estimated_run_time)
+        return
+
+
     def fit(self, job, current_time):
         """
         Add a job to the learning algorithm.
@@ -64,6 +83,17 @@ class PredictorWrapper(object):
             return (avg or job.user_estimated_run_time, var or job.user_estimated_run_time)
 
 
+    def export_state(self):
+        """
+        The learned state: the records of the wrapped predictor.
+        """
+        return self.predictor.export_state()
+
+
+    def import_state(self, state):
+        self.predictor.import_state(state)
+
+
     def _make_jrp_job(self, job):
         jrp_job = {
             'job_name': job.executable_id,
@@ -22,6 +22,7 @@ Created on Apr 21, 2020
 @author: alex
 '''
 
+from array import array
 import logging
 import os
 
@@ -33,12 +34,19 @@ logger.setLevel(logging.INFO)
 class Recorder(object):
 
   def __init__(self, path="/LDMS_data/SOS/results"):
-    """ This recorder keeps all the records in a dict in RAM
+    """ This recorder keeps all the records in RAM
+
+    The records are stored column-wise: 'db' maps (variety_id, parameter) to the row of the record
+    in the arrays of doubles avg, var, w_count and w_sum.
 
     :param path: not used for this recorder
     """
 
     self.db = {}
+    self.avg = array('d')
+    self.var = array('d')
+    self.w_count = array('d')
+    self.w_sum = array('d')
 
     # Note: this in-memory recorder does not use schemas.
     # It is for the reference only.
@@ -62,12 +70,11 @@ class Recorder(object):
              or None if such record not found
     :rtype: tuple or None
     """
-    key = (variety_id, param)
-    record = self.db.get(key, None)
-    if not record:
+    row = self.db.get((variety_id, param), None)
+    if row is None:
       return None
     else:
-     return record
+      return self.avg[row], self.var[row], self.w_count[row], self.w_sum[row]
 
   def saveRecord(self, variety_id, param, avg, var, w_count, w_sum):
     """Stores the record
@@ -83,4 +90,23 @@ class Recorder(object):
     logger.debug("saving variety_id: \"%s\", parameter: \"%s\", avg: %f, var: %f, count: %f, sum: %f",
                  variety_id, param, avg, var, w_count, w_sum)
     key = (variety_id, param)
-    self.db[key] = (avg, var, w_count, w_sum)
+    row = self.db.get(key, None)
+    if row is None:
+      self.db[key] = len(self.avg)
+      self.avg.append(avg)
+      self.var.append(var)
+      self.w_count.append(w_count)
+      self.w_sum.append(w_sum)
+    else:
+      self.avg[row] = avg
+      self.var[row] = var
+      self.w_count[row] = w_count
+      self.w_sum[row] = w_sum
+
+  def records(self):
+    """ All the records (in the order of their creation)
+
+    :return: list of (variety_id, param, avg, var, w_count, w_sum)
+    """
+    return [key + (self.avg[row], self.var[row], self.w_count[row], self.w_sum[row])
+            for key, row in sorted(self.db.items(), key=lambda item: item[1])]
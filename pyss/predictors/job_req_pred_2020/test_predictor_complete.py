@@ -0,0 +1,63 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+from pyss.predictors.job_req_pred_2020.predictor_complete import PredictComplete
+from pyss.predictors.job_req_pred_2020.recorder_mem import Recorder
+
+
+def _job(job_name, user, timelimit, nodes):
+  return {'job_name': job_name, 'user': user, 'timelimit': timelimit, 'nodes': nodes}
+
+
+class test_PredictComplete(TestCase):
+
+  def setUp(self):
+    self.predictor = PredictComplete(Recorder(), {'duration': 0.2})
+
+
+  def test_tags_follow_tag_names(self):
+    tags = self.predictor.get_tags(_job(1, 2, 3, 4))
+    self.assertEqual(len(tags), len(self.predictor.get_tags_names()))
+    for tag, name in zip(tags, self.predictor.get_tags_names()):
+      components = self.predictor.tag_list[tag]
+      self.assertEqual('|'.join(str(c) for c in components),
+                       name.replace('job', '1').replace('user', '2').replace('time', '3').replace('node', '4'))
+
+
+  def test_tags_are_shared(self):
+    tags1 = self.predictor.get_tags(_job(1, 2, 3, 4))
+    tags2 = self.predictor.get_tags(_job(5, 2, 3, 4))
+    self.assertEqual(tags1, self.predictor.get_tags(_job(1, 2, 3, 4)))
+    # the tags without the job name are the same
+    self.assertEqual(tags1[8:], tags2[8:])
+    self.assertEqual(len(set(tags1[:8]) & set(tags2[:8])), 0)
+
+
+  def test_prediction_falls_back_to_general_tags(self):
+    self.assertIsNone(self.predictor.predict_requirements(_job(1, 2, 3, 4), 'duration'))
+    self.predictor.update_param(_job(1, 2, 3, 4), 'duration', 100)
+    self.predictor.update_param(_job(1, 2, 3, 4), 'duration', 200)
+    self.predictor.update_param(_job(5, 2, 30, 4), 'duration', 10)
+    self.assertAlmostEqual(self.predictor.predict_requirements(_job(1, 2, 3, 4), 'duration'), (0.8 * 100 + 200) / 1.8)
+    self.assertEqual(self.predictor.predict_requirements(_job(5, 2, 30, 4), 'duration'), 10)
+    # only the user and the nodes match
+    self.assertAlmostEqual(self.predictor.predict_requirements(_job(6, 2, 7, 4), 'duration'),
+                           (0.64 * 100 + 0.8 * 200 + 10) / 2.44)
+
+
+class test_Recorder(TestCase):
+
+  def test_records_are_updated(self):
+    recorder = Recorder()
+    self.assertIsNone(recorder.getRecord(0, 'duration'))
+    recorder.saveRecord(0, 'duration', 1.0, 2.0, 3.0, 4.0)
+    recorder.saveRecord(1, 'duration', 5.0, 6.0, 7.0, 8.0)
+    recorder.saveRecord(0, 'duration', 1.5, 2.5, 3.5, 4.5)
+    self.assertEqual(recorder.getRecord(0, 'duration'), (1.5, 2.5, 3.5, 4.5))
+    self.assertEqual(recorder.getRecord(1, 'duration'), (5.0, 6.0, 7.0, 8.0))
+    self.assertIsNone(recorder.getRecord(1, 'other'))
+
+
+if __name__ == "__main__":
+  import unittest
+  unittest.main()
@@ -14,9 +14,32 @@ class Predictor(object):
 		"""
 		print("Do it")
 
+	def predict_batch(self, jobs, current_time, list_running_jobs):
+		"""
+		Modify the predicted_run_time of each of the jobs.
+		Same as calling predict for each job; predictors may override it
+		to compute the predictions for the whole queue at once.
+		"""
+		for job in jobs:
+			self.predict(job, current_time, list_running_jobs)
+
 	def fit(self, job, current_time):
 		"""
 		Add a job to the learning algorithm.
 		Called when a job end.
 		"""
 		print("Do it")
+
+	def export_state(self):
+		"""
+		The learned state of the predictor (to warm-start another predictor with import_state),
+		made of plain Python values and NumPy arrays.
+		None if the predictor does not learn.
+		"""
+		return None
+
+	def import_state(self, state):
+		"""
+		Restores the learned state exported by export_state.
+		"""
+		pass
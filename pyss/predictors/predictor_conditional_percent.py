@@ -21,8 +21,8 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 See details in the class documentation.
 """
 from __future__ import division
-from sortedcontainers import SortedDict
 from predictor import Predictor
+from weight_tree import WeightTree
 
 
 class PredictorConditionalPercent(Predictor):
@@ -40,6 +40,9 @@ class PredictorConditionalPercent(Predictor):
     timelimit and weight controlled by option 'start_weight'.
     By default, the weights of the points are proportional to their duration.
     It can be changed with option 'use_weights'.
+    By default, the sum of the weights above the running time is compared with 'confidence'
+    fraction of the total weight (see Record.predict). With option 'conditional_quantile'
+    the prediction is the quantile of the durations conditioned on the running time.
     """
 
     def __init__(self, options):
@@ -52,6 +55,8 @@ class PredictorConditionalPercent(Predictor):
         self.confidence = options["scheduler"]["predictor"].get('confidence', 0.97)
         # Should the points also be weighted by the actual running time?
         self.use_weights = options["scheduler"]["predictor"].get('use_weights', True)
+        # Should the confidence be relative to the weight of the durations over the running time only?
+        self.conditional_quantile = options["scheduler"]["predictor"].get('conditional_quantile', False)
 
 
     def predict(self, job, current_time, list_running_jobs):
@@ -69,11 +74,37 @@ class PredictorConditionalPercent(Predictor):
             else:
                 assert job.start_to_run_at_time is None or job.start_to_run_at_time == -1
                 time_running = 0
-            job.predicted_run_time = record.predict(time_running, self.confidence) or job.user_estimated_run_time
+            job.predicted_run_time = (record.predict(time_running, self.confidence, self.conditional_quantile)
+                                      or job.user_estimated_run_time)
         else:
             job.predicted_run_time = job.user_estimated_run_time
 
 
+    def predict_batch(self, jobs, current_time, list_running_jobs):
+        """
+        Same as predict for each of the jobs.
+        The jobs with the same tag and the same running time share one lookup.
+        """
+        running_jobs = set(list_running_jobs)
+        predictions = {}
+        for job in jobs:
+            tag = self._tag(job)
+            record = self.recorder.get(tag, None)
+            if record is None:
+                job.predicted_run_time = job.user_estimated_run_time
+                continue
+            if job in running_jobs:
+                assert job.start_to_run_at_time is not None and job.start_to_run_at_time > 0
+                time_running = current_time - job.start_to_run_at_time
+            else:
+                assert job.start_to_run_at_time is None or job.start_to_run_at_time == -1
+                time_running = 0
+            key = (tag, time_running)
+            if key not in predictions:
+                predictions[key] = record.predict(time_running, self.confidence, self.conditional_quantile)
+            job.predicted_run_time = predictions[key] or job.user_estimated_run_time
+
+
     def fit(self, job, current_time):
         """
         Add a job to the learning algorithm.
@@ -88,32 +119,57 @@ class PredictorConditionalPercent(Predictor):
         return None
 
 
+    def export_state(self):
+        """
+        The learned state: the records of the tags.
+        """
+        return {'recorder': self.recorder}
+
+
+    def import_state(self, state):
+        self.recorder = dict(state['recorder'])
+
+
     def _tag(self, job):
-        return '{}|{}|{}|{}'.format(
-            job.executable_id, job.user_id, job.user_estimated_run_time, job.num_required_processors)
+        # a tuple of integers is hashed and compared much faster than a formatted string
+        return (job.executable_id, job.user_id, job.user_estimated_run_time, job.num_required_processors)
 
 
 
 class Record(object):
     """
-    This is currently a non-efficient straightforward implementation
+    Weighted distribution of the observed values.
+
+    The values are kept in a WeightTree, so the prediction is found in O(log n)
+    and the decay of the weights is O(1).
     """
 
     def __init__(self, start_value, start_weight, use_weights):
-        self.dict = SortedDict()
         point_weight = start_weight * start_value if use_weights else start_weight
-        self.dict[start_value] = point_weight
+        self.points = WeightTree()
+        self.points.add(start_value, point_weight)
         self.total_weight = point_weight
 
-    def predict(self, time_already_running, threshold):
+    def predict(self, time_already_running, threshold, conditional=False):
         """
-        Predicts based on the current state
+        Predicts based on the current state:
+        accumulates the weights of the values above time_already_running (in the increasing order)
+        until the sum is over threshold * (total weight) and returns the next value.
+
+        If conditional, returns the smallest value t above time_already_running such that
+        the weight of the values in (time_already_running, t] is at least
+        threshold * (the weight of the values above time_already_running),
+        i.e. P(T <= t | T > time_already_running) >= threshold.
+        (When the weight is exactly at the threshold, the result depends on the rounding of the sums.)
+
         Parameters
         ----------
         time_already_running: int
             time already passed (0 in case job not started yet)
         threshold: float
             the confidence level (we believe that our prediction is over actual value with at least this probability)
+        conditional: bool
+            whether the confidence level is conditioned on time_already_running
 
         Returns
         -------
@@ -121,20 +177,27 @@ class Record(object):
             predicted value (running time) or None if we can't predict (caller should use default)
 
         """
-        times = self.dict.keys()
-        weights = self.dict.values()
-        last_index = len(self.dict) - 1
-        # find first point above time_already_running
-        cur_index = self.dict.bisect_right(time_already_running)
+        if conditional:
+            return self._conditional_quantile(time_already_running, threshold)
         threshold_weight = threshold * self.total_weight
-        weight_sum = 0
-        while cur_index < last_index:
-            weight_sum += weights[cur_index]
-            if weight_sum > threshold_weight:
-                # next element is above the threshold
-                return times[cur_index + 1]
-            cur_index += 1
-        return None
+        found = self.points.first_over(threshold_weight, above=time_already_running)
+        if found is None:
+            return None
+        # the next value (if any)
+        return self.points.next_key(found)
+
+    def _conditional_quantile(self, time_already_running, threshold):
+        below = self.points.weight_upto(time_already_running)
+        # summed as the weight up to the candidate below (equal at threshold 1)
+        last = self.points.max_key()
+        threshold_weight = threshold * (self.points.weight_upto(last) - below)
+        found = self.points.first_over(threshold_weight, above=time_already_running)
+        # the value before the first one over the threshold can be exactly at it
+        candidate = self.points.previous_key(found) if found is not None else last
+        if (candidate is not None and candidate > time_already_running
+                and self.points.weight_upto(candidate) - below >= threshold_weight):
+            return candidate
+        return found
 
     def add(self, value, a_dec, threshold, use_weights):
         """
@@ -154,13 +217,9 @@ class Record(object):
         -------
         None
         """
-        for key in self.dict:
-            self.dict[key] *= a_dec
+        self.points.decay(a_dec)
         # add new value
         point_weight = value if use_weights else 1
-        if value in self.dict:
-            self.dict[value] += point_weight
-        else:
-            self.dict[value] = point_weight
+        self.points.add(value, point_weight)
         # recalculate total weight
         self.total_weight = a_dec * self.total_weight + point_weight
@@ -1,8 +1,9 @@
 from predictor import Predictor
-#import numpy as np
+import numpy as np
 import math
 import itertools
 from valopt.models.knn import KNN
+from valopt.models.vector_knn import VectorKNN
 from math import sqrt
 
 from operator import mul    # or mul=lambda x,y:x*y
@@ -11,6 +12,15 @@ from fractions import Fraction
 def kPn(n,k):
   return int( reduce(mul, (Fraction(n-i, i+1) for i in range(k)), 1) )
 
+def _identity(y):
+    return y
+
+def _inverse_distance(d):
+    return 1/max(0.05,d)
+
+def _inverse_distances(d):
+    return 1/np.maximum(0.05,d)
+
 class PredictorKNN(Predictor):
     #Internal info
     n_features=18
@@ -37,25 +47,66 @@ class PredictorKNN(Predictor):
         else:
             mrun=5000
 
-        dist=lambda x,y:sqrt(
-         (x==y)*options["scheduler"]["predictor"]["alpha_uid"]                      +# x[0] is 1
-         options["scheduler"]["predictor"]["alpha_mas"]*(0.9/mrun)*(x[1] -y[1] )**2 +# x[1] is last user run time
-         options["scheduler"]["predictor"]["alpha_mas"]*(0.9/mrun)*(x[2] -y[2] )**2 +# x[2] is last user run time2
-         options["scheduler"]["predictor"]["alpha_mas"]*(0.9/mrun)*(x[3] -y[3] )**2 +# x[3] is last user run time3
-         options["scheduler"]["predictor"]["alpha_mas"]*(0.9/mrun)*(x[4] -y[4] )**2 +# x[4] is user request
-         options["scheduler"]["predictor"]["alpha_mas"]*(0.9/mrun)*(x[5] -y[5] )**2 +# x[5] is moving average(3)
-         options["scheduler"]["predictor"]["alpha_mas"]*(2/mrun)*(x[6] -y[6] )**2   +# x[6] is moving average(2)
-         options["scheduler"]["predictor"]["alpha_umean"]*(1/mrun)*(x[7] -y[7] )**2 +# x[7] is user runtime mean
-         options["scheduler"]["predictor"]["alpha_think"]*(1/mrun)*(x[8] -y[8] )**2 +# x[8] is time since last time a job of the user ended.
-         options["scheduler"]["predictor"]["alpha_cores"]*(x[9] -y[9] )**2          +# x[9] Ratio of Cores from user mean to this one.
-         options["scheduler"]["predictor"]["alpha_cores"]*(1/50)*(x[10]-y[10])**2   +#> x10>tota>core running by this user
-         options["scheduler"]["predictor"]["alpha_cores"]*(1/mrun)*(x[11]-y[11])**2 +# x[11] sum of runtime of already running jobs of the user
-         options["scheduler"]["predictor"]["alpha_cores"]*(x[12]-y[12])**2           +# x[12] amount of jobs  of this user already running
-         options["scheduler"]["predictor"]["alpha_cores"]*(1/mrun)*(x[13]-y[13])**2  +# x[13] length of longest job of user already running
-         options["scheduler"]["predictor"]["alpha_hod"]*(min(x[14]-y[14],y[14]-x[14])/12)**2  +# x[14] second of day
-         options["scheduler"]["predictor"]["alpha_dow"]*(min(x[15]-y[15],y[15]-x[15])/7)**2        # x[15] day of week
-        )
-        self.model=KNN(dist,lambda y: y,lambda d:1/max(0.05,d),options["scheduler"]["predictor"]["k"])
+        self.mrun=mrun
+        self.knn_options=options["scheduler"]["predictor"]
+        o=self.knn_options
+        #weights of the squared feature differences
+        #NOTE: the expressions are kept from the original distance (in Python 2, 2/mrun, 1/mrun and 1/50 are 0)
+        self.weights=[
+         0,                           # x[0] is uid (see same_weight)
+         o["alpha_mas"]*(0.9/mrun),   # x[1] is last user run time
+         o["alpha_mas"]*(0.9/mrun),   # x[2] is last user run time2
+         o["alpha_mas"]*(0.9/mrun),   # x[3] is last user run time3
+         o["alpha_mas"]*(0.9/mrun),   # x[4] is user request
+         o["alpha_mas"]*(0.9/mrun),   # x[5] is moving average(3)
+         o["alpha_mas"]*(2/mrun),     # x[6] is moving average(2)
+         o["alpha_umean"]*(1/mrun),   # x[7] is user runtime mean
+         o["alpha_think"]*(1/mrun),   # x[8] is time since last time a job of the user ended.
+         o["alpha_cores"],            # x[9] Ratio of Cores from user mean to this one.
+         o["alpha_cores"]*(1/50),     # x[10] total cores running by this user
+         o["alpha_cores"]*(1/mrun),   # x[11] sum of runtime of already running jobs of the user
+         o["alpha_cores"],            # x[12] amount of jobs  of this user already running
+         o["alpha_cores"]*(1/mrun),   # x[13] length of longest job of user already running
+         o["alpha_hod"]/144.0,        # x[14] second of day (scaled by 1/12)
+         o["alpha_dow"]/49.0,         # x[15] day of week (scaled by 1/7)
+         0,
+         0,
+        ]
+        self.same_weight=o["alpha_uid"]
+        #the time features are compared around their periods (see make_x)
+        self.circular={14:3600*60, 15:3600*60*7}
+
+        index=o.get("index","numpy")
+        if index=="numpy":
+            self.model=VectorKNN(self.weights,_identity,_inverse_distances,o["k"],
+                                 circular=self.circular,same_weight=self.same_weight,window=o.get("window",None))
+        elif index=="vptree":
+            if o.get("window",None) is not None:
+                raise ValueError("predictor config error: window is supported only with the numpy index.")
+            self.model=KNN(self.dist,_identity,_inverse_distance,o["k"])
+        else:
+            raise ValueError("predictor config error: unknown index '{}'.".format(index))
+
+    def export_state(self):
+        """
+        The learned state: the stored instances (the same for both indexes).
+        (The history of the users is not exported: it is rebuilt from the jobs of the simulated workload.)
+        """
+        return {"n_features":self.n_features,"model":self.model.export_state()}
+
+    def import_state(self,state):
+        if state["n_features"]!=self.n_features:
+            raise ValueError("predictor state error: the state has %d features, the predictor has %d."%(state["n_features"],self.n_features))
+        self.model.import_state(state["model"])
+
+    def dist(self,x,y):
+        d2=(x==y)*self.same_weight
+        for i in range(self.n_features):
+            diff=abs(x[i]-y[i])
+            if i in self.circular:
+                diff=min(diff%self.circular[i],self.circular[i]-diff%self.circular[i])
+            d2+=self.weights[i]*diff*diff
+        return sqrt(d2)
 
     def make_x(self,job,current_time,list_running_jobs):
         """Make a vector from a job. requires job, current time and system state."""
@@ -201,7 +252,7 @@ class PredictorKNN(Predictor):
 
     def store_x(self,job,x):
         """store x for a given job if its not already stored"""
-        if job not in self.job_x.keys():
+        if job not in self.job_x:
             self.job_x[job]=x
 
     def pop_x(self, job):
@@ -216,7 +267,7 @@ class PredictorKNN(Predictor):
         Modify the predicted_run_time of a job.
         Called when a job is submitted to the system.
         """
-        if not job in self.job_x.keys():
+        if not job in self.job_x:
             #make x
             x=self.make_x(job,current_time,list_running_jobs)
             #store x
@@ -230,6 +281,26 @@ class PredictorKNN(Predictor):
         if not self.max_runtime==False:
             job.predicted_run_time=max(1,min(job.predicted_run_time,self.max_runtime))
 
+    def predict_batch(self, jobs, current_time, list_running_jobs):
+        """
+        Same as predict for each of the jobs.
+        The neighbours of all the jobs are searched at once if the index supports it.
+        """
+        X=[]
+        for job in jobs:
+            if not job in self.job_x:
+                self.store_x(job,self.make_x(job,current_time,list_running_jobs))
+            X.append(self.job_x[job])
+        if hasattr(self.model,"predict_batch"):
+            predictions=self.model.predict_batch(np.array(X,dtype=np.float32)) if X else []
+        else:
+            predictions=[self.model.predict(x) for x in X]
+        for job,prediction in zip(jobs,predictions):
+            job.predicted_run_time=max(1,int(abs(prediction)))
+            job.predicted_run_time=min(job.predicted_run_time,job.user_estimated_run_time)
+            if not self.max_runtime==False:
+                job.predicted_run_time=max(1,min(job.predicted_run_time,self.max_runtime))
+
     def fit(self, job, current_time):
         """
         Add a job to the learning algorithm.
@@ -257,3 +328,7 @@ class PredictorKNN(Predictor):
 
         #fit the model
         self.model.fit(x,job.actual_run_time)
+
+
+# the name expected by the scheduler (see module_to_class)
+PredictorKnn = PredictorKNN
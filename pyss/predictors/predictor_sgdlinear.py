@@ -1,17 +1,12 @@
 from predictor import Predictor
-#import numpy as np
+import numpy as np
 import math
 import itertools
 from valopt.models.linear_model import LinearModel
 
-from operator import mul    # or mul=lambda x,y:x*y
-from fractions import Fraction
-
-def kPn(n,k):
-  return int( reduce(mul, (Fraction(n-i, i+1) for i in range(k)), 1) )
-
 class PredictorSgdlinear(Predictor):
     #Internal info
+    n_base_features=19
     n_features=19
 
     def __init__(self, options):
@@ -31,16 +26,22 @@ class PredictorSgdlinear(Predictor):
         if options["scheduler"]["predictor"]["quadratic"]:
             print("Using predictor with quadratic features")
             self.quadratic=True
-            if options["scheduler"]["predictor"]["cubic"]:
-                self.cubic=True
-                self.n_features=int(3*self.n_features+kPn(self.n_features,2)+kPn(self.n_features,3))
-            else:
-                self.n_features=int(3*self.n_features+2*kPn(self.n_features,2))
-                self.cubic=False
+            self.cubic=bool(options["scheduler"]["predictor"]["cubic"])
         else:
             self.cubic=False
             self.quadratic=False
 
+        #the polynomial features are products of the base features x[1..16] (pairs and triples)
+        #and the powers of x[1..18]
+        self.pairs=np.array(list(itertools.combinations(range(1,17),2)))
+        self.triples=np.array(list(itertools.combinations(range(1,17),3)))
+        self.powered=np.arange(1,19)
+        self.n_features=self.n_base_features
+        if self.quadratic:
+            self.n_features+=len(self.pairs)+len(self.powered)
+        if self.cubic:
+            self.n_features+=len(self.triples)+len(self.powered)
+
 
         #machine learning thing
         m=LinearModel(self.n_features)
@@ -108,17 +109,10 @@ class PredictorSgdlinear(Predictor):
             self.model=sNAG(m,l,options["scheduler"]["predictor"]["eta"],verbose=False)
 
         if not options["scheduler"]["predictor"]["weight"]:
-            wstr=compile("1", "<string>", "eval")
+            self.weight_expression="1"
         else:
-            wstr=compile(options["scheduler"]["predictor"]["weight"], "<string>", "eval")
-
-        def weight(job):
-            m=float(job.num_required_processors)
-            r=float(job.actual_run_time)
-            #log=np.log
-            log=math.log
-            return eval(wstr)
-        self.weight=weight
+            self.weight_expression=options["scheduler"]["predictor"]["weight"]
+        self.wstr=compile(self.weight_expression, "<string>", "eval")
 
         if "predict_multiplier" in options["scheduler"]["predictor"].keys():
             self.predict_multiplier = options["scheduler"]["predictor"]["predict_multiplier"]
@@ -127,10 +121,41 @@ class PredictorSgdlinear(Predictor):
         print(self.predict_multiplier)
 
 
+    def weight(self,job):
+        m=float(job.num_required_processors)
+        r=float(job.actual_run_time)
+        #log=np.log
+        log=math.log
+        return eval(self.wstr)
+
+    def __getstate__(self):
+        #compiled code cannot be pickled; it is recompiled from the expression
+        state=self.__dict__.copy()
+        del state["wstr"]
+        return state
+
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        self.wstr=compile(self.weight_expression, "<string>", "eval")
+
+    def export_state(self):
+        """
+        The learned state: the weights of the model and the accumulators of the learner.
+        (The history of the users is not exported: it is rebuilt from the jobs of the simulated workload.)
+        """
+        return {"n_features":self.n_features,"model":self.model.export_state()}
+
+    def import_state(self,state):
+        if state["n_features"]!=self.n_features:
+            raise ValueError("predictor state error: the state has %d features, the predictor has %d."%(state["n_features"],self.n_features))
+        self.model.import_state(state["model"])
+
     def make_x(self,job,current_time,list_running_jobs):
-        """Make a vector from a job. requires job, current time and system state."""
-        #x=np.empty(self.n_features,dtype=np.float32)
-        x=[0]*self.n_features
+        """
+        Make a vector of the base features from a job. requires job, current time and system state.
+        The polynomial features are added by expand_x.
+        """
+        x=[0]*self.n_base_features
 
         #checks on user internal memory
         if not self.user_job_last1.has_key(job.user_id):
@@ -270,45 +295,32 @@ class PredictorSgdlinear(Predictor):
         #Job cores
         x[18]=float(job.num_required_processors)
 
+        return np.array(x,dtype=np.float64)
 
-        if self.quadratic:
-            i=19
-            for a,b in itertools.combinations(x[1:17],2):
-                x[i]=a*b
-                i+=1
-            for k in range(1,19):
-                x[i]=x[k]*x[k]
-                i+=1
-            #for k in range(1,19):
-                #x[i]=1/max(0.001,x[k])
-                #i+=1
-            #for a,b in itertools.combinations(x[1:17],2):
-                #x[i]=1/max(0.001,a*b)
-                #i+=1
-
+    def expand_x(self,x):
+        """
+        Make the feature vector of the model from the base features
+        (or the matrix of the feature vectors from a matrix of the base features, one job per row).
+        The products are computed in the same order as a*b and a*b*c on floats.
+        """
+        if not self.quadratic:
+            return x
+        powered=x[...,self.powered]
+        features=[x,x[...,self.pairs[:,0]]*x[...,self.pairs[:,1]],powered*powered]
         if self.cubic:
-            for a,b,c in itertools.combinations(x[1:17],3):
-                x[i]=a*b*c
-                i+=1
-            for k in range(1,19):
-                x[i]=x[k]*x[k]*x[k]
-                i+=1
-
-        #if self.cubic:
-            #for a,b,c in itertools.combinations(x[0:17],3):
-                #x[i]=a*b*c
-                #i+=1
-        return x
+            features.append(x[...,self.triples[:,0]]*x[...,self.triples[:,1]]*x[...,self.triples[:,2]])
+            features.append(powered*powered*powered)
+        return np.concatenate(features,axis=-1)
 
     def store_x(self,job,x):
-        """store x for a given job if its not already stored"""
+        """store the base features of a given job if they are not already stored"""
         if job not in self.job_x:
             self.job_x[job]=x
 
     def pop_x(self, job):
         """retrieve x for a given job and delete it from memory"""
-        x=self.job_x.pop(job,[])
-        if x==[]:
+        x=self.job_x.pop(job,None)
+        if x is None:
             raise ValueError("Predictor internal x memory failed.")
         return x
 
@@ -326,7 +338,24 @@ class PredictorSgdlinear(Predictor):
             x=self.job_x[job]
 
         #make the prediction
-        fff = abs(self.model.predict(x))
+        self._set_prediction(job,self.model.predict(self.expand_x(x)))
+
+    def predict_batch(self, jobs, current_time, list_running_jobs):
+        """
+        Same as predict for each of the jobs:
+        the predictions are computed at once as a matrix-vector product.
+        """
+        if not jobs:
+            return
+        for job in jobs:
+            if not job in self.job_x:
+                self.store_x(job,self.make_x(job,current_time,list_running_jobs))
+        X=self.expand_x(np.array([self.job_x[job] for job in jobs]))
+        for job,prediction in zip(jobs,self.model.predict_batch(X)):
+            self._set_prediction(job,prediction)
+
+    def _set_prediction(self, job, prediction):
+        fff = abs(prediction)
         job.predicted_run_time=int(max(1.0,int(fff)))
         job.predicted_run_time=int(min(job.predicted_run_time,job.user_estimated_run_time))
         if not self.max_runtime==False:
@@ -363,4 +392,4 @@ class PredictorSgdlinear(Predictor):
         self.user_last_ending[job.user_id]=current_time
 
         #fit the model
-        self.model.fit(x,job.actual_run_time,w=self.weight(job))
+        self.model.fit(self.expand_x(x),job.actual_run_time,w=self.weight(job))
@@ -0,0 +1,47 @@
+"""
+Saving and loading of the learned state of the predictors (to warm-start the predictors).
+
+A state file holds a short header followed by the name of the predictor class and
+the state returned by its export_state, pickled (NumPy arrays are stored in their binary form)
+and compressed with zlib.
+
+The predictor of a simulation is warm-started by setting 'warm_start' (the name of the state file)
+in the predictor options; a state file can be made with run_predictor.py (option --save_state).
+"""
+
+import cPickle
+import os
+import zlib
+
+MAGIC = b'PYSSPRS1'
+
+
+def save_state(predictor, filename):
+    """
+    Atomically replaces 'filename' with the learned state of the predictor
+    (the state is first written to a temporary file).
+    """
+    data = zlib.compress(cPickle.dumps((type(predictor).__name__, predictor.export_state()),
+                                       cPickle.HIGHEST_PROTOCOL))
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'wb') as f:
+        f.write(MAGIC)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.rename(tmp_filename, filename)
+
+
+def load_state(predictor, filename):
+    """
+    Imports the learned state saved in 'filename' to the predictor.
+    The state must have been saved from a predictor of the same class.
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError("'" + filename + "' is not a predictor state file.")
+    class_name, state = cPickle.loads(zlib.decompress(data[len(MAGIC):]))
+    if class_name != type(predictor).__name__:
+        raise ValueError("'" + filename + "' is the state of " + class_name + ", not of " + type(predictor).__name__ + ".")
+    predictor.import_state(state)
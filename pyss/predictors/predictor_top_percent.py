@@ -21,8 +21,8 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 See details in the class documentation.
 """
 from __future__ import division
-from sortedcontainers import SortedDict
 from predictor import Predictor
+from weight_tree import WeightTree
 
 
 class PredictorTopPercent(Predictor):
@@ -37,6 +37,9 @@ class PredictorTopPercent(Predictor):
     timelimit and weight controlled by option 'start_weight'.
     By default, the weights of the points are proportional to their duration.
     It can be changed with option 'use_weights'.
+    By default, the prediction follows the original incremental computation, which
+    counts the artificial point with weight 1 in the sums (see Record). With option
+    'exact_quantile' the prediction is the weighted quantile of the stored weights.
     """
 
     def __init__(self, options):
@@ -49,6 +52,8 @@ class PredictorTopPercent(Predictor):
         self.confidence = options["scheduler"]["predictor"].get('confidence', 0.97)
         # Should the points also be weighted by the actual running time?
         self.use_weights = options["scheduler"]["predictor"].get('use_weights', True)
+        # Should the artificial point count with 'start_weight' in the quantile too?
+        self.exact_quantile = options["scheduler"]["predictor"].get('exact_quantile', False)
 
 
     def predict(self, job, current_time, list_running_jobs):
@@ -64,6 +69,19 @@ class PredictorTopPercent(Predictor):
             job.predicted_run_time = job.user_estimated_run_time
 
 
+    def predict_batch(self, jobs, current_time, list_running_jobs):
+        """
+        Same as predict for each of the jobs.
+        """
+        recorder = self.recorder
+        for job in jobs:
+            record = recorder.get(self._tag(job), None)
+            if record is not None:
+                job.predicted_run_time = record.t_val
+            else:
+                job.predicted_run_time = job.user_estimated_run_time
+
+
     def fit(self, job, current_time):
         """
         Add a job to the learning algorithm.
@@ -72,78 +90,99 @@ class PredictorTopPercent(Predictor):
         tag = self._tag(job)
         record = self.recorder.get(tag, None)
         if record is None:
-            record = Record(job.user_estimated_run_time, self.start_weight, self.use_weights)
+            record = Record(job.user_estimated_run_time, self.start_weight, self.use_weights, self.exact_quantile)
             self.recorder[tag] = record
         record.add(job.actual_run_time, self.decay, self.confidence, self.use_weights)
         return (record.t_val, 0)
 
 
+    def export_state(self):
+        """
+        The learned state: the records of the tags.
+        """
+        return {'recorder': self.recorder}
+
+
+    def import_state(self, state):
+        self.recorder = dict(state['recorder'])
+
+
     def _tag(self, job):
-        return '{}|{}|{}|{}'.format(
-            job.executable_id, job.user_id, job.user_estimated_run_time, job.num_required_processors)
+        # a tuple of integers is hashed and compared much faster than a formatted string
+        return (job.executable_id, job.user_id, job.user_estimated_run_time, job.num_required_processors)
 
 
 
 
 class Record(object):
+    """
+    Weighted distribution of the observed values.
+
+    t_val (the prediction) is the smallest value such that the weight of the values
+    no greater than it is over 'threshold' fraction of the total weight.
+    As in the original incremental walk, the start point is counted with the weight 1
+    under t_val (and in the total) while it is stored with start_weight and is not
+    decayed at the first addition; the difference ('offset') decays with the points
+    and is dropped once t_val moves down to the smallest value. t_val only moves
+    towards the new value. When the weight up to a value is at the threshold, the
+    result depends on the rounding: the tree sums can be rounded differently from
+    the running sums of the walk, so t_val can differ from it at such ties.
+    With 'exact', the start point counts with start_weight everywhere and t_val is
+    the weighted quantile of the stored weights.
+    The values are kept in a WeightTree, so t_val is found in O(log n)
+    and the decay of the weights is O(1).
+    """
 
-    def __init__(self, start_value, start_weight, use_weights):
-        self.dict = SortedDict()
+    def __init__(self, start_value, start_weight, use_weights, exact=False):
         point_weight = start_weight*start_value if use_weights else start_weight
-        self.dict[start_value] = (point_weight, 0)
-        self.count = 0
-        self.t_pos = 0
+        self.points = WeightTree()
+        self.points.add(start_value, point_weight)
+        self.offset = 0 if exact else 1 - point_weight
         self.t_val = start_value
-        self.over_weight = 0
-        self.under_weight = 1
+        self.started = exact
+        self.exact = exact
 
 
     def add(self, value, a_dec, threshold, use_weights):
         point_weight = value if use_weights else 1
-        if value in self.dict:
-            old_weight, old_count = self.dict[value]
-            new_weight = point_weight + old_weight * a_dec**(self.count-old_count)
+        if self.started:
+            self.points.decay(a_dec)
+            self.offset *= a_dec
         else:
-            if value < self.t_val:
-                self.t_pos += 1
-            new_weight = point_weight
-        self.dict[value] = (new_weight, self.count)
-        self.over_weight *= a_dec
-        self.under_weight *= a_dec
-        # update over/under weight sums and move the threshold position if needed
+            self.offset -= 1 - a_dec
+            self.started = True
+        self.points.add(value, point_weight)
+        if self.exact:
+            t_val = self.points.first_over(threshold * self.points.total())
+            # (all the weight can be under the threshold only due to the rounding errors)
+            self.t_val = t_val if t_val is not None else self.points.max_key()
+            return
+        if value == self.t_val:
+            return
+        total = self.points.total() + self.offset
+        t_val = self.points.first_over(threshold * total - self.offset)
+        # (all the weight can be under the threshold only due to the rounding errors)
+        if t_val is None:
+            t_val = self.points.max_key()
+        # the tree sums can round differently from the incremental sums near the threshold:
+        # settle t_val with the same comparisons as the incremental walk
         if value > self.t_val:
-            self.over_weight += point_weight
-            while self.under_weight / (self.under_weight + self.over_weight) <= threshold:
-                self.t_pos += 1
-                self.t_val = self.dict.peekitem(self.t_pos)[0]
-                t_weight = self._update_t_weight(a_dec)
-                self.under_weight += t_weight
-                self.over_weight -= t_weight
-                if self.t_pos == self.count + 1:
-                    # set over_weight to zero when we got to the highest point to combat error accumulation
-                    # print("WARNING: predictor_top_percent: over_weight is reset")
-                    self.over_weight = 0
-
+            t_val = max(self.t_val, t_val)
+            while t_val > self.t_val and self._over(self.points.previous_key(t_val), total, threshold):
+                t_val = self.points.previous_key(t_val)
+            while t_val < self.points.max_key() and not self._over(t_val, total, threshold):
+                t_val = self.points.next_key(t_val)
+            self.t_val = t_val
         else:
-            self.under_weight += point_weight
-            if value < self.t_val:
-                t_weight = self._update_t_weight(a_dec)
-                while (self.under_weight - t_weight) / (self.under_weight + self.over_weight) > threshold:
-                    self.under_weight -= t_weight
-                    self.over_weight += t_weight
-                    self.t_pos -= 1
-                    self.t_val = self.dict.peekitem(self.t_pos)[0]
-                    t_weight = self._update_t_weight(a_dec)
-                    if self.t_pos == 0:
-                        # reset under_weight to combat error accumulation
-                        # print("WARNING: predictor_top_percent: under_weight is reset")
-                        self.under_weight = t_weight
-        self.count += 1
-
-
-    def _update_t_weight(self, a_dec):
-        old_weight, old_count = self.dict[self.t_val]
-        new_weight = old_weight * a_dec ** (self.count - old_count)
-        # print('old : ({}, {}), new: ({}, {})'.format(old_weight, old_count, new_weight, self.count))
-        self.dict[self.t_val] = (new_weight, self.count)
-        return new_weight
+            t_val = min(self.t_val, t_val)
+            while t_val < self.t_val and not self._over(t_val, total, threshold):
+                t_val = self.points.next_key(t_val)
+            while t_val > self.points.min_key() and self._over(self.points.previous_key(t_val), total, threshold):
+                t_val = self.points.previous_key(t_val)
+            if t_val < self.t_val and t_val == self.points.min_key():
+                self.offset = 0
+            self.t_val = t_val
+
+
+    def _over(self, key, total, threshold):
+        return (self.points.weight_upto(key) + self.offset) / total > threshold
@@ -0,0 +1,258 @@
+"""
+Offline replay of a workload through the runtime predictors (the scheduling is not simulated).
+
+The jobs start and finish as recorded in the trace (at submit_time + wait_time and
+after actual_run_time): each job is predicted when it is submitted and is fitted when it finishes.
+The events are streamed in time order with a heap; the events occurring at the same time
+are ordered as in the simulator (submissions, then terminations, then starts) and then by the job order.
+
+The trace is parsed once into columns (NumPy arrays) and several predictors are replayed
+in a single pass over it; the configurations may also be spread over a pool of processes.
+A parsed trace can be saved to a binary file and mapped in memory by other processes
+(the batch runner parses each trace once and its workers simulate from the mapped trace).
+"""
+
+import csv
+import heapq
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from base.prototype import Job, _job_input_to_job
+from base.workload_parser import parse_lines
+from schedulers.common import load_predictor
+
+# the order of the events occurring at the same time
+SUBMIT, END, START = 0, 1, 2
+
+TRACE_MAGIC = b'PYSSTRC1'
+# the columns of a trace file start at a multiple of this
+TRACE_ALIGNMENT = 64
+
+METRICS = ['jobs', 'mean_error', 'mae', 'rmse', 'underestimated', 'accuracy']
+
+
+def read_max_procs(filename):
+    """The number of processors from the "MaxProcs" field of the header of a SWF file (None if missing)"""
+    with open(filename) as input_file:
+        for line in input_file:
+            if not line.lstrip().startswith(';'):
+                break
+            if line.lstrip().startswith('; MaxProcs:'):
+                return int(line.strip()[11:])
+    return None
+
+
+class Trace(object):
+    """The jobs of a workload stored as columns"""
+
+    COLUMNS = ['id', 'submit_time', 'wait_time', 'actual_run_time', 'user_estimated_run_time',
+               'num_required_processors', 'user_id', 'group_id', 'executable_id', 'think_time']
+
+    def __init__(self, columns, num_processors=None):
+        """
+        :param columns: dictionary {column name: sequence of the values}
+        :param num_processors: the size of the machine the jobs were validated for
+        """
+        for name in self.COLUMNS:
+            setattr(self, name, np.asarray(columns[name], dtype=np.int64))
+        self.num_processors = num_processors
+
+    def __len__(self):
+        return len(self.id)
+
+    @classmethod
+    def from_swf(cls, filename, num_processors=None):
+        """
+        Parses a SWF file (the jobs are validated as in the simulator)
+        :param num_processors: the size of the machine (read from the header if not given)
+        """
+        if num_processors is None:
+            num_processors = read_max_procs(filename)
+            if num_processors is None:
+                raise ValueError("Missing MaxProcs in the header of " + filename)
+        columns = dict((name, []) for name in cls.COLUMNS)
+        with open(filename) as input_file:
+            for job_input in parse_lines(input_file):
+                job = _job_input_to_job(job_input, num_processors)
+                job.wait_time = job_input.wait_time
+                for name in cls.COLUMNS:
+                    columns[name].append(getattr(job, name))
+        return cls(columns, num_processors)
+
+    def save(self, filename):
+        """
+        Atomically replaces 'filename' with the trace in binary form:
+        a header line (JSON: the columns, the number of jobs and of processors) padded to TRACE_ALIGNMENT,
+        followed by the columns (int64, native byte order) one after the other.
+        """
+        header = json.dumps({'columns': self.COLUMNS, 'jobs': len(self), 'num_processors': self.num_processors,
+                             'byteorder': 'little' if np.little_endian else 'big'})
+        size = len(TRACE_MAGIC) + len(header) + 1
+        header += ' ' * (-size % TRACE_ALIGNMENT) + '\n'
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, 'wb') as f:
+            f.write(TRACE_MAGIC)
+            f.write(header)
+            for name in self.COLUMNS:
+                getattr(self, name).tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp_filename, filename)
+
+    @classmethod
+    def load(cls, filename, mmap=True):
+        """
+        Loads a trace saved with save.
+        :param mmap: map the columns in memory (read-only, the pages are shared by the processes loading the file)
+                     instead of reading them
+        """
+        with open(filename, 'rb') as f:
+            if f.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+                raise ValueError("'" + filename + "' is not a trace file.")
+            header = json.loads(f.readline())
+            offset = f.tell()
+            if header['columns'] != cls.COLUMNS or \
+                    header['byteorder'] != ('little' if np.little_endian else 'big'):
+                raise ValueError("'" + filename + "' is not compatible with this version of the simulator.")
+            n_jobs = header['jobs']
+            if mmap and n_jobs:
+                data = np.memmap(filename, dtype=np.int64, mode='r', offset=offset, shape=(len(cls.COLUMNS), n_jobs))
+            else:
+                data = np.fromfile(f, dtype=np.int64, count=len(cls.COLUMNS) * n_jobs)
+                data = data.reshape((len(cls.COLUMNS), n_jobs))
+        return cls(dict(zip(cls.COLUMNS, data)), header['num_processors'])
+
+    def jobs(self):
+        """New Job objects (in the order of the trace)"""
+        return [Job(id=row[0], submit_time=row[1], actual_run_time=row[3], user_estimated_run_time=row[4],
+                    num_required_processors=row[5], user_id=row[6], group_id=row[7], executable_id=row[8],
+                    think_time=row[9])
+                for row in zip(*[getattr(self, name).tolist() for name in self.COLUMNS])]
+
+    def events(self):
+        """Yields (time, kind, job index) in the order of the replay"""
+        submit_times = self.submit_time.tolist()
+        start_times = (self.submit_time + self.wait_time).tolist()
+        run_times = self.actual_run_time.tolist()
+        heap = []
+        for i in np.argsort(self.submit_time, kind='mergesort').tolist():
+            submission = (submit_times[i], SUBMIT, i)
+            while heap and heap[0] < submission:
+                event = heapq.heappop(heap)
+                if event[1] == START:
+                    heapq.heappush(heap, (event[0] + run_times[event[2]], END, event[2]))
+                yield event
+            yield submission
+            heapq.heappush(heap, (start_times[i], START, i))
+        while heap:
+            event = heapq.heappop(heap)
+            if event[1] == START:
+                heapq.heappush(heap, (event[0] + run_times[event[2]], END, event[2]))
+            yield event
+
+
+def replay(trace, predictors):
+    """
+    Replays the trace through each of the predictors, in a single pass.
+
+    The predictors share the Job objects: predicted_run_time is reset before each prediction,
+    so a predictor must not rely on the other attributes being changed by another predictor.
+
+    :return: list of arrays of the predicted run times (in the order of the trace), one per predictor
+    """
+    jobs = trace.jobs()
+    predictions = [np.zeros(len(trace)) for _ in predictors]
+    running_jobs = []
+    for time, kind, i in trace.events():
+        job = jobs[i]
+        if kind == SUBMIT:
+            for predictor, predicted in zip(predictors, predictions):
+                job.predicted_run_time = job.user_estimated_run_time
+                predictor.predict(job, time, running_jobs)
+                predicted[i] = job.predicted_run_time
+        elif kind == START:
+            running_jobs.append(job)
+        else:
+            running_jobs.remove(job)
+            for predictor in predictors:
+                predictor.fit(job, time)
+    return predictions
+
+
+# the trace replayed by the worker processes
+_worker_trace = None
+
+
+def _init_worker(trace):
+    global _worker_trace
+    _worker_trace = trace
+
+
+def _replay_configs(configs):
+    return replay(_worker_trace, [load_predictor(config) for config in configs])
+
+
+def replay_configs(trace, configs, processes=None):
+    """
+    Replays the trace through the predictors of the configurations
+    (the configurations are split in groups, each group is replayed in a single pass by a worker process).
+
+    :param configs: list of options, as for the simulator (only options["scheduler"]["predictor"] is used)
+    :param processes: the number of processes (by default, the number of CPUs); if 1, the replay runs in this process
+    :return: list of arrays of the predicted run times, one per configuration
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, len(configs)))
+    if processes == 1:
+        return replay(trace, [load_predictor(config) for config in configs])
+    groups = [configs[k::processes] for k in range(processes)]
+    pool = multiprocessing.Pool(processes=processes, initializer=_init_worker, initargs=(trace,))
+    try:
+        results = pool.map(_replay_configs, groups, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    predictions = [None] * len(configs)
+    for k, group_predictions in enumerate(results):
+        predictions[k::processes] = group_predictions
+    return predictions
+
+
+def accuracy_metrics(predicted, actual):
+    """
+    The accuracy of the predictions (dictionary {metric: value}):
+    - mean_error: the mean of predicted - actual
+    - mae, rmse: the mean absolute error and the root mean squared error
+    - underestimated: the fraction of the predictions below the actual run time
+    - accuracy: the mean of min(predicted, actual) / max(predicted, actual)
+    """
+    predicted = np.asarray(predicted, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if len(actual) == 0:
+        return dict((metric, 0) for metric in METRICS)
+    error = predicted - actual
+    return {
+        'jobs': len(actual),
+        'mean_error': error.mean(),
+        'mae': np.abs(error).mean(),
+        'rmse': np.sqrt((error * error).mean()),
+        'underestimated': (error < 0).mean(),
+        'accuracy': (np.minimum(predicted, actual) / np.maximum(np.maximum(predicted, actual), 1)).mean(),
+    }
+
+
+def write_metrics(filename, names, metrics):
+    """
+    Writes a CSV file with a row of metrics per configuration
+    :param names: the names of the configurations
+    :param metrics: the metrics (as returned by accuracy_metrics) of each configuration
+    """
+    with open(filename, 'wb') as f:
+        writer = csv.writer(f)
+        writer.writerow(['config'] + METRICS)
+        for name, values in zip(names, metrics):
+            writer.writerow([name] + [values[metric] for metric in METRICS])
@@ -0,0 +1,104 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import copy
+
+import numpy as np
+
+from pyss.predictors.replay import SUBMIT, START
+from pyss.predictors.test_replay import _trace
+from schedulers.common import load_predictor
+
+
+def _config(**predictor):
+    return {'scheduler': {'predictor': predictor}}
+
+
+SGDLINEAR_OPTIONS = dict(max_cores='auto', eta=5000, loss='composite', rightside='square', rightparam=1,
+                         leftside='abs', leftparam=1, threshold=0, weight='1+log(m*r)', gd='NAG',
+                         regularization='l1', **{'lambda': 400})
+
+
+class test_predict_batch(TestCase):
+    """predict_batch gives the same predictions as predict called for each of the jobs"""
+
+    def setUp(self):
+        self.trace = _trace(300)
+        # the jobs start after time 0 (the running jobs have a positive start_to_run_at_time)
+        self.trace.submit_time = self.trace.submit_time + 1
+
+    def _check(self, config):
+        """
+        Replays the trace; at each submission, predicts the queued and the running jobs
+        with predict on the predictor and with predict_batch on a copy of it.
+
+        :return: the number of the predicted jobs that share their (tag, running time) with another job
+        """
+        predictor = load_predictor(config)
+        jobs = self.trace.jobs()
+        queue, running = [], []
+        n_checks, n_shared = 0, 0
+        for time, kind, i in self.trace.events():
+            job = jobs[i]
+            if kind == SUBMIT:
+                job.predicted_run_time = job.user_estimated_run_time
+                predictor.predict(job, time, running)
+                queue.append(job)
+                batch_predictor, batch_jobs, batch_running = copy.deepcopy((predictor, queue + running, running))
+                for j in queue + running:
+                    predictor.predict(j, time, running)
+                batch_predictor.predict_batch(batch_jobs, time, batch_running)
+                self.assertEqual([j.predicted_run_time for j in batch_jobs],
+                                 [j.predicted_run_time for j in queue + running])
+                n_checks += 1
+                keys = [(j.executable_id, j.user_id, j.user_estimated_run_time, j.num_required_processors,
+                         j.start_to_run_at_time) for j in queue + running]
+                n_shared += len(keys) - len(set(keys))
+            elif kind == START:
+                queue.remove(job)
+                job.start_to_run_at_time = time
+                running.append(job)
+            else:
+                running.remove(job)
+                predictor.fit(job, time)
+        self.assertEqual(n_checks, len(jobs))
+        return n_shared
+
+    def test_sgdlinear(self):
+        self._check(_config(name='predictor_sgdlinear', quadratic=False, cubic=False, **SGDLINEAR_OPTIONS))
+
+    def test_sgdlinear_quadratic(self):
+        self._check(_config(name='predictor_sgdlinear', quadratic=True, cubic=False, **SGDLINEAR_OPTIONS))
+
+    def test_sgdlinear_cubic(self):
+        self._check(_config(name='predictor_sgdlinear', quadratic=True, cubic=True, **SGDLINEAR_OPTIONS))
+
+    def test_conditional_percent(self):
+        self._check(_config(name='predictor_conditional_percent'))
+
+    def test_conditional_percent_conditional_quantile(self):
+        self._check(_config(name='predictor_conditional_percent', conditional_quantile=True))
+
+    def test_conditional_percent_shared_lookups(self):
+        # few tags: the queued jobs and the running jobs started at the same time share lookups
+        self.trace.user_estimated_run_time = np.full_like(self.trace.user_estimated_run_time, 40000)
+        self.trace.num_required_processors = np.ones_like(self.trace.num_required_processors)
+        config = _config(name='predictor_conditional_percent', confidence=0.5, use_weights=False)
+        self.assertGreater(self._check(config), 0)
+
+    def test_top_percent(self):
+        self._check(_config(name='predictor_top_percent'))
+
+    def test_top_percent_exact_quantile(self):
+        self._check(_config(name='predictor_top_percent', exact_quantile=True))
+
+    def test_complete(self):
+        self._check(_config(name='predictor_complete'))
+
+    def test_exact(self):
+        self._check(_config(name='predictor_exact'))
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
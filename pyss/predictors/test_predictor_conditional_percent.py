@@ -0,0 +1,126 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import random
+
+from pyss.predictors.predictor_conditional_percent import Record
+
+
+class _ReferenceRecord(object):
+    """The straightforward implementation: a sorted list of [value, weight]"""
+
+    def __init__(self, start_value, start_weight, use_weights):
+        point_weight = start_weight * start_value if use_weights else start_weight
+        self.points = [[start_value, point_weight]]
+        self.total_weight = point_weight
+
+    def predict(self, time_already_running, threshold):
+        threshold_weight = threshold * self.total_weight
+        weight_sum = 0
+        points = [p for p in self.points if p[0] > time_already_running]
+        for (_, weight), (next_value, _) in zip(points, points[1:]):
+            weight_sum += weight
+            if weight_sum > threshold_weight:
+                return next_value
+        return None
+
+    def conditional_quantile(self, time_already_running, threshold):
+        points = [p for p in self.points if p[0] > time_already_running]
+        above = sum(weight for _, weight in points)
+        weight_sum = 0
+        for value, weight in points:
+            weight_sum += weight
+            if weight_sum >= threshold * above:
+                return value
+        return None
+
+    def add(self, value, a_dec, threshold, use_weights):
+        for point in self.points:
+            point[1] *= a_dec
+        point_weight = value if use_weights else 1
+        for point in self.points:
+            if point[0] == value:
+                point[1] += point_weight
+                break
+        else:
+            self.points.append([value, point_weight])
+            self.points.sort()
+        self.total_weight = a_dec * self.total_weight + point_weight
+
+
+class test_Record(TestCase):
+
+    def test_matches_reference(self):
+        rnd = random.Random(1)
+        for a_dec in (1.0, 0.9, 0.5):
+            for use_weights in (True, False):
+                record = Record(500, 0.1, use_weights)
+                reference = _ReferenceRecord(500, 0.1, use_weights)
+                for _ in range(300):
+                    value = rnd.randint(1, 1000)
+                    record.add(value, a_dec, 0.9, use_weights)
+                    reference.add(value, a_dec, 0.9, use_weights)
+                    for threshold in (0.5, 0.9, 0.97):
+                        running = rnd.choice([0, rnd.randint(0, 1000)])
+                        self.assertEqual(record.predict(running, threshold), reference.predict(running, threshold))
+
+    def test_conditional_quantile_matches_reference(self):
+        rnd = random.Random(2)
+        # the weight above the running time is the total minus the weight up to it:
+        # with a fast decay, the weights of the old values above it are lost in the rounding
+        for a_dec in (1.0, 0.95, 0.9):
+            for use_weights in (True, False):
+                # integer weights without decay: the sums are exact at the ties
+                record = Record(500, 1, use_weights)
+                reference = _ReferenceRecord(500, 1, use_weights)
+                for _ in range(300):
+                    value = rnd.randint(1, 1000)
+                    record.add(value, a_dec, 0.9, use_weights)
+                    reference.add(value, a_dec, 0.9, use_weights)
+                    for threshold in (0.5, 0.9, 0.97):
+                        running = rnd.choice([0, rnd.randint(0, 1000)])
+                        self.assertEqual(record.predict(running, threshold, True),
+                                         reference.conditional_quantile(running, threshold))
+
+    def test_first_over_zero_is_the_next_value(self):
+        # the sums of the left subtrees can be rounded over the weight up to 'above'
+        rnd = random.Random(2)
+        record = Record(500, 0.1, True)
+        for _ in range(300):
+            record.add(rnd.randint(1, 1000), 0.9, 0.9, True)
+            running = rnd.randint(0, 1000)
+            self.assertEqual(record.points.first_over(0, above=running), record.points.next_key(running))
+
+    def test_conditional_quantile_ties(self):
+        record = Record(40, 1, False)
+        for value in (10, 20, 30):
+            record.add(value, 1.0, 0.9, False)
+        # the values 10, 20, 30 and 40 have weight 1
+        self.assertEqual(record.predict(0, 0, True), 10)
+        self.assertEqual(record.predict(0, 0.5, True), 20)
+        self.assertEqual(record.predict(0, 0.75, True), 30)
+        self.assertEqual(record.predict(0, 1, True), 40)
+        self.assertEqual(record.predict(10, 0.5, True), 30)
+        self.assertEqual(record.predict(15, 1 / 3.0, True), 20)
+        self.assertEqual(record.predict(40, 0.5, True), None)
+        # the default compares with the total weight
+        self.assertEqual(record.predict(20, 0.5, False), None)
+        self.assertEqual(record.predict(20, 0.5, True), 30)
+
+    def test_decay_is_rescaled(self):
+        record = Record(100, 0.1, False)
+        for _ in range(5000):
+            record.add(10, 0.5, 0.9, False)
+        record.add(20, 0.5, 0.9, False)
+        record.add(30, 0.5, 0.9, False)
+        self.assertTrue(record.points.scale > 0)
+        # the weights are about 0 (100), 1/2 (10), 1/2 (20) and 1 (30) of 2 in total
+        self.assertEqual(record.predict(0, 0.1), 20)
+        self.assertEqual(record.predict(0, 0.7), 100)
+        self.assertEqual(record.predict(10, 0.2), 30)
+        self.assertEqual(record.predict(30, 0.1), None)
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from pyss.predictors.predictor_state import save_state, load_state
+from pyss.predictors.replay import replay
+from pyss.predictors.test_replay import _trace
+from schedulers.common import load_predictor
+
+
+def _config(**predictor):
+    return {'scheduler': {'predictor': predictor}}
+
+
+TAG_CONFIGS = [
+    _config(name='predictor_top_percent'),
+    _config(name='predictor_conditional_percent'),
+    _config(name='predictor_complete'),
+]
+
+KNN_OPTIONS = dict(k=5, alpha_uid=1, alpha_mas=1, alpha_umean=1, alpha_think=1, alpha_cores=1, alpha_hod=1, alpha_dow=1)
+
+LEARNING_CONFIGS = [
+    _config(name='predictor_sgdlinear', max_cores='auto', eta=5000, loss='composite', rightside='square',
+            rightparam=1, leftside='abs', leftparam=1, threshold=0, weight='1+log(m*r)', quadratic=True, cubic=False,
+            gd='NAG', regularization='l1', **{'lambda': 400}),
+    _config(name='predictor_knn', **KNN_OPTIONS),
+    _config(name='predictor_knn', index='vptree', **KNN_OPTIONS),
+]
+
+
+class test_predictor_state(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'predictor.state')
+        self.trace = _trace(300)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _trained_and_restored(self, config):
+        trained = load_predictor(config)
+        replay(self.trace, [trained])
+        save_state(trained, self.filename)
+        restored = load_predictor(config)
+        load_state(restored, self.filename)
+        return trained, restored
+
+    def test_tag_predictors_predict_the_same(self):
+        for config in TAG_CONFIGS:
+            trained, restored = self._trained_and_restored(config)
+            for job in self.trace.jobs():
+                trained.predict(job, 0, [])
+                expected = job.predicted_run_time
+                restored.predict(job, 0, [])
+                self.assertEqual(job.predicted_run_time, expected)
+
+    def test_learning_predictors_restore_the_model(self):
+        rnd = np.random.RandomState(1)
+        for config in LEARNING_CONFIGS:
+            trained, restored = self._trained_and_restored(config)
+            n_features = getattr(trained, 'n_base_features', trained.n_features)
+            for _ in range(10):
+                x = rnd.randint(0, 1000, size=n_features).astype(np.float64)
+                if config['scheduler']['predictor']['name'] == 'predictor_sgdlinear':
+                    x = trained.expand_x(x)
+                elif config['scheduler']['predictor'].get('index') == 'vptree':
+                    x = x.tolist()
+                self.assertEqual(restored.model.predict(x), trained.model.predict(x))
+                # the learner continues from the same state
+                trained.model.fit(x, 100.0)
+                restored.model.fit(x, 100.0)
+
+    def test_warm_start_option(self):
+        trained = load_predictor(TAG_CONFIGS[0])
+        replay(self.trace, [trained])
+        save_state(trained, self.filename)
+        cold = load_predictor(TAG_CONFIGS[0])
+        warm = load_predictor(_config(name='predictor_top_percent', warm_start=self.filename))
+        self.assertEqual(cold.recorder, {})
+        self.assertEqual(sorted(warm.recorder), sorted(trained.recorder))
+
+    def test_state_of_another_predictor_is_rejected(self):
+        trained, _ = self._trained_and_restored(TAG_CONFIGS[0])
+        self.assertRaises(ValueError, load_state, load_predictor(TAG_CONFIGS[1]), self.filename)
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import pickle
+import random
+
+from pyss.predictors.predictor_top_percent import Record
+from pyss.predictors.weight_tree import WeightTree
+
+
+class test_Record(TestCase):
+
+    def test_t_val_is_the_weighted_quantile(self):
+        rnd = random.Random(1)
+        for a_dec in (1.0, 0.9, 0.5):
+            for use_weights in (True, False):
+                for threshold in (0.5, 0.97):
+                    record = Record(500, 0.1, use_weights)
+                    points = {500: 0.1 * 500 if use_weights else 0.1}
+                    # the start point is counted with the weight 1 and is not decayed at the first addition
+                    offset = 1 - points[500] - (1 - a_dec)
+                    for i in range(200):
+                        t_val = record.t_val
+                        value = rnd.choice([rnd.randint(1, 1000), rnd.randint(1, 10) * 100000])
+                        record.add(value, a_dec, threshold, use_weights)
+                        if i > 0:
+                            for key in points:
+                                points[key] *= a_dec
+                            offset *= a_dec
+                        points[value] = points.get(value, 0) + (value if use_weights else 1)
+                        total = sum(points.values()) + offset
+
+                        def over(key):
+                            return sum(weight for key_, weight in points.items() if key_ <= key) + offset
+                        if value > t_val:
+                            self.assertTrue(record.t_val >= t_val)
+                            self.assertTrue(over(record.t_val) > threshold * total * (1 - 1e-9))
+                            below = [key for key in points if t_val <= key < record.t_val]
+                        else:
+                            self.assertTrue(record.t_val <= t_val)
+                            if record.t_val < t_val:
+                                self.assertTrue(over(record.t_val) > threshold * total * (1 - 1e-9))
+                            below = [key for key in points if key < record.t_val]
+                        if below:
+                            self.assertTrue(over(max(below)) <= threshold * total * (1 + 1e-9))
+                        if record.t_val < t_val and record.t_val == min(points):
+                            offset = 0
+
+    def test_tie_with_the_threshold(self):
+        # the weight up to t_val must be over the threshold: at an exact tie t_val moves up (or does not move down)
+        record = Record(10, 1, False)
+        record.add(20, 1.0, 0.5, False)
+        self.assertEqual(record.t_val, 20)
+        record = Record(20, 1, False)
+        record.add(10, 1.0, 0.5, False)
+        self.assertEqual(record.t_val, 20)
+        # the comparison is made with the sums of the tree: here the fraction up to 1 is exactly 0.5
+        # (the running sums of the original walk were rounded over 0.5, so it predicted 1)
+        record = Record(1, 5, False)
+        for value in (2, 6, 9, 2, 20, 9, 3, 3, 6, 10, 17, 5, 9, 10, 8, 6, 2, 15, 8, 15, 4, 6, 19, 20, 12, 19, 18, 17,
+                      13, 16, 14, 18, 13, 9, 9, 4, 4, 5, 15, 5, 17, 10, 10, 11, 17, 3, 5, 15, 7, 10, 3, 10, 1):
+            record.add(value, 0.5, 0.5, False)
+        total = record.points.total() + record.offset
+        self.assertEqual((record.points.weight_upto(1) + record.offset) / total, 0.5)
+        self.assertEqual(record.t_val, 2)
+
+    def test_exact_quantile(self):
+        rnd = random.Random(3)
+        for a_dec in (1.0, 0.5):
+            for use_weights in (True, False):
+                record = Record(500, 0.1, use_weights, exact=True)
+                points = {500: 0.1 * 500 if use_weights else 0.1}
+                for _ in range(200):
+                    value = rnd.choice([rnd.randint(1, 1000), rnd.randint(1, 10) * 100000])
+                    record.add(value, a_dec, 0.97, use_weights)
+                    for key in points:
+                        points[key] *= a_dec
+                    points[value] = points.get(value, 0) + (value if use_weights else 1)
+                    total = sum(points.values())
+                    under = sum(weight for key, weight in points.items() if key <= record.t_val)
+                    self.assertTrue(under > 0.97 * total * (1 - 1e-9))
+                    below = [key for key in points if key < record.t_val]
+                    if below:
+                        under = sum(weight for key, weight in points.items() if key <= max(below))
+                        self.assertTrue(under <= 0.97 * total * (1 + 1e-9))
+
+    def test_no_decay_without_weights(self):
+        record = Record(1000, 1, False)
+        for value in (10, 20, 30):
+            record.add(value, 1.0, 0.5, False)
+        # weights: 1 (10), 1 (20), 1 (30), 1 (1000)
+        self.assertEqual(record.t_val, 30)
+        record.add(10, 1.0, 0.5, False)
+        self.assertEqual(record.t_val, 20)
+
+
+class test_WeightTree(TestCase):
+
+    def test_pickle_keeps_the_tree(self):
+        rnd = random.Random(2)
+        tree = WeightTree()
+        for _ in range(300):
+            tree.decay(0.9)
+            tree.add(rnd.randint(1, 100), rnd.random())
+        copy = pickle.loads(pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(copy.total(), tree.total())
+        for key in range(0, 102):
+            self.assertEqual(copy.weight_upto(key), tree.weight_upto(key))
+            self.assertEqual(copy.first_over(key * tree.total() / 101), tree.first_over(key * tree.total() / 101))
+        # the copy keeps evolving as the original
+        for tree_ in (tree, copy):
+            tree_.decay(0.5)
+            tree_.add(50, 3.0)
+            tree_.add(1000, 1.0)
+        self.assertEqual(copy.total(), tree.total())
+        self.assertEqual(copy.first_over(0.7 * tree.total(), above=20), tree.first_over(0.7 * tree.total(), above=20))
+
+    def test_neighbour_keys(self):
+        tree = WeightTree()
+        for key in (5, 1, 9, 3):
+            tree.add(key, 1.0)
+        self.assertEqual((tree.min_key(), tree.max_key()), (1, 9))
+        self.assertEqual([tree.previous_key(key) for key in (1, 3, 4, 9, 10)], [None, 1, 3, 5, 9])
+        self.assertEqual([tree.next_key(key) for key in (0, 3, 4, 9)], [1, 5, 5, None])
+        self.assertEqual(tree.first_over(-0.5), 1)
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import os
+import random
+import shutil
+import tempfile
+
+import numpy as np
+
+from base.prototype import _job_inputs_to_jobs
+from base.workload_parser import parse_lines
+from pyss.predictors.replay import Trace, SUBMIT, END, START, replay, replay_configs, accuracy_metrics
+from schedulers.common import load_predictor
+
+
+def _trace(n_jobs, seed=1):
+    rnd = random.Random(seed)
+    columns = dict((name, []) for name in Trace.COLUMNS)
+    for i in range(n_jobs):
+        run_time = rnd.choice([rnd.randint(1, 100), rnd.randint(1, 10) * 1000])
+        row = {'id': i + 1, 'submit_time': rnd.randint(0, 20) * 50, 'wait_time': rnd.choice([0, 0, rnd.randint(1, 500)]),
+               'actual_run_time': run_time, 'user_estimated_run_time': run_time * rnd.randint(1, 4),
+               'num_required_processors': rnd.randint(1, 16), 'user_id': rnd.randint(1, 5), 'group_id': 1,
+               'executable_id': rnd.randint(1, 3), 'think_time': 0}
+        for name in Trace.COLUMNS:
+            columns[name].append(row[name])
+    return Trace(columns)
+
+
+class _Recorder(object):
+    """Records the calls; predicts the number of running jobs"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, job, current_time, list_running_jobs):
+        self.calls.append(('predict', job.id, current_time, sorted(j.id for j in list_running_jobs)))
+        job.predicted_run_time = len(list_running_jobs)
+
+    def fit(self, job, current_time):
+        self.calls.append(('fit', job.id, current_time))
+
+
+CONFIGS = [
+    {'scheduler': {'predictor': {'name': 'predictor_conditional_percent'}}},
+    {'scheduler': {'predictor': {'name': 'predictor_reqtime', 'predict_multiplier': 0.5}}},
+    {'scheduler': {'predictor': {'name': 'predictor_top_percent', 'threshold': 0.5}}},
+]
+
+
+class test_replay(TestCase):
+
+    def test_events_order(self):
+        trace = _trace(200)
+        starts = trace.submit_time + trace.wait_time
+        ends = starts + trace.actual_run_time
+        expected = sorted([(t, SUBMIT, i) for i, t in enumerate(trace.submit_time.tolist())]
+                          + [(t, START, i) for i, t in enumerate(starts.tolist())]
+                          + [(t, END, i) for i, t in enumerate(ends.tolist())])
+        self.assertEqual(list(trace.events()), expected)
+
+    def test_running_jobs(self):
+        trace = _trace(50)
+        recorder = _Recorder()
+        predicted, = replay(trace, [recorder])
+        starts = trace.submit_time + trace.wait_time
+        ends = starts + trace.actual_run_time
+        jobs = dict((job_id, i) for i, job_id in enumerate(trace.id.tolist()))
+        fitted = set()
+        for call in recorder.calls:
+            i = jobs[call[1]]
+            if call[0] == 'fit':
+                self.assertEqual(call[2], ends[i])
+                fitted.add(i)
+            else:
+                self.assertEqual(call[2], trace.submit_time[i])
+                time = call[2]
+                # the submissions come before the terminations and the starts at the same time
+                running = [trace.id[k] for k in range(len(trace)) if starts[k] < time <= ends[k]]
+                self.assertEqual(call[3], sorted(running))
+                self.assertEqual(predicted[i], len(running))
+        self.assertEqual(len(fitted), len(trace))
+
+    def test_single_pass_matches_separate_passes(self):
+        trace = _trace(300)
+        together = replay(trace, [load_predictor(config) for config in CONFIGS])
+        for config, predicted in zip(CONFIGS, together):
+            separate, = replay(trace, [load_predictor(config)])
+            self.assertEqual(predicted.tolist(), separate.tolist())
+        self.assertEqual(together[1].tolist(), (trace.user_estimated_run_time * 0.5).tolist())
+
+    def test_process_pool_matches_single_process(self):
+        trace = _trace(300)
+        inline = replay_configs(trace, CONFIGS, processes=1)
+        pooled = replay_configs(trace, CONFIGS, processes=2)
+        self.assertEqual([p.tolist() for p in inline], [p.tolist() for p in pooled])
+
+    def test_saved_trace_loads_the_same(self):
+        folder = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(folder, 'input.trace')
+            sample = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '5K_sample')
+            trace = Trace.from_swf(sample)
+            trace.save(filename)
+            expected = [vars(job) for job in trace.jobs()]
+            with open(sample) as f:
+                # the jobs are the same as the simulator's
+                self.assertEqual([vars(job) for job in _job_inputs_to_jobs(parse_lines(f), trace.num_processors)],
+                                 expected)
+            for mmap in (True, False):
+                loaded = Trace.load(filename, mmap=mmap)
+                self.assertEqual(loaded.num_processors, trace.num_processors)
+                self.assertEqual([vars(job) for job in loaded.jobs()], expected)
+                self.assertEqual(list(loaded.events()), list(trace.events()))
+            Trace({name: [] for name in Trace.COLUMNS}, 16).save(filename)
+            self.assertEqual(len(Trace.load(filename)), 0)
+            self.assertRaises(ValueError, Trace.load, sample)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_accuracy_metrics(self):
+        metrics = accuracy_metrics([10, 30, 20], [20, 20, 20])
+        self.assertEqual(metrics['jobs'], 3)
+        self.assertEqual(metrics['mean_error'], 0)
+        self.assertAlmostEqual(metrics['mae'], 20.0 / 3)
+        self.assertAlmostEqual(metrics['rmse'], np.sqrt(200.0 / 3))
+        self.assertAlmostEqual(metrics['underestimated'], 1.0 / 3)
+        self.assertAlmostEqual(metrics['accuracy'], (0.5 + 2.0 / 3 + 1) / 3)
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -1,53 +1,78 @@
 #!/usr/bin/env python3
 # encoding: utf-8
-import math
+import numpy as np
 # from __future__ import division
 #import copy
 
+def _sequential_sum(values):
+    """Sums the values in order (as the builtin sum does)"""
+    if len(values)==0:
+        return 0
+    return np.cumsum(values)[-1]
+
 class NAG(object):
     """
     Normalized Adaptive Gradient Descent learner.
     As per Ross,Mineiro,Langford: "Normalized Online Learning" (UAI2013)
     Works only with LinearModel
+
+    The updates are computed on whole vectors with NumPy,
+    the operations are done in the same order as with the per-coordinate updates.
     """
 
     def __init__(self, model, loss, eta, verbose=False):
         self.model=model
         assert model.__class__.__name__=='LinearModel'
         self.loss=loss
-        self.grad_loss=lambda x,y,p:self.loss.grad_loss(x,y,p)
         self.eta=float(eta)
         self.verbose=verbose
         self.n=1.0
-        self.s=[0.000000001]*model.dim
-        self.G=[0.000000001]*model.dim
+        self.s=np.full(model.dim,0.000000001)
+        self.G=np.full(model.dim,0.000000001)
         self.N=0.000000001
 
 
+    def grad_loss(self, x, y, p):
+        return self.loss.grad_loss(x,y,p)
+
     def predict(self, x):
         return self.model.predict(x)
 
+    def predict_batch(self, X):
+        return self.model.predict_batch(X)
+
+    def export_state(self):
+        """The learned state: the parameters of the model and the accumulators"""
+        return {"w":self.model.get_param_vector().copy(),"n":self.n,"s":self.s.copy(),"G":self.G.copy(),"N":self.N}
+
+    def import_state(self,state):
+        if len(state["w"])!=self.model.dim:
+            raise ValueError("the state has %d parameters, the model has %d"%(len(state["w"]),self.model.dim))
+        self.model.set_param_vector(np.array(state["w"],dtype=np.float64))
+        self.n=state["n"]
+        self.s=np.array(state["s"],dtype=np.float64)
+        self.G=np.array(state["G"],dtype=np.float64)
+        self.N=state["N"]
+
     def fit(self, x,y,w=1.0):
         W=self.model.get_param_vector()
-        #print("N: %s" %self.N)
-        #print("G: %s" %self.G)
-        #print("W: %s" %W)
-        for i in range(0,self.model.dim):
-            absx = float(abs(x[i]))
-            if absx>self.s[i]:
-                W[i]=W[i]*(self.s[i]/absx)
-                #W[i]*=self.s[i]/absx
-                self.s[i]=absx
-
-        #self.model.set_param_vector(W)
-        self.N=self.N+sum([a*a/(b*b) for a,b in zip(x,self.s) if not b==0])
+        #x may be a float32 vector: the squares are computed in its precision
+        raw=np.asarray(x)
+        if raw.dtype.kind!='f':
+            raw=raw.astype(np.float64)
+        x=raw.astype(np.float64)
+
+        absx=np.abs(x)
+        rescaled=absx>self.s
+        W[rescaled]=W[rescaled]*(self.s[rescaled]/absx[rescaled])
+        self.s[rescaled]=absx[rescaled]
+
+        nonzero=self.s!=0
+        self.N=self.N+_sequential_sum((raw*raw)[nonzero]/(self.s*self.s)[nonzero])
         px = self.model.predict(x)
-        l=[0.0]*self.model.dim
-        for i in range(0,self.model.dim):
-            tloss = self.loss.d_loss_directional(x,y,i,w=w,px=px)
-            self.G[i]+= (tloss)*tloss
-            l[i]= -self.eta*tloss/(math.sqrt(self.N*self.G[i]/self.n)*self.s[i])
-        W=[a+b for a,b in zip(l,W)]
-        self.model.set_param_vector(W)
+        tloss=self.loss.grad_loss(x,y,w=w,px=px)
+        self.G+=tloss*tloss
+        l=-self.eta*tloss/(np.sqrt(self.N*self.G/self.n)*self.s)
+        self.model.set_param_vector(l+W)
 
         self.n+=2
@@ -12,13 +12,15 @@ class NG(object):
         self.model=model
         assert model.__class__.__name__=='LinearModel'
         self.loss=loss
-        self.grad_loss=lambda x,y:self.loss.grad_loss(x,y)
         self.eta=eta
         self.verbose=verbose
         self.n=1
         self.s=[0]*model.dim
         self.N=0
 
+    def grad_loss(self, x, y):
+        return self.loss.grad_loss(x,y)
+
     def predict(self, x):
         return self.model.predict(x)
 
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # encoding: utf-8
-#import numpy as np
+import numpy as np
 
 class SGD(object):
     """Stochastic Gradient Descent learner with eta/n learning rate"""
@@ -16,11 +16,24 @@ class SGD(object):
         #print(self.model.get_param_vector())
         return self.model.predict(x)
 
+    def predict_batch(self, X):
+        return self.model.predict_batch(X)
+
+    def export_state(self):
+        """The learned state: the parameters of the model and the step counter"""
+        return {"w":self.model.get_param_vector().copy(),"n":self.n}
+
+    def import_state(self,state):
+        if len(state["w"])!=self.model.dim:
+            raise ValueError("the state has %d parameters, the model has %d"%(len(state["w"]),self.model.dim))
+        self.model.set_param_vector(np.array(state["w"],dtype=np.float64))
+        self.n=state["n"]
+
     def fit(self, x,y,w=1):
         W=self.model.get_param_vector()
-        G=self.loss.grad_loss(x,y,w)
-        print(G)
-        for i in range(0,self.model.dim):
-            W[i]-=self.eta*0.00000000001*G[i]/float(self.n)
+        G=np.asarray(self.loss.grad_loss(x,y,w))
+        if self.verbose:
+            print(G)
+        W=W-self.eta*0.00000000001*G/float(self.n)
         self.n+=1
         self.model.set_param_vector(W)
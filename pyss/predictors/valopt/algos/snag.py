@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 # encoding: utf-8
-import math
+import numpy as np
 #import copy
 
+from nag import _sequential_sum
+
 class sNAG(object):
     """
     Normalized Adaptive Gradient Descent learner.
@@ -14,36 +16,49 @@ class sNAG(object):
         self.model=model
         assert model.__class__.__name__=='LinearModel'
         self.loss=loss
-        self.grad_loss=lambda x,y,p:self.loss.grad_loss(x,y,p)
         self.eta=eta
         self.verbose=verbose
         self.n=1
-        self.s=[0]*model.dim
-        self.G=[0]*model.dim
+        self.s=np.zeros(model.dim)
+        self.G=np.zeros(model.dim)
         self.N=0
 
+    def grad_loss(self, x, y, p):
+        return self.loss.grad_loss(x,y,p)
+
     def predict(self, x):
         return self.model.predict(x)
 
+    def predict_batch(self, X):
+        return self.model.predict_batch(X)
+
+    def export_state(self):
+        """The learned state: the parameters of the model and the accumulators"""
+        return {"w":self.model.get_param_vector().copy(),"n":self.n,"s":self.s.copy(),"G":self.G.copy(),"N":self.N}
+
+    def import_state(self,state):
+        if len(state["w"])!=self.model.dim:
+            raise ValueError("the state has %d parameters, the model has %d"%(len(state["w"]),self.model.dim))
+        self.model.set_param_vector(np.array(state["w"],dtype=np.float64))
+        self.n=state["n"]
+        self.s=np.array(state["s"],dtype=np.float64)
+        self.G=np.array(state["G"],dtype=np.float64)
+        self.N=state["N"]
+
     def fit(self, x,y,w=1):
         W=self.model.get_param_vector()
-        #print("N: %s" %self.N)
-        #print("G: %s" %self.G)
-        #print("W: %s" %W)
-        for i in range(0,self.model.dim):
-            self.s[i]+=x[i]*x[i]
-            #if abs(x[i])>math.sqrt(self.s[i]/self.n):
-                #W[i]*=math.sqrt(self.s[i])/(abs(x[i])*math.sqrt(self.n))
-
-        self.model.set_param_vector(W)
-        self.N=self.N+sum([xi*xi/(si*si) for xi,si in zip(x,self.s) if not si==0])
-
-        l=[0]*self.model.dim
-        for i in range(0,self.model.dim):
-            self.G[i]+= (self.loss.d_loss_directional(x,y,i,w))**2
-            if not self.G[i]==0:
-                l[i]= -self.eta*self.n*self.loss.d_loss_directional(x,y,i,w)/math.sqrt(self.N*self.G[i]*self.s[i])
-        W=[a+b for a,b in zip(l,W)]
-        self.model.set_param_vector(W)
+        x=np.asarray(x,dtype=np.float64)
+        self.s+=x*x
+
+        nonzero=self.s!=0
+        self.N=self.N+_sequential_sum((x*x)[nonzero]/(self.s*self.s)[nonzero])
+
+        px=self.model.predict(x)
+        tloss=self.loss.grad_loss(x,y,w=w,px=px)
+        self.G+=tloss*tloss
+        l=np.zeros(self.model.dim)
+        nonzero=self.G!=0
+        l[nonzero]=-self.eta*self.n*tloss[nonzero]/np.sqrt(self.N*self.G[nonzero]*self.s[nonzero])
+        self.model.set_param_vector(l+W)
 
         self.n+=1
@@ -17,7 +17,6 @@ class SSGD(object):
     def __init__(self, model, loss, eta, verbose=False,scaler="scale_mean0"):
         self.model=model
         self.loss=loss
-        self.grad_loss=lambda x,y:self.loss.grad_loss(x,y)
         self.eta=eta
         self.verbose=verbose
         self.n=1
@@ -39,6 +38,9 @@ class SSGD(object):
         else:
             raise ValueError("No valid scaler specified to the SSGD.")
 
+    def grad_loss(self, x, y):
+        return self.loss.grad_loss(x,y)
+
     def predict(self, x):
         return self.model.predict(self.scale(x))
 
@@ -0,0 +1,77 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import math
+import random
+
+from pyss.predictors.valopt.algos.nag import NAG
+from pyss.predictors.valopt.algos.snag import sNAG
+from pyss.predictors.valopt.losses.composite import CompositeLoss
+from pyss.predictors.valopt.losses.losscurves.abs import Abscurve
+from pyss.predictors.valopt.losses.losscurves.square import Squarecurve
+from pyss.predictors.valopt.losses.regularizations.l1 import L1
+from pyss.predictors.valopt.losses.regularized_loss import RegularizedLoss
+from pyss.predictors.valopt.losses.squared_loss import SquaredLoss
+from pyss.predictors.valopt.models.linear_model import LinearModel
+
+
+def _reference_fit(nag, x, y, w):
+    """The per-coordinate NAG update"""
+    W = nag.model.get_param_vector()
+    for i in range(nag.model.dim):
+        absx = float(abs(x[i]))
+        if absx > nag.s[i]:
+            W[i] = W[i] * (nag.s[i] / absx)
+            nag.s[i] = absx
+    nag.N = nag.N + sum([a * a / (b * b) for a, b in zip(x, nag.s) if not b == 0])
+    px = sum([W[i] * x[i] for i in range(nag.model.dim)])
+    l = [0.0] * nag.model.dim
+    for i in range(nag.model.dim):
+        tloss = nag.loss.d_loss_directional(x, y, i, w=w, px=px)
+        nag.G[i] += tloss * tloss
+        l[i] = -nag.eta * tloss / (math.sqrt(nag.N * nag.G[i] / nag.n) * nag.s[i])
+    nag.model.set_param_vector([a + b for a, b in zip(l, W)])
+    nag.n += 2
+
+
+def _losses(model):
+    yield SquaredLoss(model)
+    yield CompositeLoss(model, Squarecurve(model, 1), Abscurve(model, 2), 10)
+    yield RegularizedLoss(model, CompositeLoss(model, Abscurve(model, 1), Abscurve(model, 2), 0), L1(), 0.5)
+
+
+class test_NAG(TestCase):
+
+    def setUp(self):
+        rnd = random.Random(1)
+        self.data = []
+        for _ in range(300):
+            x = [1.0] + [rnd.uniform(0, 1000) for _ in range(5)]
+            self.data.append((x, 3 * x[1] + 0.5 * x[4] + rnd.uniform(-50, 50)))
+
+    def test_matches_per_coordinate_updates(self):
+        for loss_index in range(3):
+            model = LinearModel(6)
+            nag = NAG(model, list(_losses(model))[loss_index], 0.1)
+            reference_model = LinearModel(6)
+            reference = NAG(reference_model, list(_losses(reference_model))[loss_index], 0.1)
+            for x, y in self.data:
+                self.assertEqual(nag.predict(x), reference.predict(x))
+                nag.fit(x, y, w=1.5)
+                _reference_fit(reference, x, y, 1.5)
+            self.assertEqual(model.get_param_vector().tolist(), list(reference_model.get_param_vector()))
+            self.assertEqual(nag.N, reference.N)
+
+    def test_snag_learns(self):
+        model = LinearModel(6)
+        snag = sNAG(model, SquaredLoss(model), 1.0)
+        errors = []
+        for x, y in self.data:
+            errors.append(abs(snag.predict(x) - y))
+            snag.fit(x, y)
+        self.assertTrue(sum(errors[-50:]) < sum(errors[:50]))
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
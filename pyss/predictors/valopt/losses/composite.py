@@ -1,4 +1,5 @@
 # encoding: utf-8
+import numpy as np
 
 class CompositeLoss(object):
     def __init__(self,model,rightside,leftside,threshold):
@@ -17,10 +18,16 @@ class CompositeLoss(object):
         else:
             return -w*self.leftside.d_loss_directional(self.threshold-px+y,x,i)
 
-    def grad_loss(self,x,y,w=1.0):
+    def grad_loss(self,x,y,w=1.0,px=None):
         """
-        Gradient of the loss of the model on example (x,y)
-        Should be np.array(map(lambda i:d_loss_directional(model, x, i),range(0,len(x))).
-        In the case where this can be optimized, it will be different.
+        Gradient of the loss of the model on example (x,y), as a vector.
+        px is the prediction of the model for x (computed if not given).
         """
-        return [self.d_loss_directional(x, y,i, w) for i in range(0,self.model.dim)]
+        if px is None:
+            px=self.model.predict(x)
+        if px-y>self.threshold:
+            return w*self.rightside.grad_loss(px-y-self.threshold,x)
+        elif px-y==self.threshold:
+            return np.zeros(self.model.dim)
+        else:
+            return -w*self.leftside.grad_loss(self.threshold-px+y,x)
@@ -12,3 +12,7 @@ class Abscurve(object):
            error e
         """
         return self.model.d_predict_directional(x, i)*self.gamma
+
+    def grad_loss(self,e,x):
+        """The derivatives with respect to all the entries of the parameter vector, as a vector"""
+        return self.model.gradient(x)*self.gamma
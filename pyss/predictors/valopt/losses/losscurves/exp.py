@@ -13,3 +13,7 @@ class Expcurve(object):
            instance x
         """
         return self.gamma*self.model.d_predict_directional(x, i)*math.exp(self.gamma*e)
+
+    def grad_loss(self,e,x):
+        """The derivatives with respect to all the entries of the parameter vector, as a vector"""
+        return self.gamma*self.model.gradient(x)*math.exp(self.gamma*e)
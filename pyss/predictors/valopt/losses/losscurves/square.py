@@ -12,3 +12,7 @@ class Squarecurve(object):
            error e
         """
         return self.gamma*2*self.model.d_predict_directional(x, i)*e
+
+    def grad_loss(self,e,x):
+        """The derivatives with respect to all the entries of the parameter vector, as a vector"""
+        return self.gamma*2*self.model.gradient(x)*e
@@ -1,4 +1,5 @@
 # encoding: utf-8
+import numpy as np
 
 class L1(object):
 
@@ -14,4 +15,4 @@ class L1(object):
             return -1
 
     def grad_norm(self,w):
-        return [self.d_norm_directional(w, i) for i in range(0,len(w))]
+        return np.sign(w)
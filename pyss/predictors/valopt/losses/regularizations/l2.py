@@ -1,4 +1,5 @@
 # encoding: utf-8
+import numpy as np
 
 class L2(object):
 
@@ -9,4 +10,4 @@ class L2(object):
         return w[i]
 
     def grad_norm(self,w):
-        return w
+        return np.asarray(w)
@@ -16,11 +16,8 @@ class RegularizedLoss(object):
         """Return the derivative of the loss with respect to the i-th entry of the parameter vector of the model"""
         return self.orig_loss.d_loss_directional(x,y,i,w=w,px=px)+self.alpha*self.regularizer.d_norm_directional(self.model.get_param_vector(),i)
 
-    def grad_loss(self,x,y,w=1.0):
-        """Gradient of the loss of the model on example (x,y) """
-        G=self.orig_loss.grad_loss(x,y,w=w)
+    def grad_loss(self,x,y,w=1.0,px=None):
+        """Gradient of the loss of the model on example (x,y), as a vector."""
+        G=self.orig_loss.grad_loss(x,y,w=w,px=px)
         R=self.regularizer.grad_norm(self.model.get_param_vector())
-        l=self.model.dim*[0]
-        for i in range(0,self.model.dim):
-            l[i]=G[i]+self.alpha*R[i]
-        return l
+        return G+self.alpha*R
@@ -9,11 +9,11 @@ class SquaredLoss(object):
         """Return the derivative of the loss with respect to the i-th entry of the parameter vector of the model"""
         return self.model.d_predict_directional(x, i)*(px-y)
 
-    def grad_loss(self,x,y,w=1.0):
+    def grad_loss(self,x,y,w=1.0,px=None):
         """
-        Gradient of the loss of the model on example (x,y)
-        Should be np.array(map(lambda i:d_loss_directional(model, x, i),range(0,len(x))).
-        In the case where this can be optimized, it will be different.
+        Gradient of the loss of the model on example (x,y), as a vector.
+        px is the prediction of the model for x (computed if not given).
         """
-        dif=self.model.predict(x)-y
-        return [dif*self.model.d_predict_directional(x, i) for i in range(0,self.model.dim)]
+        if px is None:
+            px=self.model.predict(x)
+        return self.model.gradient(x)*(px-y)
@@ -1,13 +1,22 @@
+import heapq
+import numpy as np
 import VP_tree
 
 class KNN:
-    def __init__(self,dist,mapper,weight,k):
-        #the list of all instances.
-        self.L=[]
-        #the list of instances not in the vp-tree.
+    """
+    k-nearest neighbours model.
+
+    The instances are indexed with the "logarithmic method": new instances go to a small buffer;
+    when the buffer is full, it is merged with the trees of at most the same size into one new VP-tree.
+    So there are O(log n) trees with geometrically growing sizes and each instance is
+    re-indexed O(log n) times (instead of rebuilding a tree over all the instances).
+    """
+    def __init__(self,dist,mapper,weight,k,buffer_size=256):
+        #the list of instances not in the vp-trees.
         self.l=[]
-        #the vp-tree.
-        self.vpt=None
+        #the vp-trees: list of (instances, vp-tree) with decreasing number of instances.
+        self.trees=[]
+        self.buffer_size=buffer_size
         self.d=dist
         self.k=k
         #The "kernel" takes an instance and a distance.
@@ -15,13 +24,28 @@ class KNN:
         self.weight=weight
 
     def fit(self,x,y):
-        if len(self.l)>3000:
-            self.l.append((x,y))
-            self.L.extend(self.l)
-            self.vpt=VP_tree.VP_tree(self.L,lambda x1,x2:self.d(x1[0],x2[0]))
+        self.l.append((x,y))
+        if len(self.l)>=self.buffer_size:
+            instances=self.l
             self.l=[]
-        else:
-            self.l.append((x,y))
+            while self.trees and len(self.trees[-1][0])<=len(instances):
+                instances=self.trees.pop()[0]+instances
+            self.trees.append((instances,VP_tree.VP_tree(instances,self.instance_dist)))
+
+    def export_state(self):
+        """The stored instances (X, Y), from the oldest to the newest"""
+        instances=[instance for tree_instances,_ in self.trees for instance in tree_instances]+self.l
+        return {"X":np.array([x for x,_ in instances]),"Y":np.array([y for _,y in instances])}
+
+    def import_state(self,state):
+        """Replaces the stored instances with the exported ones"""
+        self.l=[]
+        self.trees=[]
+        for x,y in zip(state["X"].tolist(),state["Y"].tolist()):
+            self.fit(x,y)
+
+    def instance_dist(self,x1,x2):
+        return self.d(x1[0],x2[0])
 
     def predict(self,x):
         kn=self.knearest(x)
@@ -29,42 +53,30 @@ class KNN:
         return sum([self.weight(e[1])*self.mapper(e[0][1]) for e in kn if not e==(1,float("Inf"))])/max(sum([self.weight(e[0][1]) for e in kn if not e==(1,float("Inf"))]),1)
 
     def knearest(self,x):
-        """Returns a list of format [((x,y),distance),..] of size k"""
-        the_nearest=[]
-        if not self.vpt==None:
-            the_nearest.extend(self.find_knearest_in_vptree(x))
-        if not self.l==[]:
-            the_nearest.extend(self.find_knearest_in_buffer(x))
-        return sorted(the_nearest,key=lambda e:e[1])[:self.k-1]
+        """Returns a list of format [((x,y),distance),..] of size k-1 sorted by the distance"""
+        n=self.k-1
+        if n<=0:
+            return []
+        #bounded max-heap of (-distance, -order, (x,y)) with the n nearest instances found so far
+        heap=[]
+        order=0
+        for _,vpt in self.trees:
+            for item,distance in vpt.find([x,1]):
+                if len(heap)==n and distance>=-heap[0][0]:
+                    #the tree yields the instances in order of distance: nothing closer is left
+                    break
+                order+=1
+                self._push_bounded(heap,n,(-distance,-order,item))
+        for item in self.l:
+            distance=self.d(item[0],x)
+            if len(heap)<n or distance<-heap[0][0]:
+                order+=1
+                self._push_bounded(heap,n,(-distance,-order,item))
+        return [(item,-neg_distance) for neg_distance,_,item in sorted(heap,reverse=True)]
 
-    def find_knearest_in_vptree(self,x):
-        """Returns a list of format [((x,y),distance),..] of size k"""
-        knvp=[]
-        i=0
-        for item in self.vpt.find([x,1]):
-            if i<self.k:
-                knvp.append(item)
-            else:
-                break
-            i+=1
-        return knvp
-
-    def find_knearest_in_buffer(self,x):
-        """Returns a list of format [((x,y),distance),..] of size k"""
-        ds=[]
-        maxdist=float("Inf")
-        for i in range(0,len(self.l)):
-            current_dist=self.d(self.l[i][0],x)
-            if maxdist>=current_dist:
-                maxdist=current_dist
-                ds.append((self.l[i],current_dist))
-                ds.sort(key=lambda e:e[1])
-                ds.pop()
-        return ds
-        #ds=[(1,float("Inf"))]*self.k
-        #for i in range(0,len(self.l)):
-            #current_dist=self.dist(self.l[i][0],x)
-            #if max([j[1] for j in ds])>=current_dist:
-                #ds_index_biggest=max(range(len(ds)), key=lambda x:ds[x][1])
-                #ds[ds_index_biggest]=(self.l[i],current_dist)
-        #return ds
+    @staticmethod
+    def _push_bounded(heap,n,entry):
+        if len(heap)<n:
+            heapq.heappush(heap,entry)
+        else:
+            heapq.heapreplace(heap,entry)
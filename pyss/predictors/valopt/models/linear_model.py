@@ -1,28 +1,34 @@
 # encoding: utf-8
-#import copy
+import numpy as np
 
 class LinearModel(object):
 
     def __init__(self, dim, verbose=False):
         """Linear Model, y=<w,x>"""
-        self.w=[0.0]*dim
+        self.w=np.zeros(dim)
         self.dim=dim
 
     def get_param_vector(self):
         """Return a vector representation of the parameters."""
-        #return copy.deepcopy(self.w)
         return self.w
 
     def set_param_vector(self, w):
         """Set the parameter vector to a specific configuration."""
-        self.w=w
+        self.w=np.asarray(w,dtype=np.float64)
 
     def predict(self, x):
         """Return the model prediction for an instance x"""
-        r=0
-        for i in range(0,self.dim):
-            r+=self.w[i]*x[i]
-        return r
+        if self.dim==0:
+            return 0.0
+        #the products are summed in order (np.dot may sum them in a different order)
+        return float(np.cumsum(self.w*np.asarray(x,dtype=np.float64))[-1])
+
+    def predict_batch(self, X):
+        """Return the model predictions for the instances (rows of X)"""
+        X=np.asarray(X,dtype=np.float64)
+        if self.dim==0:
+            return np.zeros(len(X))
+        return np.cumsum(self.w*X,axis=1)[:,-1]
 
     def d_predict_directional(self, x, i):
         """Return the first order directional derivative with regard to the i-th entry of the parameter vector of the model at point x"""
@@ -30,4 +36,4 @@ class LinearModel(object):
 
     def gradient(self, x):
         """Return the gradient of the model with regard to the parameter space at point x"""
-        return x
+        return np.asarray(x,dtype=np.float64)
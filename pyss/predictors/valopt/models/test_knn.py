@@ -0,0 +1,45 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import random
+
+from pyss.predictors.valopt.models.knn import KNN
+
+
+def _dist(x1, x2):
+    return abs(x1[0] - x2[0]) + abs(x1[1] - x2[1])
+
+
+class test_KNN(TestCase):
+
+    def setUp(self):
+        rnd = random.Random(1)
+        self.instances = [((rnd.randint(0, 100), rnd.randint(0, 100)), i) for i in range(1000)]
+        self.queries = [(rnd.randint(0, 100), rnd.randint(0, 100)) for _ in range(50)]
+
+    def _model(self, n_instances):
+        model = KNN(_dist, lambda y: y, lambda d: 1, 8, buffer_size=16)
+        for x, y in self.instances[:n_instances]:
+            model.fit(x, y)
+        return model
+
+    def _brute_force(self, x, n_instances, k):
+        return sorted(_dist(instance[0], x) for instance in self.instances[:n_instances])[:k - 1]
+
+    def test_knearest_matches_brute_force(self):
+        for n_instances in (5, 16, 100, 1000):
+            model = self._model(n_instances)
+            for x in self.queries:
+                self.assertEqual([d for _, d in model.knearest(x)], self._brute_force(x, n_instances, 8))
+
+    def test_trees_have_logarithmic_count(self):
+        model = self._model(1000)
+        sizes = [len(instances) for instances, _ in model.trees]
+        self.assertEqual(sum(sizes) + len(model.l), 1000)
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+        self.assertTrue(len(sizes) <= 6)
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
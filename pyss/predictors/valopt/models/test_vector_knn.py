@@ -0,0 +1,86 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import math
+import random
+
+import numpy as np
+
+from pyss.predictors.valopt.models.vector_knn import VectorKNN
+
+
+WEIGHTS = [0.5, 2.0, 1.0]
+PERIOD = 24
+
+
+def _dist(x1, x2):
+    d2 = 10 * (x1 == x2)
+    for i, w in enumerate(WEIGHTS):
+        diff = abs(x1[i] - x2[i])
+        if i == 2:
+            diff = min(diff % PERIOD, PERIOD - diff % PERIOD)
+        d2 += w * diff * diff
+    return math.sqrt(d2)
+
+
+def _inverse(d):
+    return 1 / np.maximum(0.05, d)
+
+
+class test_VectorKNN(TestCase):
+
+    def setUp(self):
+        rnd = random.Random(1)
+        self.instances = [([rnd.randint(0, 50), rnd.randint(0, 50), rnd.randint(0, 23)], float(i)) for i in range(500)]
+        self.queries = [[rnd.randint(0, 50), rnd.randint(0, 50), rnd.randint(0, 23)] for _ in range(30)]
+        self.queries.append(self.instances[7][0])
+
+    def _model(self, **kwargs):
+        model = VectorKNN(WEIGHTS, lambda y: y, _inverse, 6, circular={2: PERIOD}, same_weight=10, block_size=64, **kwargs)
+        for x, y in self.instances:
+            model.fit(x, y)
+        return model
+
+    def test_knearest_matches_brute_force(self):
+        model = self._model()
+        for x in self.queries:
+            d, _ = model.knearest(x)
+            expected = sorted(_dist(instance[0], x) for instance in self.instances)[:5]
+            np.testing.assert_allclose(d, expected, rtol=1e-6)
+
+    def test_window_keeps_last_instances(self):
+        model = self._model(window=100)
+        self.assertEqual(model.n, 100)
+        self.assertEqual(sorted(model.Y.tolist()), [float(i) for i in range(400, 500)])
+        for x in self.queries:
+            d, _ = model.knearest(x)
+            expected = sorted(_dist(instance[0], x) for instance in self.instances[400:])[:5]
+            np.testing.assert_allclose(d, expected, rtol=1e-6)
+
+    def test_predict_batch_matches_predict(self):
+        # small max_batch_elements, so the queries are split in several chunks
+        model = self._model(max_batch_elements=1000)
+        expected = [model.predict(x) for x in self.queries]
+        self.assertEqual(model.predict_batch(np.array(self.queries)).tolist(), expected)
+
+    def test_exported_instances_restore_the_model(self):
+        model = self._model(window=100)
+        restored = VectorKNN(WEIGHTS, lambda y: y, _inverse, 6, circular={2: PERIOD}, same_weight=10, block_size=64,
+                             window=100)
+        restored.import_state(model.export_state())
+        self.assertEqual(model.export_state()['Y'].tolist(), [float(i) for i in range(400, 500)])
+        # the oldest instances are replaced first in both models
+        for i, x in enumerate(self.queries):
+            model.fit(x, 1000.0 + i)
+            restored.fit(x, 1000.0 + i)
+        for x in self.queries:
+            self.assertEqual(restored.predict(x), model.predict(x))
+
+    def test_empty_model_predicts_zero(self):
+        model = VectorKNN(WEIGHTS, lambda y: y, _inverse, 6)
+        self.assertEqual(model.predict([1, 2, 3]), 0)
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
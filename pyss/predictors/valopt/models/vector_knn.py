@@ -0,0 +1,171 @@
+import numpy as np
+
+class VectorKNN(object):
+    """
+    k-nearest neighbours model for fixed-size feature vectors with a weighted Euclidean distance:
+
+        d(x,y)^2 = sum_i weights[i]*diff_i^2 + same_weight*(x==y)
+
+    where diff_i is x[i]-y[i], or the distance around the circle for the circular features
+    (features that are taken modulo a period, e.g., the time of the day).
+
+    The instances are stored in a float32 matrix and the distances to a query are computed
+    with NumPy, block by block. If window is set, only the last window instances are kept.
+
+    Predictions are computed as in KNN (with mapper and weight applied to arrays).
+    """
+    def __init__(self,weights,mapper,weight,k,circular=None,same_weight=0,window=None,block_size=16384,
+                 max_batch_elements=1<<22):
+        """
+        :param weights: the weight of each feature
+        :param circular: dictionary {feature index: period}
+        :param same_weight: the squared distance added when the vectors are equal
+        :param max_batch_elements: the maximal size of the differences computed at once by predict_batch
+        """
+        self.weights=np.array(weights,dtype=np.float64)
+        self.dim=len(weights)
+        self.circular=sorted((circular or {}).items())
+        self.same_weight=same_weight
+        self.mapper=mapper
+        self.weight=weight
+        self.k=k
+        self.window=window
+        self.block_size=block_size
+        self.max_batch_elements=max_batch_elements
+        capacity=16 if window is None else min(16,window)
+        self.X=np.zeros((capacity,self.dim),dtype=np.float32)
+        self.Y=np.zeros(capacity,dtype=np.float64)
+        #number of stored instances and the row for the next one
+        self.n=0
+        self.next_row=0
+
+    def fit(self,x,y):
+        if self.next_row==len(self.X):
+            if self.window is not None and len(self.X)==self.window:
+                #overwrite the oldest instances
+                self.next_row=0
+            else:
+                self._grow()
+        self.X[self.next_row]=x
+        self.Y[self.next_row]=y
+        self.next_row+=1
+        self.n=max(self.n,self.next_row)
+
+    def _grow(self):
+        capacity=2*len(self.X)
+        if self.window is not None:
+            capacity=min(capacity,self.window)
+        X=np.zeros((capacity,self.dim),dtype=np.float32)
+        X[:self.n]=self.X[:self.n]
+        Y=np.zeros(capacity,dtype=np.float64)
+        Y[:self.n]=self.Y[:self.n]
+        self.X=X
+        self.Y=Y
+
+    def export_state(self):
+        """The stored instances (X, Y), from the oldest to the newest"""
+        order=np.arange(self.n)
+        if self.n==len(self.X) and self.next_row<self.n:
+            #the window is full: the oldest instance is at next_row
+            order=np.roll(order,-self.next_row)
+        return {"X":self.X[order],"Y":self.Y[order]}
+
+    def import_state(self,state):
+        """Replaces the stored instances with the exported ones"""
+        X=np.asarray(state["X"],dtype=np.float32).reshape(-1,self.dim)
+        Y=np.asarray(state["Y"],dtype=np.float64)
+        if self.window is not None:
+            X=X[-self.window:]
+            Y=Y[-self.window:]
+        capacity=max(len(X),16 if self.window is None else min(16,self.window))
+        self.X=np.zeros((capacity,self.dim),dtype=np.float32)
+        self.Y=np.zeros(capacity,dtype=np.float64)
+        self.X[:len(X)]=X
+        self.Y[:len(Y)]=Y
+        self.n=self.next_row=len(X)
+
+    def distances(self,x,X):
+        """
+        Distances from x to each row of X.
+        x may also be a matrix of queries (one per row): then the result is a matrix (query, row of X).
+        """
+        if x.ndim==2:
+            diff=X[np.newaxis,:,:]-x[:,np.newaxis,:]
+        else:
+            diff=X-x
+        for i,period in self.circular:
+            d=np.abs(diff[...,i])%period
+            diff[...,i]=np.minimum(d,period-d)
+        #einsum sums each row in the same way whatever the number of rows (unlike np.dot),
+        #so a distance does not depend on the number of queries
+        d2=np.einsum("...j,j->...",diff*diff,self.weights)
+        if self.same_weight:
+            d2+=self.same_weight*np.all(diff==0,axis=-1)
+        return np.sqrt(d2)
+
+    def knearest(self,x):
+        """Returns (distances, ys) of the k-1 nearest instances sorted by the distance"""
+        n_nearest=min(self.k-1,self.n)
+        if n_nearest<=0:
+            return np.zeros(0),np.zeros(0)
+        x=np.asarray(x,dtype=np.float32)
+        best_d=np.zeros(0)
+        best_i=np.zeros(0,dtype=np.int64)
+        for start in xrange(0,self.n,self.block_size):
+            d=self.distances(x,self.X[start:min(start+self.block_size,self.n)])
+            if len(d)>n_nearest:
+                nearest=np.argpartition(d,n_nearest-1)[:n_nearest]
+            else:
+                nearest=np.arange(len(d))
+            best_d=np.concatenate((best_d,d[nearest]))
+            best_i=np.concatenate((best_i,nearest+start))
+            if len(best_d)>n_nearest:
+                nearest=np.argpartition(best_d,n_nearest-1)[:n_nearest]
+                best_d=best_d[nearest]
+                best_i=best_i[nearest]
+        #sort by the distance, then by the row
+        order=np.lexsort((best_i,best_d))
+        return best_d[order],self.Y[best_i[order]]
+
+    def knearest_batch(self,Q):
+        """
+        Same as knearest for each row of Q: returns (distances, ys) matrices (one row per query).
+        The instances are processed in the same blocks as in knearest, so the results are identical.
+        """
+        n_nearest=min(self.k-1,self.n)
+        if n_nearest<=0:
+            return np.zeros((len(Q),0)),np.zeros((len(Q),0))
+        Q=np.asarray(Q,dtype=np.float32)
+        rows=np.arange(len(Q))[:,np.newaxis]
+        best_d=np.zeros((len(Q),0))
+        best_i=np.zeros((len(Q),0),dtype=np.int64)
+        for start in xrange(0,self.n,self.block_size):
+            d=self.distances(Q,self.X[start:min(start+self.block_size,self.n)])
+            if d.shape[1]>n_nearest:
+                nearest=np.argpartition(d,n_nearest-1,axis=1)[:,:n_nearest]
+            else:
+                nearest=np.tile(np.arange(d.shape[1]),(len(Q),1))
+            best_d=np.concatenate((best_d,d[rows,nearest]),axis=1)
+            best_i=np.concatenate((best_i,nearest+start),axis=1)
+            if best_d.shape[1]>n_nearest:
+                nearest=np.argpartition(best_d,n_nearest-1,axis=1)[:,:n_nearest]
+                best_d=best_d[rows,nearest]
+                best_i=best_i[rows,nearest]
+        #sort by the distance, then by the row
+        order=np.array([np.lexsort((best_i[q],best_d[q])) for q in xrange(len(Q))])
+        return best_d[rows,order],self.Y[best_i[rows,order]]
+
+    def predict(self,x):
+        d,y=self.knearest(x)
+        #simple averaging.
+        return np.sum(self.weight(d)*self.mapper(y))/max(np.sum(self.weight(y)),1)
+
+    def predict_batch(self,Q):
+        """Same as predict for each row of Q (the queries are processed in chunks to bound the memory)"""
+        predictions=np.zeros(len(Q))
+        chunk=max(1,self.max_batch_elements//(max(1,min(self.n,self.block_size))*self.dim))
+        for start in xrange(0,len(Q),chunk):
+            d,y=self.knearest_batch(Q[start:start+chunk])
+            predictions[start:start+chunk]=(np.sum(self.weight(d)*self.mapper(y),axis=1)
+                                            /np.maximum(np.sum(self.weight(y),axis=1),1))
+        return predictions
@@ -0,0 +1,234 @@
+"""
+Weighted order-statistics tree with exponential decay of the weights.
+
+Used by the records of PredictorTopPercent and PredictorConditionalPercent.
+
+The keys are kept in a treap (a binary search tree by key and a heap by priority)
+with the total weight of each subtree, so the weighted quantiles are found in O(log n).
+The decay is lazy: the weights are stored divided by a global scale factor,
+which is the only thing updated when the weights decay.
+
+The tree is pickled as arrays of its keys, weights and subtree totals (in the key order):
+the shape of a treap depends only on the priorities, so it is rebuilt exactly.
+"""
+
+import numpy as np
+
+# the stored weights are rescaled when the global scale factor gets below this value
+MIN_SCALE = 1e-150
+
+
+class _Node(object):
+    __slots__ = ('key', 'weight', 'total', 'priority', 'left', 'right')
+
+    def __init__(self, key, weight):
+        self.key = key
+        self.weight = weight
+        self.total = weight
+        # deterministic pseudo-random priority, so the shape of the tree (and the rounding) does not vary between runs
+        self.priority = (hash(key) * 2654435761) & 0xffffffff
+        self.left = None
+        self.right = None
+
+
+def _total(node):
+    return node.total if node is not None else 0
+
+
+def _rotate_right(node):
+    left = node.left
+    node.left = left.right
+    left.right = node
+    node.total = node.weight + _total(node.left) + _total(node.right)
+    left.total = left.weight + _total(left.left) + node.total
+    return left
+
+
+def _rotate_left(node):
+    right = node.right
+    node.right = right.left
+    right.left = node
+    node.total = node.weight + _total(node.left) + _total(node.right)
+    right.total = right.weight + node.total + _total(right.right)
+    return right
+
+
+def _insert(node, key, weight):
+    """Adds weight to key in the subtree; returns the new root of the subtree"""
+    if node is None:
+        return _Node(key, weight)
+    node.total += weight
+    if key == node.key:
+        node.weight += weight
+    elif key < node.key:
+        node.left = _insert(node.left, key, weight)
+        if node.left.priority > node.priority:
+            node = _rotate_right(node)
+    else:
+        node.right = _insert(node.right, key, weight)
+        if node.right.priority > node.priority:
+            node = _rotate_left(node)
+    return node
+
+
+def _in_order(node, nodes):
+    """Appends the nodes of the subtree to the list (in the key order)"""
+    stack = []
+    while stack or node is not None:
+        if node is not None:
+            stack.append(node)
+            node = node.left
+        else:
+            node = stack.pop()
+            nodes.append(node)
+            node = node.right
+
+
+def _scale(node, factor):
+    """Multiplies all the weights in the subtree by factor"""
+    if node is None:
+        return
+    node.weight *= factor
+    _scale(node.left, factor)
+    _scale(node.right, factor)
+    node.total = node.weight + _total(node.left) + _total(node.right)
+
+
+class WeightTree(object):
+
+    def __init__(self):
+        self.root = None
+        self.scale = 1.0
+
+    def __getstate__(self):
+        nodes = []
+        _in_order(self.root, nodes)
+        return {
+            'keys': np.array([node.key for node in nodes]),
+            'weights': np.array([node.weight for node in nodes], dtype=np.float64),
+            'totals': np.array([node.total for node in nodes], dtype=np.float64),
+            'scale': self.scale,
+        }
+
+    def __setstate__(self, state):
+        self.scale = state['scale']
+        self.root = None
+        keys = state['keys'].tolist()
+        for key in keys:
+            self.root = _insert(self.root, key, 0)
+        nodes = []
+        _in_order(self.root, nodes)
+        for node, weight, total in zip(nodes, state['weights'].tolist(), state['totals'].tolist()):
+            node.weight = weight
+            node.total = total
+
+    def add(self, key, weight):
+        """Adds weight to the key (the key is inserted if needed)"""
+        weight = weight / self.scale
+        node = self.root
+        while node is not None and node.key != key:
+            node = node.left if key < node.key else node.right
+        if node is None:
+            self.root = _insert(self.root, key, weight)
+            return
+        # the key is present: the shape of the tree does not change
+        node = self.root
+        while node.key != key:
+            node.total += weight
+            node = node.left if key < node.key else node.right
+        node.total += weight
+        node.weight += weight
+
+    def decay(self, factor):
+        """Multiplies all the weights by factor"""
+        self.scale *= factor
+        if self.scale < MIN_SCALE:
+            _scale(self.root, self.scale)
+            self.scale = 1.0
+
+    def total(self):
+        return _total(self.root) * self.scale
+
+    def weight_upto(self, key):
+        """The total weight of the keys no greater than key"""
+        return self._stored_weight_upto(key) * self.scale
+
+    def _stored_weight_upto(self, key):
+        weight = 0
+        node = self.root
+        while node is not None:
+            if node.key <= key:
+                weight += _total(node.left) + node.weight
+                node = node.right
+            else:
+                node = node.left
+        return weight
+
+    def first_over(self, weight, above=None):
+        """
+        The smallest key such that the total weight of the keys up to it (and greater than 'above', if given)
+        is over 'weight'; None if there is no such key.
+        """
+        target = weight / self.scale
+        if above is not None:
+            target += self._stored_weight_upto(above)
+        accumulated = 0
+        # the node whose left subtree is searched: the answer if the sums of the subtree
+        # are rounded under the target (only the keys up to 'above' are there)
+        found = None
+        node = self.root
+        while node is not None:
+            left = node.left
+            left_weight = accumulated + left.total if left is not None else accumulated
+            if above is not None and node.key <= above:
+                accumulated = left_weight + node.weight
+                node = node.right
+            elif left is not None and left_weight > target:
+                found = node.key
+                node = node.left
+            elif left_weight + node.weight > target:
+                return node.key
+            else:
+                accumulated = left_weight + node.weight
+                node = node.right
+        return found
+
+    def next_key(self, key):
+        """The smallest key greater than key; None if there is no such key"""
+        next_key = None
+        node = self.root
+        while node is not None:
+            if node.key > key:
+                next_key = node.key
+                node = node.left
+            else:
+                node = node.right
+        return next_key
+
+    def previous_key(self, key):
+        """The greatest key smaller than key; None if there is no such key"""
+        previous_key = None
+        node = self.root
+        while node is not None:
+            if node.key < key:
+                previous_key = node.key
+                node = node.right
+            else:
+                node = node.left
+        return previous_key
+
+    def max_key(self):
+        node = self.root
+        if node is None:
+            return None
+        while node.right is not None:
+            node = node.right
+        return node.key
+
+    def min_key(self):
+        node = self.root
+        if node is None:
+            return None
+        while node.left is not None:
+            node = node.left
+        return node.key
@@ -4,48 +4,104 @@
 Run the PySS Simulator. You should specify a config file, an enforce input and output swfs over that via commandline if you so desire.
 
 Usage:
-    run_simulator.py <swf_file> <config_file> <output_file> [-i] [-v] [--withprogress=<seconds>]
+    run_simulator.py <swf_file> <config_file> <output_file> [-i] [-v] [--withprogress=<seconds>] [--profile-startup]
 
 Options:
     -h --help                                      Show this help message and exit.
     -v --verbose                                   Be verbose.
     -i --interactive                               Interactive mode at key points in script.
     --withprogress=<seconds>                       Force to set progress_freq option
+    --profile-startup                              Print the times of the imports and of the startup phases (to stderr)
 '''
 from __future__ import print_function
 
 import context
 
-from base.docopt import docopt
 import sys
 
-if __debug__:
-    import warnings
-    #warnings.warn("Running in debug mode, this will be slow... try 'python2.4 -O %s'" % sys.argv[0])
+if __name__ == "__main__" and "--profile-startup" in sys.argv:
+  # started before the other imports to time them too
+  from base.startup_profile import StartupProfiler
+  startup_profiler = StartupProfiler()
+  startup_profiler.start()
+else:
+  startup_profiler = None
+
+from base.docopt import docopt
+import gzip
+import os
 
+from base.startup_profile import phase
 from base.workload_parser import parse_lines
 from base.prototype import _job_inputs_to_jobs
+from base.workload_generator import WORKLOAD_EXTENSION, WorkloadModel, generate_jobs
 import schedulers.simulator as simulator
-from schedulers.common import module_to_class
-import optparse
-import schedulers.common_correctors
+from config_schema import ConfigError, SCHEDULERS, load_config_file, validate
 
 from datetime import datetime
 
 
-def parse_and_run_simulator(options, exception):
+def _open_input(filename):
+  # (the traces are often kept compressed)
+  return gzip.open(filename) if filename.endswith('.gz') else open(filename)
+
+
+def parse_and_run_simulator(options, exception, trace=None, fork_at=None, branches=None, max_processes=None,
+                            profiler=None):
+  """
+  The modules of the scheduler and of the predictor (and their dependencies) are imported here, when they are used.
+  :param trace: the jobs of the input file already parsed (a predictors.replay.Trace, e.g. loaded from
+                the shared trace file of a batch); the input file is then not read
+  If the input file is a synthetic workload (a ".workload" file, see base.workload_generator), the jobs are generated
+  during the simulation (they are streamed into the simulator) and the machine is the one of the workload.
+  :param branches: if given, the simulation runs until the time fork_at and then continues in a forked process
+                   per branch, with at most max_processes branches at the same time
+                   (see schedulers.simulator.fork_simulator); the exit codes of the branches are returned
+  :param profiler: a base.startup_profile.StartupProfiler; it is stopped and reported before the simulation starts
+  """
 
   if "input_file" not in options:
     raise exception("missing input file")
 
+  try:
+    with phase(profiler, "validation"):
+      validate(options)
+  except ConfigError as e:
+    raise exception(str(e))
 
-  if options["input_file"] == "-":
+  if options.get("snapshot_freq", 0) and os.path.isfile(options["output_swf"] + ".snapshot"):
+    print("..resuming simulation from the snapshot..")
+    starttime = datetime.today()
+    simulator.resume_simulator(options["output_swf"] + ".snapshot", no_stats=not options.get("stats", False))
+    print("\n")
+    print("Elapsed Time:", datetime.today() - starttime)
+    return
+
+
+  model = None
+  if trace is None and options["input_file"].endswith(WORKLOAD_EXTENSION):
+    try:
+      model = WorkloadModel.from_file(options["input_file"])
+    except (ConfigError, ValueError) as e:
+      raise exception("invalid workload {}: {}".format(options["input_file"], e))
+    input_file = None
+    if "num_processors" not in options:
+      options["num_processors"] = model.num_processors
+    elif options["num_processors"] != model.num_processors:
+      raise exception("the workload is generated for another number of processors")
+  elif trace is not None:
+    input_file = None
+    if "num_processors" not in options:
+      options["num_processors"] = trace.num_processors
+    elif options["num_processors"] != trace.num_processors:
+      raise exception("the trace was parsed for another number of processors")
+  elif options["input_file"] == "-":
     input_file = sys.stdin
   else:
-    input_file = open(options["input_file"])
+    input_file = _open_input(options["input_file"])
 
   if "num_processors" not in options:
-    input_file = open(options["input_file"])
+    input_file = _open_input(options["input_file"])
     for line in input_file:
       if(line.lstrip().startswith(';')):
         if(line.lstrip().startswith('; MaxProcs:')):
@@ -60,6 +116,10 @@ def parse_and_run_simulator(options, exception):
 
   if "stats" not in options:
     options["stats"] = False
+  if model is not None and options["stats"]:
+    # the statistics need all the terminated jobs (and the schedulers would archive all the slices)
+    print("WARNING: the statistics are not computed for synthetic workloads; stats are disabled")
+    options["stats"] = False
 
   if "progressbar" not in options["scheduler"]:
     if sys.stdout.isatty():# You're running in a real terminal
@@ -67,47 +127,37 @@ def parse_and_run_simulator(options, exception):
     else:# You're being piped or redirected
       options["scheduler"]["progressbar"] = False
 
-  if "scheduler"  not in options:
-    raise exception("missing scheduler")
-
-  if "name" not in options["scheduler"]:
-    raise exception("missing scheduler name")
-
-
-
-
-  my_module = options["scheduler"]["name"]
-  my_class = module_to_class(my_module)
-
-  #load module(or file)
-  package = __import__ ('schedulers', fromlist=[my_module])
-  if my_module not in package.__dict__:
-    print("No such scheduler (module file not found).")
-    print(package.__dict__.keys())
-    return
-  if my_class not in package.__dict__[my_module].__dict__:
-    print("No such scheduler (class within the module file not found).")
-    return
-  #load the class
-  scheduler_non_instancied = package.__dict__[my_module].__dict__[my_class]
-
-  scheduler = scheduler_non_instancied(options)
+  with phase(profiler, "scheduler"):
+    scheduler = SCHEDULERS.get(options["scheduler"]["name"])(options)
 
 
   #if hasattr(scheduler_non_instancied, 'I_NEED_A_PREDICTOR'):
 
+  if model is not None:
+    jobs = generate_jobs(model)
+  elif trace is not None:
+    jobs = trace.jobs()
+  else:
+    jobs = _job_inputs_to_jobs(parse_lines(input_file), options["num_processors"])
+
   try:
-    print("..starting simulations..")
     starttime = datetime.today()
-    simulator.run_simulator(
-      num_processors = options["num_processors"],
-      jobs = _job_inputs_to_jobs(parse_lines(input_file), options["num_processors"]),
-      scheduler = scheduler,
-      output_swf = options["output_swf"],
-      input_file = options["input_file"],
-      no_stats = not(options["stats"]),
-      options = options
-      )
+    with phase(profiler, "code version"):
+      simulator.code_version()
+    with phase(profiler, "jobs and simulator"):
+      the_simulator = simulator.Simulator(jobs, options["num_processors"], scheduler, options["output_swf"],
+                                          options["input_file"], options, stream=model is not None)
+    if profiler is not None:
+      profiler.stop()
+      profiler.report()
+    print("..starting simulations..")
+    codes = None
+    if branches is None:
+      the_simulator.run()
+      simulator.finish_simulation(the_simulator, no_stats = not(options["stats"]))
+    else:
+      codes = simulator.fork_simulator(the_simulator, fork_at, branches, no_stats = not(options["stats"]),
+                                       max_processes = max_processes)
     # Finishing up
     print("\n")
     print("Num of Processors: ", options["num_processors"])
@@ -115,23 +165,22 @@ def parse_and_run_simulator(options, exception):
     print("Scheduler:", type(scheduler))
 
     print("Elapsed Time:", datetime.today() - starttime)
+    return codes
 
   finally:
-    if input_file is not sys.stdin:
+    if input_file is not None and input_file is not sys.stdin:
       input_file.close()
 
 
-def run_simulator(input_file, config_file, output_file, exception, withprogress=0):
-  config = {}
-  execfile(config_file, config)
-  del config['__builtins__']
+def run_simulator(input_file, config_file, output_file, exception, withprogress=0, profiler=None):
+  with phase(profiler, "configuration"):
+    config = load_config_file(config_file)
   config["input_file"] = input_file
   config["output_swf"] = output_file
-  # python 3: exec(open("example.conf").read(), config)
   if withprogress:
     config['scheduler']['progressfile_freq'] = int(withprogress)
   # parse_and_run_simulator(config)
-  parse_and_run_simulator(config, exception)
+  parse_and_run_simulator(config, exception, profiler=profiler)
 
 
 if __name__ == "__main__":
@@ -143,5 +192,5 @@ if __name__ == "__main__":
   config_file_ = arguments["<config_file>"]
   input_file_ = arguments["<swf_file>"]
   withprogress = arguments["--withprogress"]
-  run_simulator(input_file_, config_file_, output_file_, exception, withprogress)
+  run_simulator(input_file_, config_file_, output_file_, exception, withprogress, startup_profiler)
 
@@ -1,3 +1,27 @@
 #!/bin/bash
 python2 base/test_prototype.py $*
 PYTHONPATH=.:$PYTHONPATH python2 schedulers/tests.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 schedulers/comod20/test_plan_cache.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 schedulers/comod20/test_journal.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 base/test_snapshot.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 base/test_startup_profile.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 base/test_workload_generator.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 schedulers/test_fork.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 schedulers/test_event_profile.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 schedulers/test_large_machine.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 schedulers/comod20/test_telemetry.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 schedulers/comod20/test_plan.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 predictors/valopt/models/test_knn.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 predictors/valopt/models/test_vector_knn.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 predictors/valopt/algos/test_nag.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 predictors/job_req_pred_2020/test_predictor_complete.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 predictors/test_predictor_conditional_percent.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 predictors/test_predictor_top_percent.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 predictors/test_replay.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 predictors/test_predictor_state.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 predictors/test_predict_batch.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 test_config_schema.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 ../bin/test_batch.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 ../bin/test_distributed.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 ../bin/test_run_sweep.py $*
+PYTHONPATH=..:.:$PYTHONPATH python2 ../benchmarks/test_suite.py $*
@@ -14,7 +14,8 @@ scheduler = {
 	#Choose between: "+str(schedulers.common_correctors.correctors_list())
 	'corrector': {"name":None, "option1":"foo"},
 
-	"more_option":"foo"
+	#The other options of the scheduler (see SCHEDULER_COMPONENT_OPTIONS in config_schema.py), e.g.:
+	#"progressbar":False,
 	}
 
 #Force the number of available processors in the simulated parallel machine
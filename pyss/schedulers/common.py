@@ -11,11 +11,24 @@ def list_print(my_list):
     print()
 
 
-def module_to_class(module):
+from config_schema import module_to_class, PREDICTORS
+
+
+def load_predictor(options):
     """
-	transform foo_bar to FooBar
-	"""
-    return ''.join(w.title() for w in str.split(str(module), "_"))
+    Creates the predictor described by options["scheduler"]["predictor"]
+    (warm-started from the state file options["scheduler"]["predictor"]["warm_start"], if set)
+    """
+    if options["scheduler"]["predictor"] is None:
+        raise Exception("missing predictor")
+    if options["scheduler"]["predictor"]["name"] is None:
+        raise Exception("missing predictor name")
+
+    predictor = PREDICTORS.get(options["scheduler"]["predictor"]["name"])(options)
+    if options["scheduler"]["predictor"].get("warm_start"):
+        from predictors.predictor_state import load_state
+        load_state(predictor, options["scheduler"]["predictor"]["warm_start"])
+    return predictor
 
 
 class Scheduler(object):
@@ -25,25 +38,24 @@ class Scheduler(object):
 
     def __init__(self, options):
         self.num_processors = options["num_processors"]
+        # large machines: the schedulers avoid the structures that grow with the number of processors
+        # (see CountingCpuTimeSlice)
+        self.large_machine = options.get("large_machine", False)
 
     def init_predictor(self, options):
+        self.predictor = load_predictor(options)
 
-        if options["scheduler"]["predictor"] is None:
-            raise Exception("missing predictor")
-        if options["scheduler"]["predictor"]["name"] is None:
-            raise Exception("missing predictor name")
-
-        my_module = options["scheduler"]["predictor"]["name"]
-
-        my_class = module_to_class(my_module)
-        package = __import__('predictors', fromlist=[my_module])
-        if my_module not in package.__dict__:
-            raise Exception("No such predictor (module '" + my_module + "' file not found).")
-        if my_class not in package.__dict__[my_module].__dict__:
-            raise Exception(
-                "No such predictor (class '" + my_class + "' within the module '" + my_module + "' file not found).")
-        # load the class
-        self.predictor = package.__dict__[my_module].__dict__[my_class](options)
+    def predict_jobs(self, jobs, current_time):
+        """
+        Updates the predictions of the jobs,
+        in one call if the predictor supports batch prediction (predict_batch).
+        """
+        predict_batch = getattr(self.predictor, "predict_batch", None)
+        if predict_batch is not None:
+            predict_batch(jobs, current_time, self.running_jobs)
+        else:
+            for job in jobs:
+                self.predictor.predict(job, current_time, self.running_jobs)
 
     def init_corrector(self, options):
         if options["scheduler"]["corrector"] is None:
@@ -65,6 +77,28 @@ class Scheduler(object):
     def new_events_on_job_termination(self, job, current_time):
         raise NotImplementedError()
 
+    def finish(self):
+        """
+        Called when the simulation ends (see simulator.finish_simulation):
+        the scheduler closes the files it keeps open during the simulation.
+        """
+        pass
+
+    def flush(self):
+        """
+        Called before the simulation is forked (see simulator.fork_simulator):
+        the scheduler writes the buffered data of the files it keeps open,
+        so that the forked processes do not write it again.
+        """
+        pass
+
+    def branch(self, output_swf):
+        """
+        Called when the simulation continues with another output file (see Simulator.branch):
+        the scheduler continues the files it writes next to the output under the new name.
+        """
+        pass
+
 
 class CpuTimeSlice(object):
     """
@@ -117,11 +151,18 @@ class CpuTimeSlice(object):
         self.free_processors += job.num_required_processors
         self.job_ids.remove(job.id)
 
+    def __getstate__(self):
+        # the links are restored by CpuSnapshot (pickling a long linked list exceeds the recursion limit)
+        state = self.__dict__.copy()
+        state.pop('list_prev', None)
+        state.pop('list_next', None)
+        return state
+
     def __str__(self):
         return '%d %d %d %s' % (self.start_time, self.duration, self.free_processors, self.job_ids)
 
     def quick_copy(self):  # copy the slice without the set of job_ids
-        result = CpuTimeSlice(
+        result = self.__class__(
             free_processors=self.free_processors,
             start_time=self.start_time,
             duration=self.duration,
@@ -152,6 +193,30 @@ class CpuTimeSlice(object):
         return first, second
 
 
+class CountingCpuTimeSlice(CpuTimeSlice):
+    """
+    A slice for large machines: only the number of the free processors is kept (job_ids is None).
+    The consecutive slices with the same number of free processors are unified (see CpuSnapshot.unify_slices),
+    so the snapshot is a run-length encoding of the free processors over time, and its size depends on the number
+    of the distinct changes of the free processors rather than on the jobs.
+    """
+
+    def __init__(self, free_processors, start_time, duration, total_processors):
+        super(CountingCpuTimeSlice, self).__init__(free_processors, start_time, duration, total_processors)
+        self.job_ids = None
+
+    def addJob(self, job):
+        pass  # assert job.num_required_processors <= self.free_processors, job
+        self.free_processors -= job.num_required_processors
+
+    def delJob(self, job):
+        pass  # assert job.num_required_processors <= self.busy_processors, job
+        self.free_processors += job.num_required_processors
+
+    def copy(self):
+        return self.quick_copy()
+
+
 class CpuTimeSliceList:
 
     def __init__(self, obj):
@@ -167,13 +232,39 @@ class CpuSnapshot(object):
     """
 
     # Assumption: the snapshot always has at least one slice
-    def __init__(self, total_processors, archive_snapshots):
+    def __init__(self, total_processors, archive_snapshots, large_machine=False):
+        """
+        :param large_machine: if True, the slices do not keep the ids of their jobs (see CountingCpuTimeSlice)
+                              and jobs_at is not available
+        """
         self.total_processors = total_processors
+        self.large_machine = large_machine
+        self.slice_class = CountingCpuTimeSlice if large_machine else CpuTimeSlice
         self.slices = CpuTimeSliceList(
-            CpuTimeSlice(self.total_processors, start_time=0, duration=1000, total_processors=total_processors))
+            self.slice_class(self.total_processors, start_time=0, duration=1000, total_processors=total_processors))
         self.archive_of_old_slices = []
         self.archive_snapshots = archive_snapshots
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        slices = []
+        s = self.slices.first
+        while s != None:
+            slices.append(s)
+            s = s.list_next
+        state['slices'] = slices
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        slices = state['slices']
+        self.slices = CpuTimeSliceList(slices[0])
+        for s in slices[1:]:
+            self.slices.last.list_next = s
+            s.list_prev = self.slices.last
+            s.list_next = None
+            self.slices.last = s
+
     @property
     def snapshot_end_time(self):
         pass  # assert len(self.slices) > 0
@@ -244,7 +335,7 @@ class CpuSnapshot(object):
         return False  # no slice found
 
     def _append_time_slice(self, free_processors, duration):
-        obj = CpuTimeSlice(free_processors, self.snapshot_end_time, duration, self.total_processors)
+        obj = self.slice_class(free_processors, self.snapshot_end_time, duration, self.total_processors)
         self.slices.last.list_next = obj
         obj.list_next = None
         obj.list_prev = self.slices.last
@@ -259,6 +350,8 @@ class CpuSnapshot(object):
         return self.total_processors
 
     def jobs_at(self, time):
+        if self.large_machine:
+            raise Exception("jobs_at is not available for a large machine (the slices do not keep their jobs)")
         cur_slice = self.slices.first
         while cur_slice != None:
             if cur_slice.start_time <= time < cur_slice.end_time:
@@ -370,6 +463,16 @@ class CpuSnapshot(object):
                 yield s
             s = s.list_next
 
+    def _job_slices(self, start, end):
+        """
+        The slices of a job that is in the snapshot from start to end.
+        The slices of a large machine may have been unified across the start or the end of the job: they are split again.
+        """
+        if self.large_machine:
+            self._ensure_a_slice_starts_at(start)
+            self._ensure_a_slice_starts_at(end)
+        return self._slices_time_range(start, end)
+
     def delJobFromCpuSlices(self, job):
         """
         Deletes an _entire_ job from the slices.
@@ -377,7 +480,7 @@ class CpuSnapshot(object):
         nothing is archived!
         DEPRECATED: see unAssignJob
         """
-        for s in self._slices_time_range(job.start_to_run_at_time, job.predicted_finish_time):
+        for s in self._job_slices(job.start_to_run_at_time, job.predicted_finish_time):
             s.delJob(job)
 
     def delTailofJobFromCpuSlices(self, job):
@@ -388,7 +491,7 @@ class CpuSnapshot(object):
         the point from which the tail of the job starts.
         Assumptions: job is assigned to successive slices.  
         """
-        for s in self._slices_time_range(job.finish_time, job.predicted_finish_time):
+        for s in self._job_slices(job.finish_time, job.predicted_finish_time):
             s.delJob(job)
 
     def assignTailofJobToTheCpuSlices(self, job, new_predicted_run_time):
@@ -399,14 +502,14 @@ class CpuSnapshot(object):
         pass  # assert isinstance(new_predicted_run_time, int)
         job_estimated_finish_time = job.start_to_run_at_time + new_predicted_run_time
         self._ensure_a_slice_starts_at(job_estimated_finish_time)
-        for s in self._slices_time_range(job.predicted_finish_time, job_estimated_finish_time):
+        for s in self._job_slices(job.predicted_finish_time, job_estimated_finish_time):
             s.addJob(job)
 
     def unAssignJob(self, job):
         """
         unAssigns a job previously assigned.
         """
-        for s in self._slices_time_range(job.start_to_run_at_time, job.predicted_finish_time):
+        for s in self._job_slices(job.start_to_run_at_time, job.predicted_finish_time):
             s.delJob(job)
 
     def assignJob(self, job, job_start):
@@ -485,17 +588,26 @@ class CpuSnapshot(object):
             s = s.list_next
         print()
 
-    def copy(self):
-        assert "NOT YET UPDATED"
-        result = CpuSnapshot(self.total_processors, self.archive_snapshots)
-        result.slices = [slice.copy() for slice in self.slices]
+    def _copy_slices(self, copy_method):
+        """A snapshot with a copy of the current slices (not of the archived ones), made by their method copy_method"""
+        result = CpuSnapshot(self.total_processors, self.archive_snapshots, self.large_machine)
+        s = self.slices.first
+        result.slices = CpuTimeSliceList(getattr(s, copy_method)())
+        s = s.list_next
+        while s != None:
+            obj = getattr(s, copy_method)()
+            obj.list_prev = result.slices.last
+            obj.list_next = None
+            result.slices.last.list_next = obj
+            result.slices.last = obj
+            s = s.list_next
         return result
 
+    def copy(self):
+        return self._copy_slices('copy')
+
     def quick_copy(self):
-        assert "NOT YET UPDATED"
-        result = CpuSnapshot(self.total_processors, self.archive_snapshots)
-        result.slices = [slice.quick_copy() for slice in self.slices]
-        return result
+        return self._copy_slices('quick_copy')
 
     def CpuSlicesTestFeasibility(self):
         assert "NOT YET UPDATED"
@@ -18,19 +18,28 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 from sortedcontainers import SortedSet
 
+
+def _num_nodes(job):
+  # a named function (unlike a lambda) can be pickled
+  return job.num_required_processors
+
+
 class JobPool(object):
 
   def __init__(self):
     self.pending = []
+    self.pending_by_id = {}
     self.running = set()
-    self.pending_by_nodes = SortedSet(key=lambda job: job.num_required_processors)
+    self.pending_by_nodes = SortedSet(key=_num_nodes)
 
   def add_pending(self, job):
     self.pending.append(job)
+    self.pending_by_id[job.id] = job
     self.pending_by_nodes.add(job)
 
   def move_to_running(self, job):
     self.pending.remove(job)
+    del self.pending_by_id[job.id]
     self.pending_by_nodes.remove(job)
     self.running.add(job)
 
@@ -40,6 +49,10 @@ class JobPool(object):
   def get_pending_jobs_list(self):
     return self.pending[:]
 
+  def get_pending_job(self, job_id):
+    """returns the pending job with given id or None"""
+    return self.pending_by_id.get(job_id, None)
+
   def get_running_jobs(self):
     return self.running
 
@@ -0,0 +1,110 @@
+"""
+Journal of the scheduling decisions (used for "checkpointing" of CP-based schedulers).
+
+The journal is a binary file with a short header followed by fixed-width records
+(start time, job id). The file is kept open for the whole simulation and
+is synced to the disk periodically, so a crash may lose only the last few records.
+
+Journals in the legacy CSV format (one "time,job_id" row per line) can still be read.
+"""
+
+import csv
+import os
+import struct
+import time as timer
+
+
+class DecisionJournal(object):
+
+  MAGIC = b'PYSSJRN1'
+  RECORD = struct.Struct('<qq')
+
+  def __init__(self, filename, sync_interval=5.0):
+    """
+    :param filename: the journal file (overwritten if exists)
+    :param sync_interval: the minimal time (in seconds) between syncs to the disk
+    """
+    self.filename = filename
+    self.sync_interval = sync_interval
+    self.file = open(filename, 'wb')
+    self.file.write(self.MAGIC)
+    self._sync()
+
+
+  def append(self, time, job_id):
+    self.file.write(self.RECORD.pack(time, job_id))
+    if timer.time() >= self.next_sync:
+      self._sync()
+
+
+  def flush(self):
+    """Writes the buffered records (e.g., before the process is forked)"""
+    self._sync()
+
+
+  def branch(self, filename):
+    """
+    Continues the journal in another file (e.g., in a forked process):
+    the new file starts with the records written so far.
+    """
+    self._sync()
+    with open(self.filename, 'rb') as prefix:
+      data = prefix.read()
+    self.file.close()
+    self.filename = filename
+    self.file = open(filename, 'wb')
+    self.file.write(data)
+    self._sync()
+
+
+  def close(self):
+    if not self.file.closed:
+      self._sync()
+      self.file.close()
+
+
+  def __getstate__(self):
+    # the journal is saved as a position in the file
+    self._sync()
+    state = self.__dict__.copy()
+    state['file'] = self.file.tell()
+    return state
+
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    offset = self.file
+    # discard the records written after the state was saved
+    self.file = open(self.filename, 'r+b')
+    self.file.truncate(offset)
+    self.file.seek(offset)
+    self.next_sync = timer.time() + self.sync_interval
+
+
+  def _sync(self):
+    self.file.flush()
+    os.fsync(self.file.fileno())
+    self.next_sync = timer.time() + self.sync_interval
+
+
+  @classmethod
+  def read(cls, filename):
+    """ Reads the journal
+
+    An incomplete record at the end of the file (e.g., after a crash) is ignored.
+
+    :return: list of (time, job_id)
+    """
+    with open(filename, 'rb') as f:
+      data = f.read()
+    if not data.startswith(cls.MAGIC):
+      return cls._read_csv(filename)
+    size = cls.RECORD.size
+    n_records = (len(data) - len(cls.MAGIC)) // size
+    return [cls.RECORD.unpack_from(data, len(cls.MAGIC) + i * size) for i in xrange(n_records)]
+
+
+  @staticmethod
+  def _read_csv(filename):
+    with open(filename, 'rb') as read_obj:
+      return [(int(time), int(id)) for (time, id) in csv.reader(read_obj)]
@@ -0,0 +1,70 @@
+"""
+Scheduling plans compared by the best-of-N scheduler.
+
+A plan is a list of (start_time, job) sorted by the start time and the job id.
+The job attributes needed to measure the quality of the plan are copied to NumPy arrays,
+so the quality can be computed without iterating over the jobs, and the measured quality is cached.
+Plans are hashable, so the duplicates can be detected with a set.
+"""
+
+import numpy as np
+
+
+def _plan_order(entry):
+  return entry[0], entry[1].id
+
+
+class Plan(object):
+
+  def __init__(self, entries):
+    """
+    :param entries: iterable of (start_time, job)
+    """
+    self.entries = sorted(entries, key=_plan_order)
+    self.start_times = np.array([start_time for start_time, _ in self.entries])
+    self.job_ids = np.array([job.id for _, job in self.entries])
+    self.nodes = np.array([job.num_required_processors for _, job in self.entries])
+    self.run_times = np.array([job.predicted_run_time for _, job in self.entries])
+    self.submit_times = np.array([job.submit_time for _, job in self.entries])
+    self._hash = hash((tuple(self.start_times.tolist()), tuple(self.job_ids.tolist())))
+    # the quality measured by the scheduler (cached)
+    self.quality = None
+
+
+  def __iter__(self):
+    return iter(self.entries)
+
+
+  def __len__(self):
+    return len(self.entries)
+
+
+  def __hash__(self):
+    return self._hash
+
+
+  def __eq__(self, other):
+    return (self._hash == other._hash
+            and np.array_equal(self.start_times, other.start_times)
+            and np.array_equal(self.job_ids, other.job_ids))
+
+
+  def __ne__(self, other):
+    return not self == other
+
+
+  @property
+  def wait_times(self):
+    return self.start_times - self.submit_times
+
+
+def sequential_sum(values):
+  """
+  Sums the values in order (as the builtin sum does),
+  so the floating point result does not depend on NumPy's pairwise summation.
+  """
+  if len(values) == 0:
+    return 0
+  if values.dtype.kind == 'f':
+    return np.cumsum(values)[-1]
+  return values.sum()
@@ -0,0 +1,116 @@
+"""
+Cache of the last scheduling plan of a CP-based scheduler.
+
+The plan is stored together with the assumptions it was computed under
+(the running jobs with their predicted finish times and the queued jobs
+with their predicted run times). When the scheduler runs again and nothing
+but the clock has changed, the cached plan can be replayed instead of solving
+the model again.
+
+NOTE: "nodes" and "processors" are treated as they are a same thing
+"""
+
+from .usage_tracker import UsageTracker
+
+
+class PlanCache(object):
+
+  def __init__(self, max_nodes):
+    self.max_nodes = max_nodes
+    self.plan = None
+    # key: job.id, value: (job, predicted_finish_time)
+    self.running = {}
+    # key: job.id, value: predicted_run_time
+    self.queued = {}
+    # statistics
+    self.hits = 0
+    self.misses = 0
+    self.solve_count = 0
+    self.solve_time = 0.0
+
+
+  def store(self, plan, running_jobs, pending_jobs):
+    """ Saves the plan and its assumptions
+
+    Must be called after the jobs planned to start now are started.
+
+    :param plan: list of (start_time, job); jobs that are already started are ignored
+    :param running_jobs: iterable of the running jobs
+    :param pending_jobs: iterable of the jobs in the queue
+    """
+    self.running = dict((job.id, (job, job.predicted_finish_time)) for job in running_jobs)
+    self.queued = dict((job.id, job.predicted_run_time) for job in pending_jobs)
+    self.plan = [(start_time, job) for start_time, job in plan if job.id in self.queued]
+
+
+  def invalidate(self):
+    self.plan = None
+    self.running = {}
+    self.queued = {}
+
+
+  def lookup(self, time, running_jobs, pending_jobs):
+    """ Checks if the cached plan can be replayed at 'time'
+
+    Updates hit/miss statistics.
+
+    :return: the list of (start_time, job) for the jobs remaining in the plan or None
+    """
+    if self.plan is not None and self._is_valid(time, running_jobs, pending_jobs):
+      self.hits += 1
+      return self.plan
+    self.misses += 1
+    self.invalidate()
+    return None
+
+
+  def record_solve(self, seconds):
+    self.solve_count += 1
+    self.solve_time += seconds
+
+
+  def get_progress_info(self):
+    lookups = self.hits + self.misses
+    avg_solve_time = self.solve_time / self.solve_count if self.solve_count else 0.0
+    return [
+      "Plan cache: {} hits out of {} lookups ({:.1f}%)".format(
+        self.hits, lookups, 100.0 * self.hits / lookups if lookups else 0.0),
+      "Plan cache: {} solves took {:.1f} seconds; estimated savings {:.1f} seconds".format(
+        self.solve_count, self.solve_time, self.hits * avg_solve_time),
+    ]
+
+
+  def _is_valid(self, time, running_jobs, pending_jobs):
+    # the queue must be the same (no new jobs) with the same predictions
+    if len(pending_jobs) != len(self.queued):
+      return False
+    for job in pending_jobs:
+      if self.queued.get(job.id, None) != job.predicted_run_time:
+        return False
+    # running jobs must be the same as assumed
+    n_still_running = 0
+    for job in running_jobs:
+      record = self.running.get(job.id, None)
+      if record is None or record[1] != job.predicted_finish_time:
+        return False
+      n_still_running += 1
+    # finished jobs must have finished exactly as predicted
+    if n_still_running != len(self.running):
+      running_ids = set(job.id for job in running_jobs)
+      for job_id, (job, predicted_finish_time) in self.running.items():
+        if job_id not in running_ids and job.finish_time != predicted_finish_time:
+          return False
+    # planned jobs must not be late
+    for start_time, job in self.plan:
+      if start_time < time:
+        return False
+    return self._is_feasible(time, running_jobs)
+
+
+  def _is_feasible(self, time, running_jobs):
+    ut = UsageTracker(0)
+    for job in running_jobs:
+      ut.add_usage(time, max(time + 1, job.predicted_finish_time), job.num_required_processors)
+    for start_time, job in self.plan:
+      ut.add_usage(start_time, start_time + max(1, job.predicted_run_time), job.num_required_processors)
+    return max(ut.list.values()) <= self.max_nodes
@@ -0,0 +1,128 @@
+"""
+Telemetry of the CP-based schedulers.
+
+One CSV row is written for each scheduling point where the scheduler had to make a decision:
+- time, queue_length, running_jobs: the state at the scheduling point
+- solves: the number of CP models solved (including failed attempts)
+- intervals: the number of intervals in the largest model
+- build_time, solve_time: the total time (in seconds) spent building and solving the models
+- status, objective: the solve statuses and the objective values reported by the solver (separated by ';')
+- plan_quality: the quality of the chosen plan as measured by the scheduler (if available)
+- plan_source: where the chosen plan came from (e.g., "CP", "SJF", "CP+SJF", "cache")
+- total_time: the total time (in seconds) spent at the scheduling point
+"""
+
+import csv
+import time as timer
+
+
+class SolverTelemetry(object):
+
+  FIELDS = ['time', 'queue_length', 'running_jobs', 'solves', 'intervals', 'build_time', 'solve_time',
+            'status', 'objective', 'plan_quality', 'plan_source', 'total_time']
+
+  def __init__(self, filename):
+    """
+    :param filename: the telemetry file (overwritten if exists)
+    """
+    self.filename = filename
+    self.file = open(filename, 'wb')
+    self.writer = csv.writer(self.file)
+    self.writer.writerow(self.FIELDS)
+    self.point = None
+
+
+  def start_point(self, time, queue_length, running_jobs):
+    self.point = {
+      'time': time,
+      'queue_length': queue_length,
+      'running_jobs': running_jobs,
+      'solves': 0,
+      'intervals': 0,
+      'build_time': 0.0,
+      'solve_time': 0.0,
+      'status': [],
+      'objective': [],
+      'plan_quality': '',
+      'plan_source': '',
+      'total_time': timer.time(),
+    }
+
+
+  def record_solve(self, intervals, build_time, solve_time, res):
+    """
+    :param res: the solver result (None if the solver failed)
+    """
+    if self.point is None:
+      return
+    point = self.point
+    point['solves'] += 1
+    point['intervals'] = max(point['intervals'], intervals)
+    point['build_time'] += build_time
+    point['solve_time'] += solve_time
+    if res is None:
+      point['status'].append('Exception')
+      point['objective'].append('')
+    else:
+      point['status'].append(res.get_solve_status())
+      objective = res.get_objective_values()
+      point['objective'].append(objective[0] if objective else '')
+
+
+  def finish_point(self, plan_source, plan_quality=''):
+    if self.point is None:
+      return
+    point = self.point
+    point['plan_source'] = plan_source
+    point['plan_quality'] = plan_quality
+    point['total_time'] = timer.time() - point['total_time']
+    point['status'] = ';'.join(point['status'])
+    point['objective'] = ';'.join(str(value) for value in point['objective'])
+    self.writer.writerow([point[field] for field in self.FIELDS])
+    self.file.flush()
+    self.point = None
+
+
+  def flush(self):
+    """Writes the buffered rows (e.g., before the process is forked)"""
+    self.file.flush()
+
+
+  def branch(self, filename):
+    """
+    Continues the telemetry in another file (e.g., in a forked process):
+    the new file starts with the rows written so far.
+    """
+    self.file.flush()
+    with open(self.filename, 'rb') as prefix:
+      data = prefix.read()
+    self.file.close()
+    self.filename = filename
+    self.file = open(filename, 'wb')
+    self.file.write(data)
+    self.file.flush()
+    self.writer = csv.writer(self.file)
+
+
+  def close(self):
+    if not self.file.closed:
+      self.file.close()
+
+
+  def __getstate__(self):
+    # the telemetry is saved as a position in the file
+    self.file.flush()
+    state = self.__dict__.copy()
+    state['file'] = self.file.tell()
+    del state['writer']
+    return state
+
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    offset = self.file
+    # discard the rows written after the state was saved
+    self.file = open(self.filename, 'r+b')
+    self.file.truncate(offset)
+    self.file.seek(offset)
+    self.writer = csv.writer(self.file)
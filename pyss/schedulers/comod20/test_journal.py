@@ -0,0 +1,98 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import os
+import pickle
+import shutil
+import tempfile
+
+from pyss.schedulers.comod20.journal import DecisionJournal
+from pyss.schedulers.cplex_bestofn_scheduler import CplexBestofnScheduler
+from pyss.schedulers.cplex_tuned_scheduler import CplexTunedScheduler
+from pyss.schedulers.simulator import Simulator, finish_simulation, fork_simulator
+
+
+class test_DecisionJournal(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, "out.swf.checkpointing")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_read_written(self):
+        journal = DecisionJournal(self.filename)
+        journal.append(10, 1)
+        journal.append(10, 2)
+        journal.append(2 ** 40, 3)
+        journal.close()
+        self.assertEqual(DecisionJournal.read(self.filename), [(10, 1), (10, 2), (2 ** 40, 3)])
+
+    def test_incomplete_record_ignored(self):
+        journal = DecisionJournal(self.filename)
+        journal.append(10, 1)
+        journal.append(20, 2)
+        journal.close()
+        with open(self.filename, 'rb+') as f:
+            f.truncate(os.path.getsize(self.filename) - 3)
+        self.assertEqual(DecisionJournal.read(self.filename), [(10, 1)])
+
+    def test_restored_journal_discards_later_records(self):
+        journal = DecisionJournal(self.filename)
+        journal.append(10, 1)
+        state = pickle.dumps(journal, pickle.HIGHEST_PROTOCOL)
+        journal.append(20, 2)
+        journal.close()
+        journal = pickle.loads(state)
+        journal.append(30, 3)
+        journal.close()
+        self.assertEqual(DecisionJournal.read(self.filename), [(10, 1), (30, 3)])
+
+    def test_read_legacy_csv(self):
+        with open(self.filename, 'wb') as f:
+            f.write("10,1\r\n20,2\r\n")
+        self.assertEqual(DecisionJournal.read(self.filename), [(10, 1), (20, 2)])
+
+    def test_closed_when_the_simulation_finishes(self):
+        for scheduler_class in (CplexTunedScheduler, CplexBestofnScheduler):
+            # (the scheduler is not initialized: the solver is not needed without jobs)
+            scheduler = scheduler_class.__new__(scheduler_class)
+            scheduler.use_checkpointing = True
+            scheduler.journal = DecisionJournal(self.filename, sync_interval=3600)
+            scheduler.telemetry = None
+            scheduler.journal.append(10, 1)
+            options = {'scheduler': {'progressbar': False}, 'stats': False}
+            simulator = Simulator([], 16, scheduler, os.path.join(self.folder, "out.swf"), "input.swf", options)
+            simulator.run()
+            finish_simulation(simulator, True)
+            self.assertTrue(scheduler.journal.file.closed)
+            self.assertEqual(DecisionJournal.read(self.filename), [(10, 1)])
+
+    def test_continued_by_the_forked_branches(self):
+        def append(job_id):
+            def apply(simulator):
+                simulator.scheduler.journal.append(20, job_id)
+            return apply
+
+        for scheduler_class in (CplexTunedScheduler, CplexBestofnScheduler):
+            scheduler = scheduler_class.__new__(scheduler_class)
+            scheduler.use_checkpointing = True
+            scheduler.journal = DecisionJournal(self.filename, sync_interval=3600)
+            scheduler.telemetry = None
+            # (not synced to the disk before the fork)
+            scheduler.journal.append(10, 1)
+            options = {'scheduler': {'progressbar': False}, 'stats': False}
+            simulator = Simulator([], 16, scheduler, os.path.join(self.folder, "out.swf"), "input.swf", options)
+            branches = [(os.path.join(self.folder, "branch_{}.swf".format(job_id)), options, append(job_id))
+                        for job_id in (2, 3)]
+            self.assertEqual(fork_simulator(simulator, 0, branches, True), [0, 0])
+            self.assertTrue(scheduler.journal.file.closed)
+            self.assertEqual(DecisionJournal.read(self.filename), [(10, 1)])
+            for (output_swf, _, _), job_id in zip(branches, (2, 3)):
+                self.assertEqual(DecisionJournal.read(output_swf + ".checkpointing"), [(10, 1), (20, job_id)])
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import numpy as np
+
+from pyss.base.prototype import Job
+from pyss.schedulers.comod20.plan import Plan, sequential_sum
+
+
+def _job(id, run_time, nodes, submit_time=0):
+    return Job(id=id, user_estimated_run_time=run_time, actual_run_time=run_time,
+               num_required_processors=nodes, submit_time=submit_time)
+
+
+class test_Plan(TestCase):
+
+    def setUp(self):
+        self.first = _job(1, 100, 4, submit_time=10)
+        self.second = _job(2, 50, 2, submit_time=20)
+
+    def test_sorted_by_start_time_and_id(self):
+        plan = Plan([(100, self.second), (100, self.first), (0, self.second)])
+        self.assertEqual([(t, job.id) for t, job in plan], [(0, 2), (100, 1), (100, 2)])
+
+    def test_duplicates(self):
+        plans = set([Plan([(0, self.first), (100, self.second)])])
+        self.assertTrue(Plan([(100, self.second), (0, self.first)]) in plans)
+        self.assertFalse(Plan([(0, self.second), (50, self.first)]) in plans)
+        self.assertFalse(Plan([(0, self.first), (101, self.second)]) in plans)
+
+    def test_arrays(self):
+        plan = Plan([(30, self.first), (40, self.second)])
+        self.assertEqual(plan.wait_times.tolist(), [20, 20])
+        self.assertEqual(plan.nodes.tolist(), [4, 2])
+        self.assertEqual(plan.run_times.tolist(), [100, 50])
+
+    def test_sequential_sum(self):
+        values = [0.1] * 10 + [1e16, 1.0, -1e16]
+        self.assertEqual(sequential_sum(np.array(values)), sum(values))
+        self.assertEqual(sequential_sum(np.array([1, 2, 3])), 6)
+        self.assertEqual(sequential_sum(np.array([])), 0)
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+from pyss.base.prototype import Job
+from pyss.schedulers.comod20.plan_cache import PlanCache
+
+
+def _job(id, run_time, nodes, predicted_run_time=None):
+    job = Job(id=id, user_estimated_run_time=run_time, actual_run_time=run_time, num_required_processors=nodes)
+    if predicted_run_time is not None:
+        job.predicted_run_time = predicted_run_time
+    return job
+
+
+class test_PlanCache(TestCase):
+
+    def setUp(self):
+        # job 1 runs on 6 of 10 nodes until time 100, jobs 2 and 3 wait for it
+        self.running = _job(1, 100, 6)
+        self.running.start_to_run_at_time = 0
+        self.first = _job(2, 50, 8)
+        self.second = _job(3, 20, 2)
+        self.plan = [(100, self.first), (150, self.second)]
+        self.cache = PlanCache(10)
+        self.cache.store(self.plan, [self.running], [self.first, self.second])
+
+    def test_hit_when_nothing_changed(self):
+        self.assertEqual(self.cache.lookup(10, [self.running], [self.first, self.second]), self.plan)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_hit_after_termination_as_predicted(self):
+        self.assertEqual(self.cache.lookup(100, [], [self.first, self.second]), self.plan)
+
+    def test_miss_after_early_termination(self):
+        self.running.actual_run_time = 60
+        self.assertEqual(self.cache.lookup(60, [], [self.first, self.second]), None)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_miss_on_new_job(self):
+        new_job = _job(4, 10, 1)
+        self.assertEqual(self.cache.lookup(10, [self.running], [self.first, self.second, new_job]), None)
+
+    def test_miss_on_changed_prediction(self):
+        self.second.predicted_run_time = 10
+        self.assertEqual(self.cache.lookup(10, [self.running], [self.first, self.second]), None)
+
+    def test_miss_on_corrected_running_job(self):
+        self.running.predicted_run_time = 200
+        self.assertEqual(self.cache.lookup(10, [self.running], [self.first, self.second]), None)
+
+    def test_miss_when_planned_start_is_missed(self):
+        self.running.actual_run_time = self.running.predicted_run_time = 80
+        self.cache.store(self.plan, [self.running], [self.first, self.second])
+        self.assertEqual(self.cache.lookup(120, [], [self.first, self.second]), None)
+
+    def test_miss_when_infeasible(self):
+        self.cache.store([(10, self.first)], [self.running], [self.first])
+        self.assertEqual(self.cache.lookup(10, [self.running], [self.first]), None)
+
+    def test_started_jobs_are_dropped_from_plan(self):
+        self.first.start_to_run_at_time = 100
+        self.cache.store(self.plan, [self.first], [self.second])
+        self.assertEqual(self.cache.lookup(100, [self.first], [self.second]), [(150, self.second)])
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import csv
+import os
+import pickle
+import shutil
+import tempfile
+
+from pyss.schedulers.comod20.telemetry import SolverTelemetry
+from pyss.schedulers.cplex_bestofn_scheduler import CplexBestofnScheduler
+from pyss.schedulers.cplex_tuned_scheduler import CplexTunedScheduler
+from pyss.schedulers.simulator import Simulator, finish_simulation, fork_simulator
+
+
+class _Result(object):
+    def __init__(self, status, objective):
+        self.status = status
+        self.objective = objective
+
+    def get_solve_status(self):
+        return self.status
+
+    def get_objective_values(self):
+        return self.objective
+
+
+class test_SolverTelemetry(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, "out.swf.telemetry.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _rows(self):
+        with open(self.filename, 'rb') as f:
+            return list(csv.DictReader(f))
+
+    def test_scheduling_point(self):
+        telemetry = SolverTelemetry(self.filename)
+        telemetry.start_point(100, 5, 3)
+        telemetry.record_solve(8, 0.5, 1.0, _Result('Optimal', (42,)))
+        telemetry.record_solve(8, 0.5, 2.0, None)
+        telemetry.finish_point('CP+SJF', 40)
+        telemetry.close()
+        rows = self._rows()
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual((row['time'], row['queue_length'], row['running_jobs']), ('100', '5', '3'))
+        self.assertEqual((row['solves'], row['intervals']), ('2', '8'))
+        self.assertEqual((float(row['build_time']), float(row['solve_time'])), (1.0, 3.0))
+        self.assertEqual((row['status'], row['objective']), ('Optimal;Exception', '42;'))
+        self.assertEqual((row['plan_quality'], row['plan_source']), ('40', 'CP+SJF'))
+
+    def test_solves_outside_scheduling_point_ignored(self):
+        telemetry = SolverTelemetry(self.filename)
+        telemetry.record_solve(8, 0.5, 1.0, None)
+        telemetry.start_point(100, 5, 3)
+        telemetry.finish_point('cache')
+        telemetry.close()
+        self.assertEqual(self._rows()[0]['solves'], '0')
+
+    def test_restored_telemetry_discards_later_rows(self):
+        telemetry = SolverTelemetry(self.filename)
+        telemetry.start_point(100, 5, 3)
+        telemetry.finish_point('CP')
+        state = pickle.dumps(telemetry, pickle.HIGHEST_PROTOCOL)
+        telemetry.start_point(200, 5, 3)
+        telemetry.finish_point('CP')
+        telemetry.close()
+        telemetry = pickle.loads(state)
+        telemetry.start_point(300, 5, 3)
+        telemetry.finish_point('SJF')
+        telemetry.close()
+        self.assertEqual([row['time'] for row in self._rows()], ['100', '300'])
+
+    def test_closed_when_the_simulation_finishes(self):
+        for scheduler_class in (CplexTunedScheduler, CplexBestofnScheduler):
+            # (the scheduler is not initialized: the solver is not needed without jobs)
+            scheduler = scheduler_class.__new__(scheduler_class)
+            scheduler.use_checkpointing = False
+            scheduler.telemetry = SolverTelemetry(self.filename)
+            options = {'scheduler': {'progressbar': False}, 'stats': False}
+            simulator = Simulator([], 16, scheduler, os.path.join(self.folder, "out.swf"), "input.swf", options)
+            simulator.run()
+            finish_simulation(simulator, True)
+            self.assertTrue(scheduler.telemetry.file.closed)
+            self.assertEqual(self._rows(), [])
+
+    def test_continued_by_the_forked_branches(self):
+        def record(time):
+            def apply(simulator):
+                simulator.scheduler.telemetry.start_point(time, 1, 0)
+                simulator.scheduler.telemetry.finish_point('CP')
+            return apply
+
+        for scheduler_class in (CplexTunedScheduler, CplexBestofnScheduler):
+            scheduler = scheduler_class.__new__(scheduler_class)
+            scheduler.use_checkpointing = False
+            # (the header is not flushed before the fork)
+            scheduler.telemetry = SolverTelemetry(self.filename)
+            options = {'scheduler': {'progressbar': False}, 'stats': False}
+            simulator = Simulator([], 16, scheduler, os.path.join(self.folder, "out.swf"), "input.swf", options)
+            record(100)(simulator)
+            branches = [(os.path.join(self.folder, "branch_{}.swf".format(time)), options, record(time))
+                        for time in (200, 300)]
+            self.assertEqual(fork_simulator(simulator, 0, branches, True), [0, 0])
+            self.assertTrue(scheduler.telemetry.file.closed)
+            self.assertEqual([row['time'] for row in self._rows()], ['100'])
+            for (output_swf, _, _), time in zip(branches, (200, 300)):
+                with open(output_swf + ".telemetry.csv", 'rb') as f:
+                    self.assertEqual([row['time'] for row in csv.DictReader(f)], ['100', str(time)])
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -146,17 +146,17 @@ class ConstrProgScheduler(Scheduler):
       return []
     # update predictions of running jobs
     if self.running_jobs_prediction_enabled:
-      for job in self.jobs.get_running_jobs():
-        # NOTE: self.running_job is an alias for machine.jobs set by Simulator
-        self.predictor.predict(job, time, self.running_jobs)
+      running_jobs = list(self.jobs.get_running_jobs())
+      # NOTE: self.running_job is an alias for machine.jobs set by Simulator
+      self.predict_jobs(running_jobs, time)
+      for job in running_jobs:
         # make sure that the prediction for the running jobs is not in the past
         if job.predicted_finish_time <= time:
           job.predicted_run_time = 1 + time - job.start_to_run_at_time
           assert job.predicted_finish_time == time+1, "we just set it"
     # update predictions of queued jobs
-    for job in queue:
-      #NOTE: running_job is an alias for machine.jobs set by Simulator
-      self.predictor.predict(job, time, self.running_jobs)
+    #NOTE: running_job is an alias for machine.jobs set by Simulator
+    self.predict_jobs(queue, time)
 
     model = cp_model.CpModel()
     # We will search for a solution in time interval from 0 to max_makespan.
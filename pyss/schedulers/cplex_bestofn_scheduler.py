@@ -7,16 +7,21 @@ NOTE: "nodes" and "processors" are treated as they are a same thing
 """
 from __future__ import division
 
-import csv
 import os
 import sys
+import time as timer
 import traceback
 from sortedcontainers import SortedSet
 import docplex.cp.model as dcpm
+import numpy as np
 
 from .comod20.resources import Resource
 from .comod20.usage_tracker import UsageTracker
 from .comod20.job_pool import JobPool
+from .comod20.journal import DecisionJournal
+from .comod20.plan import Plan, sequential_sum
+from .comod20.plan_cache import PlanCache
+from .comod20.telemetry import SolverTelemetry
 
 from pyss.base.prototype import JobStartEvent, RunSchedulerEvent
 from .common import Scheduler
@@ -33,20 +38,21 @@ class SchedulingException(Exception):
 
 
 class Peekable:
+  # keeps the values in a list (rather than an iterator) so it can be pickled
   def __init__(self, iterable):
-    self.iter = iter(iterable)
-    self.next_value = next(self.iter, None)
+    self.values = list(iterable)
+    self.index = 0
   
   def next(self):
-    if self.next_value is None:
-      return None
-    else:
-      result = self.next_value
-      self.next_value = next(self.iter, None)
-      return result
+    result = self.peek()
+    if result is not None:
+      self.index += 1
+    return result
     
   def peek(self):
-    return self.next_value
+    if self.index < len(self.values):
+      return self.values[self.index]
+    return None
 
 
 
@@ -108,22 +114,14 @@ class CplexBestofnScheduler(Scheduler):
             os.rename(self.checkpointing_file, self.saved_check_file)
           else:
             raise Exception("checkpointing file don't exist")
-        with open(self.saved_check_file, 'rb') as read_obj:
-          # Return a reader object which will
-          # iterate over lines in the given csvfile
-          csv_reader = csv.reader(read_obj)
-          # read all file
-          list_of_csv = [(int(time), int(id)) for (time, id) in list(csv_reader)]
-          self.checkpointing_peekable = Peekable(list_of_csv)
-          self.rewinding_checkpoint = True
+        self.checkpointing_peekable = Peekable(DecisionJournal.read(self.saved_check_file))
+        self.rewinding_checkpoint = True
         print("Rewinding initialized")
       except Exception as e:
         print("Rewinding not done: " + str(e))
         self.rewinding_checkpoint = False
-      try:
-        os.remove(self.checkpointing_file)
-      except Exception:
-        pass
+      self.journal = DecisionJournal(self.checkpointing_file,
+                                     options.get("checkpointing_sync_interval", 5))
     if self.objective_function not in self.KNOWN_OBJECTIVE_FUNCTIONS:
       raise Exception("unknown objective function '" + str(self.objective_function) + "'")
     if self.objective_function == 'BSLD':
@@ -131,8 +129,49 @@ class CplexBestofnScheduler(Scheduler):
     if self.objective_function == 'ASpWAS':
       # TODO: implement
       self.ASpWAS_p = 2
+    # NOTE: a replayed plan may differ from a fresh solution when the solver hits the time limit
+    if options["scheduler"].get("use_plan_cache", False):
+      self.plan_cache = PlanCache(self.nodes.max)
+    else:
+      self.plan_cache = None
+    if options["scheduler"].get("solver_telemetry", False):
+      self.telemetry = SolverTelemetry(options["output_swf"] + ".telemetry.csv")
+    else:
+      self.telemetry = None
     sys.stdout.flush()
 
+  def finish(self):
+    if self.use_checkpointing:
+      # (flushed and synced to the disk)
+      self.journal.close()
+    if self.telemetry is not None:
+      self.telemetry.close()
+
+  def flush(self):
+    if self.use_checkpointing:
+      self.journal.flush()
+    if self.telemetry is not None:
+      self.telemetry.flush()
+
+  def branch(self, output_swf):
+    # the journal and the telemetry of the branch start with the records written so far
+    if self.use_checkpointing:
+      self.checkpointing_file = output_swf + ".checkpointing"
+      self.saved_check_file = self.checkpointing_file + ".saved"
+      self.journal.branch(self.checkpointing_file)
+    if self.telemetry is not None:
+      self.telemetry.branch(output_swf + ".telemetry.csv")
+
+  def get_progress_info(self):
+    info = []
+    if self.presorters:
+      info.append("Best-of-N: alternative plans chosen: " + ", ".join(
+        "{} {} times".format(presorter_id, presorter['count'])
+        for presorter_id, presorter in sorted(self.presorters.items())))
+    if self.plan_cache is not None:
+      info.extend(self.plan_cache.get_progress_info())
+    return info
+
   def new_events_on_job_termination(self, job, current_time):
     self.finish_job(job)
     self.predictor.fit(job, current_time)
@@ -195,9 +234,7 @@ class CplexBestofnScheduler(Scheduler):
       job.start_to_run_at_time = current_time
       self.jobs.move_to_running(job)
       if self.use_checkpointing:
-        with open(self.checkpointing_file, 'ab') as f:
-          w = csv.writer(f)
-          w.writerow([current_time, job.id])
+        self.journal.append(current_time, job.id)
     return rc
 
 
@@ -231,17 +268,13 @@ class CplexBestofnScheduler(Scheduler):
           result = []
           while self.checkpointing_peekable.peek() is not None and self.checkpointing_peekable.peek()[0] == time:
             job_id = self.checkpointing_peekable.peek()[1]
-            found = False
-            for job in self.jobs.get_pending_jobs_list():
-              if job.id == job_id:
-                found = True
-                rc = self.start_job(job, time)
-                if rc == False:
-                  raise SchedulingException("Job {} couldn't start at time {}".format(job.id,time))
-                result.append(job)
-                break
-            if not found: 
+            job = self.jobs.get_pending_job(job_id)
+            if job is None:
               raise Exception("job id {} is not in the list of pending jobs".format(job_id))
+            rc = self.start_job(job, time)
+            if rc == False:
+              raise SchedulingException("Job {} couldn't start at time {}".format(job.id,time))
+            result.append(job)
             print("rewinding job {} at time {}".format(job_id, time))
             self.checkpointing_peekable.next()
           return result
@@ -273,17 +306,29 @@ class CplexBestofnScheduler(Scheduler):
         return [job]
     # update predictions of running jobs
     if self.running_jobs_prediction_enabled:
-      for job in self.jobs.get_running_jobs():
-        # NOTE: self.running_job is an alias for machine.jobs set by Simulator
-        self.predictor.predict(job, time, self.running_jobs)
+      running_jobs = list(self.jobs.get_running_jobs())
+      # NOTE: self.running_job is an alias for machine.jobs set by Simulator
+      self.predict_jobs(running_jobs, time)
+      for job in running_jobs:
         # make sure that the prediction for the running jobs is not in the past
         if job.predicted_finish_time <= time:
           job.predicted_run_time = 1 + time - job.start_to_run_at_time
           assert job.predicted_finish_time == time+1, "we just set it"
     # update predictions of queued jobs
-    for job in queue:
-      #NOTE: running_job is an alias for machine.jobs set by Simulator
-      self.predictor.predict(job, time, self.running_jobs)
+    #NOTE: running_job is an alias for machine.jobs set by Simulator
+    self.predict_jobs(queue, time)
+
+    if self.telemetry is not None and not return_plan:
+      self.telemetry.start_point(time, len(queue), len(self.jobs.get_running_jobs()))
+
+    if self.plan_cache is not None and not return_plan:
+      cached_plan = self.plan_cache.lookup(time, self.jobs.get_running_jobs(), queue)
+      if cached_plan is not None:
+        self._finish_telemetry_point('cache', Plan(cached_plan))
+        result = self._start_plan(cached_plan, time)
+        self.plan_cache.store(cached_plan, self.jobs.get_running_jobs(), self.jobs.get_pending_jobs_list())
+        return result
+    solve_start = timer.time()
 
     # if len(queue) > self.limit_n_scheduled:
     #   print("Warning: at time {} queue length was {} (more than limit_n_scheduled {}}: results may be unexpected".format(
@@ -292,11 +337,14 @@ class CplexBestofnScheduler(Scheduler):
     # First produce a plan with Constraint Programming.
     cp_plan = self._cp_scheduling_plan(queue, time)
 
-    plans = []
+    plans = set()
     plan = None
+    # where the plan came from: (source name, presorter id)
+    plan_source = ('', None)
     if cp_plan:
-      plan = sorted(cp_plan, key=lambda x: (x[0], x[1].id))
-      plans.append(plan)
+      plan = Plan(cp_plan)
+      plans.add(plan)
+      plan_source = ('CP', None)
     
     for alt in self.presorters:
       # Get an alternative plan.
@@ -306,37 +354,54 @@ class CplexBestofnScheduler(Scheduler):
         # we have nothing to choose from
         print("WARNING: no alternative solution for {} at time {}".format(alt, time))
         continue
-      alt_plan = sorted(alt_plan, key=lambda x: (x[0], x[1].id))
-      for prev_plan in plans:
-        if prev_plan == alt_plan:
-          # we already have this plan, no need to process it
-          continue
-      plans.append(alt_plan)
+      alt_plan = Plan(alt_plan)
+      if alt_plan in plans:
+        # we already have this plan, no need to process it
+        continue
+      plans.add(alt_plan)
       if not plan or self._measure_quality(alt_plan) < self._measure_quality(plan):
         plan = alt_plan
+        plan_source = (alt, alt)
         # print("INFO: alternative solution was better at time {}".format(time))
       # improve on the alternative plan
       alt_cp_plan = self._cp_scheduling_plan(queue, time, alt_plan)
       if not alt_cp_plan:
         continue
-      alt_cp_plan = sorted(alt_cp_plan, key=lambda x: (x[0], x[1].id))
-      for prev_plan in plans:
-        if prev_plan == alt_cp_plan:
-          # we already have this plan, no need to process it
-          continue
-      # NOTE: we don't add the plan to the list of plans as it is an improved alternative
+      alt_cp_plan = Plan(alt_cp_plan)
+      if alt_cp_plan in plans:
+        # we already have this plan (and it can't be better than the current one)
+        continue
+      # NOTE: we don't add the plan to the set of plans as it is an improved alternative
       #       and we don't want to deny another alternative an opportunity to improve
-      # plans.append(alt_cp_plan)
+      # plans.add(alt_cp_plan)
       if self._measure_quality(plan) > self._measure_quality(alt_cp_plan):
         plan = alt_cp_plan
+        plan_source = ('CP+' + alt, alt)
 
     if return_plan:
-      return plan
+      return plan.entries if plan else None
     
+    if plan_source[1] is not None:
+      self.presorters[plan_source[1]]['count'] += 1
+    self._finish_telemetry_point(plan_source[0], plan)
+
     # start jobs if we don't return the plan
-    result = []
     if not plan:
-      return result
+      return []
+    result = self._start_plan(plan, time)
+    if self.plan_cache is not None:
+      self.plan_cache.record_solve(timer.time() - solve_start)
+      self.plan_cache.store(plan, self.jobs.get_running_jobs(), self.jobs.get_pending_jobs_list())
+    return result
+
+
+  def _finish_telemetry_point(self, plan_source, plan):
+    if self.telemetry is not None:
+      self.telemetry.finish_point(plan_source, self._measure_quality(plan) if plan else '')
+
+
+  def _start_plan(self, plan, time):
+    result = []
     for start_time, job in plan:
       if start_time <= time:
         rc = self.start_job(job, time)
@@ -350,28 +415,35 @@ class CplexBestofnScheduler(Scheduler):
 
   def _measure_quality(self, plan):
     # NOTE: we assume that both plans have the same set of jobs
+    if plan.quality is None:
+      plan.quality = self._compute_quality(plan)
+    return plan.quality
+
+
+  def _compute_quality(self, plan):
     if self.objective_function == 'AF':
       # NOTE: we measure the sum of wait times
-      return sum((time - job.submit_time for time, job in plan))
+      return sequential_sum(plan.wait_times)
     if self.objective_function == 'AWF':
       # NOTE: we measure the weighted sum of wait times (not normalized)
-      return sum((job.num_required_processors * job.predicted_run_time * (time - job.submit_time) for time, job in plan))
+      waits = plan.wait_times
+      if (plan.run_times.dtype.kind == 'i' and len(plan) > 0 and
+              int(plan.nodes.max()) * int(plan.run_times.max()) * int(abs(waits).max()) * len(plan) >= 2 ** 63):
+        # the sum may overflow int64
+        return sum(n * r * w for n, r, w in zip(plan.nodes.tolist(), plan.run_times.tolist(), waits.tolist()))
+      return sequential_sum(plan.nodes * plan.run_times * waits)
     if self.objective_function == 'BSLD':
       # NOTE: we measure the sum of the slowdowns (not normalized)
-      return sum((max(1,(time + job.predicted_run_time - job.submit_time) / max(self.BSLD_bound, job.predicted_run_time)) 
-                  for time, job in plan))
+      return sequential_sum(np.maximum(1, (plan.wait_times + plan.run_times) / np.maximum(self.BSLD_bound, plan.run_times)))
     if self.objective_function == 'ASpWAS':
       if self.ASpWAS_p != 2:
         raise NotImplementedError("ASpWAS with p != 2 is not implemented")
-      M2 = []
-      M3 = []
-      for time, job in plan:
-        Tw = time - job.submit_time
-        F = Tw + job.predicted_run_time
-        nodes = job.num_required_processors
-        M2.append(nodes * (F ** 3 - Tw ** 3))
-        M3.append(nodes * (F ** 4 - Tw ** 4))
-      return (float(sum(M3)) / float(sum(M2)))
+      # NOTE: the moments are computed in floating point (they overflow int64)
+      Tw = plan.wait_times.astype(np.float64)
+      F = Tw + plan.run_times
+      M2 = plan.nodes * (F ** 3 - Tw ** 3)
+      M3 = plan.nodes * (F ** 4 - Tw ** 4)
+      return sequential_sum(M3) / sequential_sum(M2)
     raise NotImplementedError("Quality measure for objective function {} is not implemented".format(self.objective_function))
 
 
@@ -396,6 +468,7 @@ class CplexBestofnScheduler(Scheduler):
   
   def _cp_scheduling_attempt(self, queue, time, timelimit, verbosity, initial_plan=None):
     in_debug = verbosity == 'Normal'
+    build_start = timer.time()
     mdl = dcpm.CpoModel()
     # We will search for a solution in time interval from 0 to max_makespan.
     # We will calculate max_makespan as max("durations of running job") + sum("durations of queued jobs").
@@ -501,7 +574,13 @@ class CplexBestofnScheduler(Scheduler):
         else:
           print("Warning: on time {} job {} was in alternative schedule but not in its optimization: results unpredicted")
       mdl.set_starting_point(stp)
-    res = mdl.solve(TimeLimit=timelimit, LogVerbosity=verbosity, RelativeOptimalityTolerance=0, OptimalityTolerance=1e-8)
+    solve_start = timer.time()
+    res = None
+    try:
+      res = mdl.solve(TimeLimit=timelimit, LogVerbosity=verbosity, RelativeOptimalityTolerance=0, OptimalityTolerance=1e-8)
+    finally:
+      if self.telemetry is not None:
+        self.telemetry.record_solve(len(interval_list), solve_start - build_start, timer.time() - solve_start, res)
     # print(res)
     # sorting results according to the priorities
     # TODO: make it an configuration parameter
@@ -7,9 +7,9 @@ NOTE: "nodes" and "processors" are treated as they are a same thing
 """
 from __future__ import division
 
-import csv
 import os
 import sys
+import time as timer
 import traceback
 from sortedcontainers import SortedSet
 import docplex.cp.model as dcpm
@@ -17,6 +17,9 @@ import docplex.cp.model as dcpm
 from .comod20.resources import Resource
 from .comod20.usage_tracker import UsageTracker
 from .comod20.job_pool import JobPool
+from .comod20.journal import DecisionJournal
+from .comod20.plan_cache import PlanCache
+from .comod20.telemetry import SolverTelemetry
 
 from pyss.base.prototype import JobStartEvent, RunSchedulerEvent
 from .common import Scheduler
@@ -32,20 +35,21 @@ class SchedulingException(Exception):
 
 
 class Peekable:
+  # keeps the values in a list (rather than an iterator) so it can be pickled
   def __init__(self, iterable):
-    self.iter = iter(iterable)
-    self.next_value = next(self.iter, None)
+    self.values = list(iterable)
+    self.index = 0
   
   def next(self):
-    if self.next_value is None:
-      return None
-    else:
-      result = self.next_value
-      self.next_value = next(self.iter, None)
-      return result
+    result = self.peek()
+    if result is not None:
+      self.index += 1
+    return result
     
   def peek(self):
-    return self.next_value
+    if self.index < len(self.values):
+      return self.values[self.index]
+    return None
 
 
 
@@ -92,22 +96,14 @@ class CplexTunedScheduler(Scheduler):
             os.rename(self.checkpointing_file, self.saved_check_file)
           else:
             raise Exception("checkpointing file don't exist")
-        with open(self.saved_check_file, 'rb') as read_obj:
-          # Return a reader object which will
-          # iterate over lines in the given csvfile
-          csv_reader = csv.reader(read_obj)
-          # read all file
-          list_of_csv = [(int(time), int(id)) for (time, id) in list(csv_reader)]
-          self.checkpointing_peekable = Peekable(list_of_csv)
-          self.rewinding_checkpoint = True
+        self.checkpointing_peekable = Peekable(DecisionJournal.read(self.saved_check_file))
+        self.rewinding_checkpoint = True
         print("Rewinding initialized")
       except Exception as e:
         print("Rewinding not done: " + str(e))
         self.rewinding_checkpoint = False
-      try:
-        os.remove(self.checkpointing_file)
-      except Exception:
-        pass
+      self.journal = DecisionJournal(self.checkpointing_file,
+                                     options.get("checkpointing_sync_interval", 5))
     if self.objective_function not in self.KNOWN_OBJECTIVE_FUNCTIONS:
       raise Exception("unknown objective function '" + str(self.objective_function) + "'")
     if self.objective_function == 'BSLD':
@@ -115,9 +111,49 @@ class CplexTunedScheduler(Scheduler):
     if self.objective_function == 'ASpWAS':
       # TODO: implement
       self.ASpWAS_p = 2
+    # NOTE: a replayed plan may differ from a fresh solution when the solver hits the time limit
+    if options["scheduler"].get("use_plan_cache", False):
+      self.plan_cache = PlanCache(self.nodes.max)
+    else:
+      self.plan_cache = None
+    if options["scheduler"].get("solver_telemetry", False):
+      self.telemetry = SolverTelemetry(options["output_swf"] + ".telemetry.csv")
+    else:
+      self.telemetry = None
     sys.stdout.flush()
 
 
+  def finish(self):
+    if self.use_checkpointing:
+      # (flushed and synced to the disk)
+      self.journal.close()
+    if self.telemetry is not None:
+      self.telemetry.close()
+
+
+  def flush(self):
+    if self.use_checkpointing:
+      self.journal.flush()
+    if self.telemetry is not None:
+      self.telemetry.flush()
+
+
+  def branch(self, output_swf):
+    # the journal and the telemetry of the branch start with the records written so far
+    if self.use_checkpointing:
+      self.checkpointing_file = output_swf + ".checkpointing"
+      self.saved_check_file = self.checkpointing_file + ".saved"
+      self.journal.branch(self.checkpointing_file)
+    if self.telemetry is not None:
+      self.telemetry.branch(output_swf + ".telemetry.csv")
+
+
+  def get_progress_info(self):
+    if self.plan_cache is None:
+      return []
+    return self.plan_cache.get_progress_info()
+
+
   def new_events_on_job_termination(self, job, current_time):
     self.finish_job(job)
     self.predictor.fit(job, current_time)
@@ -180,9 +216,7 @@ class CplexTunedScheduler(Scheduler):
       job.start_to_run_at_time = current_time
       self.jobs.move_to_running(job)
       if self.use_checkpointing:
-        with open(self.checkpointing_file, 'ab') as f:
-          w = csv.writer(f)
-          w.writerow([current_time, job.id])
+        self.journal.append(current_time, job.id)
     return rc
 
 
@@ -213,17 +247,13 @@ class CplexTunedScheduler(Scheduler):
           result = []
           while self.checkpointing_peekable.peek() is not None and self.checkpointing_peekable.peek()[0] == time:
             job_id = self.checkpointing_peekable.peek()[1]
-            found = False
-            for job in self.jobs.get_pending_jobs_list():
-              if job.id == job_id:
-                found = True
-                rc = self.start_job(job, time)
-                if rc == False:
-                  raise SchedulingException("Job {} couldn't start at time {}".format(job.id,time))
-                result.append(job)
-                break
-            if not found: 
+            job = self.jobs.get_pending_job(job_id)
+            if job is None:
               raise Exception("job id {} is not in the list of pending jobs".format(job_id))
+            rc = self.start_job(job, time)
+            if rc == False:
+              raise SchedulingException("Job {} couldn't start at time {}".format(job.id,time))
+            result.append(job)
             print("rewinding job {} at time {}".format(job_id, time))
             self.checkpointing_peekable.next()
           return result
@@ -255,24 +285,46 @@ class CplexTunedScheduler(Scheduler):
         return [job]
     # update predictions of running jobs
     if self.running_jobs_prediction_enabled:
-      for job in self.jobs.get_running_jobs():
-        # NOTE: self.running_job is an alias for machine.jobs set by Simulator
-        self.predictor.predict(job, time, self.running_jobs)
+      running_jobs = list(self.jobs.get_running_jobs())
+      # NOTE: self.running_job is an alias for machine.jobs set by Simulator
+      self.predict_jobs(running_jobs, time)
+      for job in running_jobs:
         # make sure that the prediction for the running jobs is not in the past
         if job.predicted_finish_time <= time:
           job.predicted_run_time = 1 + time - job.start_to_run_at_time
           assert job.predicted_finish_time == time+1, "we just set it"
     # update predictions of queued jobs
-    for job in queue:
-      #NOTE: running_job is an alias for machine.jobs set by Simulator
-      self.predictor.predict(job, time, self.running_jobs)
+    #NOTE: running_job is an alias for machine.jobs set by Simulator
+    self.predict_jobs(queue, time)
+
+    if self.telemetry is not None and not return_plan:
+      self.telemetry.start_point(time, len(queue), len(self.jobs.get_running_jobs()))
+
+    use_plan_cache = self.plan_cache is not None and not return_plan
+    if use_plan_cache:
+      cached_plan = self.plan_cache.lookup(time, self.jobs.get_running_jobs(), queue)
+      if cached_plan is not None:
+        self._finish_telemetry_point('cache')
+        result = self._start_plan(cached_plan, time)
+        self.plan_cache.store(cached_plan, self.jobs.get_running_jobs(), self.jobs.get_pending_jobs_list())
+        return result
+    solve_start = timer.time()
 
     for timelimit, verbosity in (
             (self.timelimit, 'Quiet'),
             (self.timelimit*2, 'Normal')
     ):
       try:
-        return self._cp_scheduling_attempt(queue, return_plan, time, timelimit, verbosity)
+        if not use_plan_cache:
+          result = self._cp_scheduling_attempt(queue, return_plan, time, timelimit, verbosity)
+          self._finish_telemetry_point('CP')
+          return result
+        plan = self._cp_scheduling_attempt(queue, True, time, timelimit, verbosity)
+        self._finish_telemetry_point('CP')
+        result = self._start_plan(plan, time)
+        self.plan_cache.record_solve(timer.time() - solve_start)
+        self.plan_cache.store(plan, self.jobs.get_running_jobs(), self.jobs.get_pending_jobs_list())
+        return result
       except Exception as e:
         print("==========================================================================================")
         print("Exception during scheduling at time {}".format(time))
@@ -282,11 +334,18 @@ class CplexTunedScheduler(Scheduler):
           raise e
     # We done trying scheduling using CP. Attempting to do an alternative
     print("Attempting the alternative scheduling algorithm")
+    self._finish_telemetry_point('alternative')
     return self._alternative_schedule_jobs(time, return_plan)
 
 
+  def _finish_telemetry_point(self, plan_source):
+    if self.telemetry is not None:
+      self.telemetry.finish_point(plan_source)
+
+
   def _cp_scheduling_attempt(self, queue, return_plan, time, timelimit, verbosity):
     in_debug = verbosity == 'Normal'
+    build_start = timer.time()
     mdl = dcpm.CpoModel()
     # We will search for a solution in time interval from 0 to max_makespan.
     # We will calculate max_makespan as max("durations of running job") + sum("durations of queued jobs").
@@ -380,7 +439,13 @@ class CplexTunedScheduler(Scheduler):
     objective_monitor = dcpm.minimize(objective_var)
     mdl.add(objective_monitor)
     # res = mdl.solve(TimeLimit=self.timelimit, LogVerbosity='Normal', SearchType='IterativeDiving')
-    res = mdl.solve(TimeLimit=timelimit, LogVerbosity=verbosity)
+    solve_start = timer.time()
+    res = None
+    try:
+      res = mdl.solve(TimeLimit=timelimit, LogVerbosity=verbosity)
+    finally:
+      if self.telemetry is not None:
+        self.telemetry.record_solve(len(interval_list), solve_start - build_start, timer.time() - solve_start, res)
     # print(res)
     # sorting results according to the priorities
     # TODO: make it an configuration parameter
@@ -405,6 +470,19 @@ class CplexTunedScheduler(Scheduler):
     return result
 
 
+  def _start_plan(self, plan, time):
+    result = []
+    for start_time, job in plan:
+      if start_time <= time:
+        rc = self.start_job(job, time)
+        if rc == False:
+          raise SchedulingException(
+            "Job {} couldn't start at time {}. Possibly a running job exceeded its time limit".format(job.id,
+                                                                                                      time))
+        result.append(job)
+    return result
+
+
   def _alternative_schedule_jobs(self, time, return_plan=False):
     queue = self.jobs.get_pending_jobs_list()
     if len(queue) == 0:
@@ -416,16 +494,16 @@ class CplexTunedScheduler(Scheduler):
       return []
     # update predictions
     if self.running_jobs_prediction_enabled:
-      for job in self.jobs.get_running_jobs():
-        # NOTE: self.running_job is an alias for machine.jobs set by Simulator
-        self.predictor.predict(job, time, self.running_jobs)
+      running_jobs = list(self.jobs.get_running_jobs())
+      # NOTE: self.running_job is an alias for machine.jobs set by Simulator
+      self.predict_jobs(running_jobs, time)
+      for job in running_jobs:
         # make sure that the prediction for the running jobs is not in the past
         if job.predicted_finish_time <= time:
           job.predicted_run_time = 1 + time - job.start_to_run_at_time
           assert job.predicted_finish_time == time+1, "we just set it"
-    for job in queue:
-      #NOTE: running_job is an alias for machine.jobs set by Simulator
-      self.predictor.predict(job, time, self.running_jobs)
+    #NOTE: running_job is an alias for machine.jobs set by Simulator
+    self.predict_jobs(queue, time)
     sorted_queue = queue
     queue_iter = iter(sorted_queue)
     # NOTE: we will track "minus available resources"
@@ -5,7 +5,7 @@ class EasyBackfillScheduler(Scheduler):
 
     def __init__(self, options):
         super(EasyBackfillScheduler, self).__init__(options)
-        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"])
+        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"], self.large_machine)
         self.unscheduled_jobs = []
         self.run_already_scheduled = False
         # print("EasyBackfillScheduler")
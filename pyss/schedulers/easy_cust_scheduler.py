@@ -37,7 +37,7 @@ class  EasyCustScheduler(Scheduler):
         self.init_corrector(options)
         self.run_already_scheduled = False
 
-        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"])
+        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"], self.large_machine)
         self.unscheduled_jobs = []
         presorter_id = options["scheduler"].get("presorter", None)
         if presorter_id is None:
@@ -40,7 +40,7 @@ class  EasyLabfScheduler(Scheduler):
         self.init_corrector(options)
         self.run_already_scheduled = False
 
-        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"])
+        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"], self.large_machine)
         self.unscheduled_jobs = []
 
 
@@ -20,7 +20,7 @@ class  EasyPlusPlusScheduler(Scheduler):
         self.init_corrector(options)
         self.run_already_scheduled = False
 
-        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"])
+        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"], self.large_machine)
         self.unscheduled_jobs = []
 
 
@@ -29,8 +29,7 @@ class EasyPredictionBackfillScheduler(EasyBackfillScheduler):
     # This is how easy_+_+ is currently coded.
     def _schedule_jobs(self, current_time):
         "Overriding parent method"
-        for job in self.unscheduled_jobs:
-            self.predictor.predict(job, current_time, self.running_jobs)
+        self.predict_jobs(self.unscheduled_jobs, current_time)
         return super(EasyPredictionBackfillScheduler, self)._schedule_jobs(current_time)
 
 
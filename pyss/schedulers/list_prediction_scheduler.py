@@ -22,9 +22,6 @@ NOTE: "nodes" and "processors" are treated as they are a same thing
 '''
 from __future__ import division
 
-from sortedcontainers import SortedSet
-import docplex.cp.model as dcpm
-
 from .comod20.resources import Resource
 from .comod20.job_pool import JobPool
 
@@ -150,9 +147,8 @@ class ListPredictionScheduler(Scheduler):
       # no jobs to schedule
       return []
 
-    for job in queue:
-      #NOTE: running_job is an alias for machine.jobs set by Simulator
-      self.predictor.predict(job, time, self.running_jobs)
+    #NOTE: running_job is an alias for machine.jobs set by Simulator
+    self.predict_jobs(queue, time)
 
     # We attempt to start jobs in a particular order
     sorted_queue = self.make_sorted_queue(queue)
@@ -9,6 +9,7 @@ class Entry(object):
     def __init__(self, cpu_snapshot = None):
         self.utilization = 0
         self.cpu_snapshot = cpu_snapshot
+        self.jobs = () # the jobs of the subset, backfilled in cpu_snapshot
 
     def __str__(self):
         return '%d' % (self.utilization)
@@ -63,18 +64,28 @@ class LookAheadEasyBackFillScheduler(EasyBackfillScheduler):
          
 
         # M[j, k] represents the subset of jobs in {0...j} with the highest utilization if k processors are available
-        M = {}  
-        
-        for k in range(free_processors + 1): 
-            M[-1, k] = Entry(cpu_snapshot_with_first_job.copy())
+        # M[j, k] is computed only for the values of k that lead to M[last, free_processors]: the free processors
+        # less the sizes of some of the jobs after j (rather than for all the values up to free_processors)
+        M = {}
+        needed = [None] * len(self.unscheduled_jobs)
+        processors = set([free_processors])
+        for j in reversed(range(len(self.unscheduled_jobs))):
+            needed[j] = processors
+            size = self.unscheduled_jobs[j].num_required_processors
+            processors = processors.union(k - size for k in processors if k >= size)
+
+        # the entries do not change their snapshots: an entry that keeps the subset of the previous row shares its snapshot
+        for k in processors:
+            M[-1, k] = Entry(cpu_snapshot_with_first_job)
 
         for j in range(len(self.unscheduled_jobs)):
             job = self.unscheduled_jobs[j]
             pass #assert job.backfill_flag == 0 
-            for k in range(free_processors + 1):
+            for k in needed[j]:
                 M[j, k] = Entry()
                 M[j, k].utilization  =  M[j-1, k].utilization
-                M[j, k].cpu_snapshot =  M[j-1, k].cpu_snapshot.copy()
+                M[j, k].cpu_snapshot =  M[j-1, k].cpu_snapshot
+                M[j, k].jobs         =  M[j-1, k].jobs
 
                 if (k < job.num_required_processors):
                     continue
@@ -91,13 +102,13 @@ class LookAheadEasyBackFillScheduler(EasyBackfillScheduler):
                 if U1 <= U2:
                     M[j, k].utilization = U2
                     M[j, k].cpu_snapshot = tmp_cpu_snapshot
+                    M[j, k].jobs = M[j-1, k-job.num_required_processors].jobs + (job,)
                     
 
         best_entry = M[len(self.unscheduled_jobs) - 1, free_processors]
-        for job in self.unscheduled_jobs:
-            if job.id in best_entry.cpu_snapshot.slices[0].job_ids:        
-                job.backfill_flag = 1  
-
-        
+        for job in best_entry.jobs:
+            job.backfill_flag = 1
 
 
+# the name of the class in the configurations (see config_schema.module_to_class)
+LookaheadEasyBackfillScheduler = LookAheadEasyBackFillScheduler
@@ -1,5 +1,7 @@
+from collections import defaultdict
+
 from common import Scheduler, CpuSnapshot, list_copy
-from base.prototype import JobStartEvent
+from pyss.base.prototype import JobStartEvent
 
 
 def _round_time_up(num):
@@ -88,7 +90,7 @@ class  OrigProbabilisticEasyScheduler(Scheduler):
         super(OrigProbabilisticEasyScheduler, self).__init__(options)
         self.threshold    = threshold
         self.window_size  = window_size # a parameter for the distribution
-        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"])
+        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"], self.large_machine)
 
         self.user_distribution = {}
 
@@ -96,10 +98,8 @@ class  OrigProbabilisticEasyScheduler(Scheduler):
         self.currently_running_jobs = []
 
         #self.work_list = [[None for i in xrange(self.num_processors+1)] for j in xrange(self.num_processors+1)]
-        self.M = {}
-        for c in xrange(self.num_processors+1):
-            for n in xrange(self.num_processors+1):
-                self.M[c, n] = 0.0
+        # the entries of M are 0.0 until they are set (they were allocated for all the (num_processors+1)^2 pairs)
+        self.M = defaultdict(float)
 
         self.max_user_rounded_estimated_run_time = 0
         self.prev_max_user_rounded_estimated_run_time = 0
@@ -212,41 +212,91 @@ class  OrigProbabilisticEasyScheduler(Scheduler):
         C = first_job.num_required_processors + second_job.num_required_processors
         K = min(self.num_processors, C)
 
+        num_of_currently_running_jobs = len(self.currently_running_jobs)
+        last_row_index = num_of_currently_running_jobs
+
+        if self.large_machine:
+            M = self.large_machine_released_processors(time, first_job, C, K, current_time)
+        else:
+            M = self.released_processors(time, K, current_time)
+
+        if  C <= K:
+            result = M[last_row_index, first_job.num_required_processors] - M[last_row_index, C]
+        else:
+            result = M[last_row_index, first_job.num_required_processors]
+
+        if   result < 0:
+            result = 0.0
+        elif result > 1:
+            reuslt = 1.0
+
+        pass #assert 0 <= result <= 1
+        return result
+
+
+    def released_processors(self, time, K, current_time):
         # M[n,c] is the probability that the first n running jobs will release at least c processors at _time_
         M = self.M
 
         num_of_currently_running_jobs = len(self.currently_running_jobs)
 
-        for c in xrange(K + 1):
+        for c in xrange(1, K + 1):
             M[0, c] = 0.0
 
-        for n in xrange(1, num_of_currently_running_jobs+1):
+        # no jobs release at least 0 processors
+        for n in xrange(num_of_currently_running_jobs+1):
             M[n, 0] = 1.0
 
         for n in xrange(1, num_of_currently_running_jobs+1):
             job_n = self.currently_running_jobs[n-1] # the n'th job: recall that a list has a zero index
             job_n_required_processors = job_n.num_required_processors
             Pn = self.probability_of_running_job_to_end_upto(time, current_time, job_n)
-            for c in xrange (1, job_n_required_processors):
+            # if the n'th job ends, the first n-1 jobs need to release c - job_n_required_processors processors
+            for c in xrange (1, min(job_n_required_processors, K + 1)):
                 val = M[n-1, c]
                 M[n, c] = val + (1.0 - val) * Pn
             for c in xrange (job_n_required_processors, K + 1):
                 val = M[n-1, c]
-                M[n, c] = val + (M[n, c - job_n_required_processors] - val) * Pn
-
-        last_row_index = num_of_currently_running_jobs
-        if  C <= K:
-            result = M[last_row_index, first_job.num_required_processors] - M[last_row_index, C]
-        else:
-            result = M[last_row_index, first_job.num_required_processors]
-
-        if   result < 0:
-            result = 0.0
-        elif result > 1:
-            reuslt = 1.0
-
-        pass #assert 0 <= result <= 1
-        return result
+                M[n, c] = val + (M[n-1, c - job_n_required_processors] - val) * Pn
+
+        return M
+
+
+    def large_machine_released_processors(self, time, first_job, C, K, current_time):
+        """
+        The entries of the table M (see released_processors) that bottle_neck reads, for a large machine.
+        Instead of all the numbers of processors up to K, the row n is computed only for the numbers that lead to
+        the entries of the last row that are read (C and the processors of the first job): these numbers less
+        the sizes of some of the jobs after n. The entries are computed as in released_processors, so they are the same.
+        """
+        running_jobs = self.currently_running_jobs
+        needed = [None] * (len(running_jobs) + 1)
+        processors = set(c for c in (first_job.num_required_processors, C) if c <= K)
+        for n in xrange(len(running_jobs), 0, -1):
+            needed[n] = processors
+            size = running_jobs[n-1].num_required_processors
+            processors = processors.union(c - size for c in processors if c >= size)
+        needed[0] = processors
+
+        M = {}
+        for c in needed[0]:
+            M[0, c] = 1.0 if c == 0 else 0.0
+
+        for n in xrange(1, len(running_jobs)+1):
+            job_n = running_jobs[n-1]
+            job_n_required_processors = job_n.num_required_processors
+            Pn = self.probability_of_running_job_to_end_upto(time, current_time, job_n)
+            for c in needed[n]:
+                if c == 0:
+                    M[n, c] = 1.0
+                elif c < job_n_required_processors:
+                    val = M[n-1, c]
+                    M[n, c] = val + (1.0 - val) * Pn
+                else:
+                    val = M[n-1, c]
+                    M[n, c] = val + (M[n-1, c - job_n_required_processors] - val) * Pn
+
+        return M
 
 
     def probability_of_running_job_to_end_upto(self, time, current_time, job):
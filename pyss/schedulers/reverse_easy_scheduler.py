@@ -13,7 +13,7 @@ class  ReverseEasyScheduler(EasyBackfillScheduler):
     
     def __init__(self, options):
         super(ReverseEasyScheduler, self).__init__(options)
-        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"])
+        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"], self.large_machine)
 
     
     def _backfill_jobs(self, current_time):
@@ -12,7 +12,7 @@ class  ShrinkingEasyScheduler(EasyBackfillScheduler):
     
     def __init__(self, options):
         super(ShrinkingEasyScheduler, self).__init__(options)
-        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"])
+        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"], self.large_machine)
         self.unscheduled_jobs = []
 
     def new_events_on_job_submission(self, job, current_time):
@@ -3,14 +3,17 @@
 # import sys
 import datetime
 import os
-import subprocess
+import sys
 
 import progressbar
 import time
+import traceback
 
+from pyss.base import snapshot
 from pyss.base.prototype import JobSubmissionEvent, JobTerminationEvent, JobPredictionIsOverEvent, RunSchedulerEvent
 from pyss.base.prototype import ValidatingMachine
 from pyss.base.event_queue import EventQueue
+from pyss.base.event_profile import EventProfile, ProfiledEventQueue
 # from common import CpuSnapshot, list_print
 #
 # from easy_plus_plus_scheduler import EasyPlusPlusScheduler
@@ -18,26 +21,77 @@ from pyss.base.event_queue import EventQueue
 
 
 
+PROTOTYPE_MODULES = ("pyss.base.prototype", "base.prototype")
+
+# the environment variable that passes the code version to the processes of a batch (see share_code_version)
+CODE_VERSION_VARIABLE = "PYSS_CODE_VERSION"
+
+_code_version = None
+
+
+def code_version():
+    """
+    The version of the code written in the header of the outputs (the last git commit);
+    git is run once per process, or once per batch after share_code_version
+    """
+    global _code_version
+    if _code_version is None:
+        _code_version = os.environ.get(CODE_VERSION_VARIABLE)
+    if _code_version is None:
+        import subprocess
+        _code_version = subprocess.Popen("git show -s --format=\"%h %ci\" HEAD",
+                                         cwd=os.path.dirname(os.path.realpath(__file__)),
+                                         shell=True, stdout=subprocess.PIPE
+                                        ).stdout.read().strip()
+    return _code_version
+
+
+def share_code_version():
+    """Computes the code version once for the processes started afterwards (e.g., the workers of a batch)"""
+    os.environ[CODE_VERSION_VARIABLE] = code_version()
+
 
 class Simulator(object):
     """
     Assumption 1: The simulation clock goes only forward. Specifically,
     an event on time t can only produce future events with time t' = t or t' > t.
     Assumption 2: self.jobs holds every job that was introduced to the simulation.
+
+    If stream is True, the jobs (in the order of their submission times, e.g., a synthetic workload generator)
+    are taken from the iterable one at a time: the submission of the next job is added to the event queue when
+    the submission of the previous one is handled, so the whole workload is never in the event queue;
+    the terminated jobs are not kept either (they are only written to the output file), so the statistics
+    (print_simulator_stats) are not available.
     """
 
-    def __init__(self, jobs, num_processors, scheduler, output_swf, input_file, options):
+    def __init__(self, jobs, num_processors, scheduler, output_swf, input_file, options, stream=False):
         self.num_processors = num_processors
         self.jobs = jobs
+        self.job_stream = iter(jobs) if stream else None
         self.terminated_jobs = []
+        self.num_terminated_jobs = 0
         self.scheduler = scheduler
         self.time_of_last_job_submission = 0
-        self.event_queue = EventQueue()
+        self.event_profile = None
+        if options.get("event_profile") or options.get("event_timeline_freq"):
+            self.event_profile = EventProfile(self.waiting_jobs, options.get("event_timeline_freq", 0))
+            self.event_queue = ProfiledEventQueue(self.event_profile)
+        else:
+            self.event_queue = EventQueue()
         self.output_swf = None
+        self.output_swf_name = output_swf
         self.options = options
         self.pbar_activated = options["scheduler"]["progressbar"]
         self.pfile_freq = options.get("scheduler", {}).get("progressfile_freq", 0) # "0" means disabled
         self.pfile_name = output_swf + '.progress'
+        self.snapshot_freq = options.get("snapshot_freq", 0) # "0" means disabled
+        self.snapshot_name = output_swf + '.snapshot'
+        if self.snapshot_freq and output_swf[-3:] == ".gz":
+            print("WARNING: snapshots are not supported for compressed output; snapshots are disabled")
+            self.snapshot_freq = 0
+        if self.snapshot_freq and stream:
+            print("WARNING: snapshots are not supported for streamed jobs; snapshots are disabled")
+            self.snapshot_freq = 0
 
 
 
@@ -49,53 +103,137 @@ class Simulator(object):
         self.event_queue.add_handler(JobSubmissionEvent, self.handle_submission_event)
         self.event_queue.add_handler(JobTerminationEvent, self.handle_termination_event)
         self.event_queue.add_handler(RunSchedulerEvent, self.handle_run_scheduler_event)
+        self.input_file = input_file
         if (output_swf != None):
-            if (output_swf[-3:] == ".gz"):
-                import gzip
-                self.output_swf = gzip.open(output_swf, 'w+')
-            else:
-                self.output_swf = open(output_swf, 'w+')
-            version = subprocess.Popen("git show -s --format=\"%h %ci\" HEAD",
-                               cwd=os.path.dirname(os.path.realpath(__file__)),
-                               shell=True, stdout=subprocess.PIPE
-                              ).stdout.read().strip()
-            self.output_swf.write("; Computer: Pyss Simulator (" + version + ")\n")
-            self.output_swf.write("; Preemption: No\n")
-            self.output_swf.write("; MaxNodes: -1\n")
-            self.output_swf.write("; MaxProcs: " + str(num_processors) + "\n")
-            self.output_swf.write("; Note: input_file:" + str(input_file) + "\n")
-            self.output_swf.write("; Note: scheduler:" + str(scheduler.__class__.__name__) + "\n")
-            self.output_swf.write("; Note: options:" + str(options) + "\n")
-            self.output_swf.write(
-                "; Note: if a predictor is used, the thinktime column represents the initial prediction. \n")
-            self.output_swf.write(
-                "; Note: if a predictor is used, the Preceding Job Number column represents the number of under-predictions. (-1 <=> 0) \n")
-            self.output_swf.write(
-                "; Note: the Partition Number column can represents it have been backfilled (-1<=>False, 1<=>True) \n")
+            self._open_output()
             self.event_queue.add_handler(JobTerminationEvent, self.store_terminated_job)
 
         if hasattr(scheduler, "I_NEED_A_PREDICTOR") and scheduler.I_NEED_A_PREDICTOR:
             self.event_queue.add_handler(JobPredictionIsOverEvent, self.handle_prediction_event)
 
-        for job in self.jobs:
-            self.event_queue.add_event(JobSubmissionEvent(job.submit_time, job))
+        if self.job_stream is not None:
+            self.event_queue.add_handler(JobSubmissionEvent, self.submit_next_job)
+            self.submit_next_job()
+        else:
+            for job in self.jobs:
+                self.event_queue.add_event(JobSubmissionEvent(job.submit_time, job))
         if self.pbar_activated:
-            widgets = [
-                '{}   # Jobs Terminated: '.format(output_swf),
-                progressbar.Counter(),
-                ' ',
-                progressbar.Timer()
-            ]
-            self.pbar = progressbar.ProgressBar(widgets=widgets, maxval=10000000, poll=0.1).start()
             self.pbari = 1
+            self._start_progressbar()
         if self.pfile_freq:
             # print ("pfile_freq: {}".format(self.pfile_freq))
             self.pfile_start_time = time.time()
             self.pfile_next_write = self.pfile_start_time + self.pfile_freq
             self.pfile_last_count = 0
             self.pfile_i = 0
+        if self.snapshot_freq:
+            self.snapshot_next = time.time() + self.snapshot_freq
+
+    def _open_output(self):
+        """Opens the output file and writes its header"""
+        if (self.output_swf_name[-3:] == ".gz"):
+            import gzip
+            self.output_swf = gzip.open(self.output_swf_name, 'w+')
+        else:
+            self.output_swf = open(self.output_swf_name, 'w+')
+        self.output_swf.write("; Computer: Pyss Simulator (" + code_version() + ")\n")
+        self.output_swf.write("; Preemption: No\n")
+        self.output_swf.write("; MaxNodes: -1\n")
+        self.output_swf.write("; MaxProcs: " + str(self.num_processors) + "\n")
+        self.output_swf.write("; Note: input_file:" + str(self.input_file) + "\n")
+        self.output_swf.write("; Note: scheduler:" + str(self.scheduler.__class__.__name__) + "\n")
+        self.output_swf.write("; Note: options:" + str(self.options) + "\n")
+        self.output_swf.write(
+            "; Note: if a predictor is used, the thinktime column represents the initial prediction. \n")
+        self.output_swf.write(
+            "; Note: if a predictor is used, the Preceding Job Number column represents the number of under-predictions. (-1 <=> 0) \n")
+        self.output_swf.write(
+            "; Note: the Partition Number column can represents it have been backfilled (-1<=>False, 1<=>True) \n")
+
+    def branch(self, output_swf, options):
+        """
+        Continues the simulation (e.g., in a forked process) with another output file:
+        the new output starts with the jobs terminated so far and
+        its header shows the given options (the caller changes the parameters of the scheduler).
+        """
+        if output_swf[-3:] == ".gz" or (self.output_swf is not None and self.output_swf_name[-3:] == ".gz"):
+            raise ValueError("branching is not supported for compressed output")
+        terminated = []
+        if self.output_swf is not None:
+            self.output_swf.flush()
+            with open(self.output_swf_name) as prefix:
+                terminated = [line for line in prefix if not line.startswith(';')]
+            self.output_swf.close()
+        else:
+            self.event_queue.add_handler(JobTerminationEvent, self.store_terminated_job)
+        self.options = options
+        self.output_swf_name = output_swf
+        self.pfile_name = output_swf + '.progress'
+        self.snapshot_name = output_swf + '.snapshot'
+        self._open_output()
+        self.output_swf.writelines(terminated)
+        self.scheduler.branch(output_swf)
+
+    def _start_progressbar(self):
+        widgets = [
+            '{}   # Jobs Terminated: '.format(self.output_swf_name),
+            progressbar.Counter(),
+            ' ',
+            progressbar.Timer()
+        ]
+        self.pbar = progressbar.ProgressBar(widgets=widgets, maxval=10000000, poll=0.1).start()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the jobs are already in the event queue
+        state['jobs'] = None
+        state['pbar'] = None
+        if self.output_swf:
+            self.output_swf.flush()
+            state['output_swf'] = self.output_swf.tell()
+        # the counters are tie-breakers for the events
+        # (the prototype module may be imported under two names, each with its own counter)
+        state['event_counters'] = dict(
+            (name, sys.modules[name].JobEvent.global_event_counter)
+            for name in PROTOTYPE_MODULES if name in sys.modules)
+        return state
+
+    def __setstate__(self, state):
+        for name, counter in state.pop('event_counters').items():
+            if name in sys.modules:
+                sys.modules[name].JobEvent.global_event_counter = counter
+        self.__dict__.update(state)
+        if self.output_swf is not None:
+            # discard the output written after the snapshot was taken
+            output_offset = self.output_swf
+            self.output_swf = open(self.output_swf_name, 'r+')
+            self.output_swf.truncate(output_offset)
+            self.output_swf.seek(output_offset)
+        if self.pbar_activated:
+            self._start_progressbar()
+        if self.pfile_freq:
+            self.pfile_next_write = time.time() + self.pfile_freq
+        if self.snapshot_freq:
+            self.snapshot_next = time.time() + self.snapshot_freq
+
+    def save_snapshot(self):
+        snapshot.save_snapshot(self, self.snapshot_name)
+        self.snapshot_next = time.time() + self.snapshot_freq
 
 
+    def waiting_jobs(self):
+        """The number of the submitted jobs that are not running yet (only with the event profile)"""
+        return self.event_profile.count(JobSubmissionEvent) - self.num_terminated_jobs - len(self.machine.jobs)
+
+    def submit_next_job(self, event=None):
+        """Adds the submission of the next streamed job to the event queue"""
+        job = next(self.job_stream, None)
+        if job is None:
+            return
+        if event is not None and job.submit_time < event.timestamp:
+            raise ValueError("the streamed jobs must be in the order of their submission times (job {})".format(job.id))
+        self.event_queue.add_event(JobSubmissionEvent(job.submit_time, job))
+
     def handle_submission_event(self, event):
         pass  # assert isinstance(event, JobSubmissionEvent)
         self.time_of_last_job_submission = event.timestamp
@@ -106,7 +244,9 @@ class Simulator(object):
     def handle_termination_event(self, event):
         pass  # assert isinstance(event, JobTerminationEvent)
         newEvents = self.scheduler.new_events_on_job_termination(event.job, event.timestamp)
-        self.terminated_jobs.append(event.job)
+        self.num_terminated_jobs += 1
+        if self.job_stream is None:
+            self.terminated_jobs.append(event.job)
         for event in newEvents:
             self.event_queue.add_event(event)
 
@@ -185,10 +325,16 @@ class Simulator(object):
                     pfile.write("Total rate: {} jobs per second\n".format(
                         float(self.pfile_i) / (cur_time - self.pfile_start_time)
                     ))
+                    self.write_scheduler_progress_info(pfile)
                 self.pfile_last_count = self.pfile_i
                 self.pfile_next_write = cur_time + self.pfile_freq
 
 
+    def write_scheduler_progress_info(self, pfile):
+        if hasattr(self.scheduler, "get_progress_info"):
+            for line in self.scheduler.get_progress_info():
+                pfile.write(line + "\n")
+
     def handle_prediction_event(self, event):
         pass  # assert isinstance(event, JobPredictionIsOverEvent)
         job = event.job
@@ -203,20 +349,101 @@ class Simulator(object):
             self.event_queue.add_event(
                 JobPredictionIsOverEvent(job=event.job, timestamp=event.job.predicted_finish_time))
 
-    def run(self):
+    def run(self, until=None):
+        """
+        :param until: if given, the simulation stops before the first event at or after this (simulated) time
+        :return: whether the simulation is over
+        """
         while not self.event_queue.is_empty:
+            if until is not None and self.event_queue.next_timestamp >= until:
+                return False
             self.event_queue.advance()
+            if self.snapshot_freq and time.time() >= self.snapshot_next:
+                self.save_snapshot()
+        return True
 
 
 def run_simulator(num_processors, jobs, scheduler, output_swf, input_file, no_stats, options):
     simulator = Simulator(jobs, num_processors, scheduler, output_swf, input_file, options)
     simulator.run()
-    # Finishing up
+    finish_simulation(simulator, no_stats)
+    return simulator
+
+
+def resume_simulator(snapshot_name, no_stats):
+    """
+    Restores the simulator from the snapshot file and continues the simulation.
+    """
+    simulator = snapshot.load_snapshot(snapshot_name)
+    simulator.run()
+    finish_simulation(simulator, no_stats)
+    return simulator
+
+
+def fork_simulator(simulator, fork_time, branches, no_stats, max_processes=None):
+    """
+    Runs the simulation until fork_time, then continues it in a forked (copy-on-write) process per branch,
+    so that the simulation before fork_time is shared by the branches.
+    :param branches: list of (output file, options, apply), where apply(simulator) changes
+                     the parameters of the branch (e.g., of the predictor) before the simulation continues
+    :param max_processes: the maximal number of branches running at the same time (by default, all of them)
+    :return: list of the exit codes of the branches (0 if the branch finished)
+    """
+    simulator.run(until=fork_time)
+    if simulator.output_swf:
+        simulator.output_swf.flush()
+    simulator.scheduler.flush()
+    sys.stdout.flush()
+    running = {}
+    codes = [None] * len(branches)
+
+    def wait_branches(n_running):
+        # (only the branches are waited for: the other children belong to their own owners, e.g., subprocess)
+        while len(running) > n_running:
+            for pid in list(running):
+                finished, status = os.waitpid(pid, os.WNOHANG)
+                if finished:
+                    codes[running.pop(pid)] = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
+            if len(running) > n_running:
+                time.sleep(0.01)
+
+    for i, (output_swf, options, apply) in enumerate(branches):
+        if max_processes:
+            wait_branches(max_processes - 1)
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                simulator.branch(output_swf, options)
+                apply(simulator)
+                simulator.run()
+                finish_simulation(simulator, no_stats)
+                code = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        running[pid] = i
+    wait_branches(0)
+    simulator.scheduler.finish()
+    if simulator.output_swf:
+        simulator.output_swf.close()
+    return codes
+
+
+def finish_simulation(simulator, no_stats):
+    simulator.scheduler.finish()
     if simulator.output_swf:
       simulator.output_swf.close()
+    if getattr(simulator, "event_profile", None) is not None:
+        simulator.event_profile.write(simulator.output_swf_name)
+    if simulator.snapshot_freq and os.path.isfile(simulator.snapshot_name):
+        os.remove(simulator.snapshot_name)
     if simulator.pfile_freq:
         cur_time = time.time()
-        with open(output_swf+".result", 'w') as pfile:
+        with open(simulator.output_swf_name+".result", 'w') as pfile:
             pfile.write("Simulations Started: {} \n".format(datetime.datetime.fromtimestamp(simulator.pfile_start_time)))
             pfile.write("Simulations Ended: {} \n".format(datetime.datetime.now()))
             pfile.write("Finished {} jobs in {} seconds \n".format(
@@ -226,16 +453,19 @@ def run_simulator(num_processors, jobs, scheduler, output_swf, input_file, no_st
             pfile.write("Total rate: {} jobs per second \n".format(
                 float(simulator.pfile_i) / (cur_time - simulator.pfile_start_time)
             ))
+            simulator.write_scheduler_progress_info(pfile)
         try:
             os.remove(simulator.pfile_name)
         except:
             print("Could not delete {}".format(simulator.pfile_name))
     if (not no_stats):
         print_simulator_stats(simulator)
-    return simulator
 
 
 def print_simulator_stats(simulator):
+    if simulator.job_stream is not None:
+        print("WARNING: the statistics are not computed for streamed jobs (the terminated jobs are not kept)")
+        return
     if hasattr(simulator.scheduler, "cpu_snapshot"):
         simulator.scheduler.cpu_snapshot._restore_old_slices()
     # simulator.scheduler.cpu_snapshot.printCpuSlices()
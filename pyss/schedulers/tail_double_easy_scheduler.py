@@ -11,7 +11,7 @@ class  TailDoubleEasyScheduler(EasyBackfillScheduler):
     
     def __init__(self, options):
         super(TailDoubleEasyScheduler, self).__init__(options)
-        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"])
+        self.cpu_snapshot = CpuSnapshot(self.num_processors, options["stats"], self.large_machine)
 
     
     def _backfill_jobs(self, current_time):
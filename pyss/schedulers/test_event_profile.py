@@ -0,0 +1,90 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+
+from pyss.base import snapshot
+from pyss.base.event_queue import EventQueue
+from pyss.base.event_profile import ProfiledEventQueue
+from pyss.run_simulator import parse_and_run_simulator
+from pyss.schedulers.test_fork import SAMPLE, _jobs, _options
+
+
+class test_event_profile(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.input_file = os.path.join(self.folder, 'input.swf')
+        with open(SAMPLE) as sample, open(self.input_file, 'w') as f:
+            f.writelines(sample.readlines()[:400])
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _run(self, name, **changes):
+        output = os.path.join(self.folder, name + '.swf')
+        options = _options(self.input_file, output)
+        options.update(changes)
+        parse_and_run_simulator(options, Exception)
+        return output
+
+    def test_profile_does_not_change_the_simulation(self):
+        plain = self._run('plain')
+        profiled = self._run('profiled', event_profile=True)
+        self.assertEqual(_jobs(plain), _jobs(profiled))
+        self.assertFalse(os.path.exists(plain + '.events.json'))
+        self.assertFalse(os.path.exists(profiled + '.timeline.csv'))
+        with open(profiled + '.events.json') as f:
+            profile = json.load(f)
+        types = profile["event_types"]
+        self.assertEqual(types["JobSubmissionEvent"]["count"], len(_jobs(profiled)))
+        self.assertEqual(types["JobTerminationEvent"]["count"], len(_jobs(profiled)))
+        self.assertEqual(sum(t["count"] for t in types.values()), profile["events"])
+        self.assertEqual(sum(p["count"] for p in profile["passes"]), profile["events"])
+        for p in profile["passes"]:
+            self.assertEqual(sum(count for _, _, count in p["duration_us"]), p["count"])
+            self.assertLessEqual(p["queue_length"][0], p["queue_length"][1])
+
+    def test_timeline(self):
+        output = self._run('timeline', event_timeline_freq=1e-9)
+        with open(output + '.timeline.csv') as f:
+            rows = list(csv.DictReader(f))
+        with open(output + '.events.json') as f:
+            events = json.load(f)["events"]
+        self.assertEqual(len(rows), events)
+        times = [int(row['time']) for row in rows]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual([int(row['events']) for row in rows], range(1, events + 1))
+        self.assertEqual(int(rows[-1]['queued_events']), 0)
+
+    def test_queue_and_snapshot(self):
+        from pyss.schedulers.simulator import Simulator
+        from config_schema import SCHEDULERS
+        from base.prototype import _job_inputs_to_jobs
+        from base.workload_parser import parse_lines
+        for changes, queue_type in (({}, EventQueue), ({'event_profile': True}, ProfiledEventQueue)):
+            options = _options(self.input_file, os.path.join(self.folder, 'snapshot.swf'))
+            options.update(changes)
+            options['num_processors'] = 128
+            scheduler = SCHEDULERS.get(options['scheduler']['name'])(options)
+            with open(self.input_file) as f:
+                jobs = list(_job_inputs_to_jobs(parse_lines(f), 128))
+            simulator = Simulator(jobs, 128, scheduler, options['output_swf'], self.input_file, options)
+            self.assertIs(type(simulator.event_queue), queue_type)
+            simulator.run(until=jobs[len(jobs) // 2].submit_time)
+            snapshot.save_snapshot(simulator, simulator.snapshot_name)
+            resumed = snapshot.load_snapshot(simulator.snapshot_name)
+            if simulator.event_profile is not None:
+                self.assertEqual(resumed.event_profile.counts, simulator.event_profile.counts)
+                self.assertEqual(resumed.event_profile.queue_length(), simulator.waiting_jobs())
+            simulator.output_swf.close()
+            resumed.output_swf.close()
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import copy
+import os
+import shutil
+import tempfile
+
+from pyss.run_simulator import parse_and_run_simulator
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '5K_sample')
+
+MULTIPLIERS = [0.5, 1, 2]
+
+
+def _options(input_file, output_swf, multiplier=1):
+    return {
+        'input_file': input_file,
+        'output_swf': output_swf,
+        'stats': False,
+        'scheduler': {
+            'name': 'easy_prediction_backfill_scheduler',
+            'progressbar': False,
+            'predictor': {'name': 'predictor_reqtime', 'predict_multiplier': multiplier},
+            'corrector': {'name': 'reqtime'},
+        },
+    }
+
+
+def _setter(multiplier):
+    def apply(simulator):
+        simulator.scheduler.predictor.predict_multiplier = multiplier
+    return apply
+
+
+def _jobs(filename):
+    with open(filename) as f:
+        return [line for line in f if not line.startswith(';')]
+
+
+class test_fork(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.input_file = os.path.join(self.folder, 'input.swf')
+        with open(SAMPLE) as sample, open(self.input_file, 'w') as f:
+            f.writelines(sample.readlines()[:600])
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _output(self, name):
+        return os.path.join(self.folder, name + '.swf')
+
+    def _separate(self, multiplier):
+        output = self._output('separate_{}'.format(multiplier))
+        parse_and_run_simulator(_options(self.input_file, output, multiplier), Exception)
+        return _jobs(output)
+
+    def _fork(self, fork_at):
+        branches = []
+        for multiplier in MULTIPLIERS:
+            output = self._output('branch_{}'.format(multiplier))
+            branches.append((output, _options(self.input_file, output, multiplier), _setter(multiplier)))
+        codes = parse_and_run_simulator(_options(self.input_file, self._output('prefix')), Exception,
+                                        fork_at=fork_at, branches=branches, max_processes=2)
+        self.assertEqual(codes, [0] * len(MULTIPLIERS))
+        return [_jobs(output) for output, _, _ in branches]
+
+    def test_fork_at_start_matches_separate_simulations(self):
+        forked = self._fork(0)
+        separate = [self._separate(multiplier) for multiplier in MULTIPLIERS]
+        self.assertEqual(forked, separate)
+        self.assertNotEqual(separate[0], separate[2])
+
+    def test_fork_after_the_end_copies_the_shared_simulation(self):
+        base = self._separate(1)
+        self.assertEqual(self._fork(10 ** 12), [base] * len(MULTIPLIERS))
+
+    def test_branches_share_the_jobs_terminated_before_the_fork(self):
+        base = self._separate(1)
+        end_times = sorted(int(line.split()[1]) + int(line.split()[2]) + int(line.split()[3]) for line in base)
+        fork_at = end_times[len(end_times) // 2]
+        shared = sum(1 for end_time in end_times if end_time < fork_at)
+        for jobs in self._fork(fork_at):
+            self.assertEqual(len(jobs), len(base))
+            self.assertEqual(jobs[:shared], base[:shared])
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import itertools
+import os
+import random
+import shutil
+import tempfile
+
+from pyss.base.prototype import Job
+from pyss.base.workload_generator import write_swf, WorkloadModel
+from pyss.run_simulator import parse_and_run_simulator
+from pyss.schedulers.common import CpuSnapshot
+from pyss.schedulers.orig_probabilistic_easy_scheduler import OrigProbabilisticEasyScheduler
+from pyss.schedulers.test_fork import SAMPLE, _jobs
+
+LARGE_MACHINE = 100000
+
+
+def _options(input_file, output_swf, name, large_machine):
+    return {
+        'input_file': input_file,
+        'output_swf': output_swf,
+        'stats': False,
+        'large_machine': large_machine,
+        'scheduler': {'name': name, 'progressbar': False},
+    }
+
+
+def _profile(cpu_snapshot):
+    """The free processors over time, in the unified form"""
+    result = []
+    s = cpu_snapshot.slices.first
+    while s != None:
+        if result and result[-1][1] == s.free_processors:
+            result[-1][0] = s.end_time
+        else:
+            result.append([s.end_time, s.free_processors])
+        s = s.list_next
+    return result
+
+
+def _slices(cpu_snapshot):
+    result = 0
+    s = cpu_snapshot.slices.first
+    while s != None:
+        result += 1
+        s = s.list_next
+    return result
+
+
+class test_cpu_snapshot(TestCase):
+
+    def test_same_profile(self):
+        rng = random.Random(1)
+        snapshots = [CpuSnapshot(64, False), CpuSnapshot(64, False, large_machine=True)]
+        running = []
+        for time in range(0, 4000, 20):
+            for cpu_snapshot in snapshots:
+                cpu_snapshot.archive_old_slices(time)
+            for job in [job for job in running if job.finish_time <= time]:
+                running.remove(job)
+                for cpu_snapshot in snapshots:
+                    cpu_snapshot.delTailofJobFromCpuSlices(job)
+            estimate = rng.choice([50, 100, 200])
+            job = Job(id=time, user_estimated_run_time=estimate, actual_run_time=rng.randint(1, estimate),
+                      num_required_processors=rng.choice([1, 2, 4, 8, 16]), submit_time=time)
+            start_times = [cpu_snapshot.jobEarliestAssignment(job, time) for cpu_snapshot in snapshots]
+            self.assertEqual(start_times[0], start_times[1])
+            for cpu_snapshot in snapshots:
+                cpu_snapshot.assignJob(job, start_times[0])
+            running.append(job)
+            self.assertEqual(_profile(snapshots[0]), _profile(snapshots[1]))
+            copies = [cpu_snapshot.copy() for cpu_snapshot in snapshots]
+            self.assertEqual(_profile(copies[0]), _profile(snapshots[0]))
+            self.assertEqual(_profile(copies[1]), _profile(snapshots[1]))
+        self.assertLessEqual(_slices(snapshots[1]), _slices(snapshots[0]))
+        self.assertIsNone(snapshots[1].slices.first.job_ids)
+        self.assertRaises(Exception, snapshots[1].jobs_at, 4000)
+
+
+class test_probabilistic_bottle_neck(TestCase):
+
+    def test_released_processors(self):
+        rng = random.Random(2)
+        schedulers = [OrigProbabilisticEasyScheduler({'num_processors': 64, 'stats': False, 'large_machine': large})
+                      for large in (False, True)]
+        for _ in range(20):
+            running = [Job(id=i, user_estimated_run_time=100, actual_run_time=100,
+                           num_required_processors=rng.choice([1, 2, 4, 8, 16])) for i in range(6)]
+            probabilities = dict((job, rng.choice([0.0, rng.random(), 1.0])) for job in running)
+            for scheduler in schedulers:
+                scheduler.currently_running_jobs = running
+                scheduler.probability_of_running_job_to_end_upto = lambda time, current_time, job: probabilities[job]
+            first = Job(id=10, user_estimated_run_time=100, actual_run_time=100,
+                        num_required_processors=rng.randint(1, 32))
+            second = Job(id=11, user_estimated_run_time=100, actual_run_time=100,
+                         num_required_processors=rng.randint(1, 32))
+            expected = 0.0
+            for ended in itertools.product([False, True], repeat=len(running)):
+                probability = 1.0
+                released = 0
+                for job, job_ended in zip(running, ended):
+                    probability *= probabilities[job] if job_ended else 1.0 - probabilities[job]
+                    released += job.num_required_processors if job_ended else 0
+                if first.num_required_processors <= released < first.num_required_processors + \
+                        second.num_required_processors:
+                    expected += probability
+            results = [scheduler.bottle_neck(1, second, first, 0) for scheduler in schedulers]
+            self.assertAlmostEqual(results[0], expected)
+            self.assertEqual(results[1], results[0])
+
+
+class test_large_machine(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _run(self, input_file, name, large_machine):
+        output = os.path.join(self.folder, '{}_{}.swf'.format(name, large_machine))
+        parse_and_run_simulator(_options(input_file, output, name, large_machine), Exception)
+        return _jobs(output)
+
+    def test_same_schedules(self):
+        input_file = os.path.join(self.folder, 'input.swf')
+        with open(SAMPLE) as sample, open(input_file, 'w') as f:
+            f.writelines(sample.readlines()[:400])
+        for name in ('easy_backfill_scheduler', 'lookahead_easy_backfill_scheduler',
+                     'orig_probabilistic_easy_scheduler'):
+            self.assertEqual(self._run(input_file, name, True), self._run(input_file, name, False))
+
+    def test_synthetic_machine(self):
+        model = WorkloadModel(num_jobs=300, num_processors=LARGE_MACHINE, load=0.9, seed=3)
+        workload = os.path.join(self.folder, 'large.workload')
+        with open(workload, 'w') as f:
+            f.write("num_jobs = 300\nnum_processors = {}\nload = 0.9\nseed = 3\n".format(LARGE_MACHINE))
+        swf = os.path.join(self.folder, 'large.swf')
+        with open(swf, 'w') as f:
+            write_swf(model, f)
+        for name in ('easy_backfill_scheduler', 'lookahead_easy_backfill_scheduler',
+                     'orig_probabilistic_easy_scheduler'):
+            jobs = self._run(workload, name, True)
+            self.assertEqual(len(jobs), 300)
+            waits = [int(line.split()[2]) for line in jobs]
+            self.assertTrue(all(wait >= 0 for wait in waits))
+            self.assertTrue(any(wait > 0 for wait in waits))
+            if name != 'orig_probabilistic_easy_scheduler':
+                # the same schedules (the default mode of orig_probabilistic is too slow for this machine)
+                self.assertEqual(jobs, self._run(swf, name, False))
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
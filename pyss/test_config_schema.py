@@ -0,0 +1,128 @@
+#!/usr/bin/env python2
+from unittest import TestCase
+
+import fnmatch
+import os
+import shutil
+import sys
+import tempfile
+
+from config_schema import ConfigError, SCHEDULERS, PREDICTORS, load_config_file, validate, variant
+
+CONFIGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'configs')
+
+CONFIG = '''"""
+The documentation of the config
+"""
+scheduler = {
+  "name": 'easy_prediction_backfill_scheduler',
+  'progressbar': False,
+  'predictor': {"name": "predictor_tsafrir", "predict_multiplier": 1},
+  'corrector': {"name": "reqtime"},
+}
+stats = False
+'''
+
+
+def _config_files():
+    for root, _, names in os.walk(CONFIGS):
+        for name in fnmatch.filter(names, '*.py'):
+            yield os.path.join(root, name)
+
+
+class test_config_schema(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self, name, text):
+        filename = os.path.join(self.folder, name)
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    def test_repository_configs_are_valid(self):
+        filenames = list(_config_files())
+        self.assertTrue(filenames)
+        for filename in filenames:
+            config = load_config_file(filename)
+            self.assertIn('scheduler', config, filename)
+            validate(config)
+
+    def test_literals_and_docstring(self):
+        config = load_config_file(self._write('config.py', CONFIG))
+        self.assertEqual(config['scheduler']['predictor']['name'], 'predictor_tsafrir')
+        self.assertFalse(config['stats'])
+        self.assertIn('documentation', config['__doc__'])
+
+    def test_json_config(self):
+        config = load_config_file(self._write('config.json', '{"scheduler": {"name": "easy_backfill_scheduler"}}'))
+        self.assertEqual(validate(config), {"scheduler": {"name": "easy_backfill_scheduler"}})
+
+    def test_code_is_not_executed(self):
+        for text in ('import os\nscheduler = {}\n', 'scheduler = dict(name="easy_backfill_scheduler")\n',
+                     'scheduler = {"name": "easy_backfill_scheduler"}\nscheduler["name"] = "fcfs_scheduler"\n'):
+            filename = self._write('config.py', text)
+            with self.assertRaises(ConfigError) as context:
+                load_config_file(filename)
+            self.assertIn(filename + ':', str(context.exception))
+
+    def test_all_errors_are_reported(self):
+        config = load_config_file(self._write('config.py', CONFIG))
+        config['scheduler']['name'] = 'no_such_scheduler'
+        config['scheduler']['predictor']['name'] = 'predictor_nothing'
+        config['scheduler']['presorter'] = ['no_such_sorter']
+        config['stast'] = False
+        config['num_processors'] = '80640'
+        with self.assertRaises(ConfigError) as context:
+            validate(config)
+        for expected in ('no_such_scheduler', 'predictor_nothing', 'no_such_sorter', "'stast'", "'num_processors'"):
+            self.assertIn(expected, str(context.exception))
+
+    def test_options_of_the_components(self):
+        config = load_config_file(self._write('config.py', CONFIG))
+        validate(config)
+        config['scheduler']['presorter'] = 'SJF'
+        config['scheduler']['predictor'] = {"name": "predictor_knn", "alpha_mas": 1, "k": 10, "windw": 100}
+        config['scheduler']['corrector']['option'] = 1
+        with self.assertRaises(ConfigError) as context:
+            validate(config)
+        for expected in ("'scheduler.presorter'", "missing option 'scheduler.predictor.alpha_umean'",
+                         "'scheduler.predictor.windw'", "'scheduler.corrector.option'"):
+            self.assertIn(expected, str(context.exception))
+        self.assertNotIn("'scheduler.predictor.k'", str(context.exception))
+        # the predictions need a predictor
+        del config['scheduler']['predictor']
+        with self.assertRaises(ConfigError) as context:
+            validate(config)
+        self.assertIn("missing option 'scheduler.predictor'", str(context.exception))
+        config['scheduler']['name'] = 'easy_backfill_scheduler'
+        del config['scheduler']['presorter']
+        del config['scheduler']['corrector']['option']
+        validate(config)
+
+    def test_names_do_not_import_the_modules(self):
+        self.assertIn('easy_prediction_backfill_scheduler', SCHEDULERS.names())
+        self.assertIn('predictor_tsafrir', PREDICTORS.names())
+        self.assertNotIn('predictor_', PREDICTORS.names())
+        self.assertFalse([name for name in sys.modules
+                          if name.startswith('schedulers.') and name[len('schedulers.'):] in SCHEDULERS.names()])
+        with self.assertRaises(ConfigError):
+            SCHEDULERS.get('no_such_scheduler')
+        self.assertEqual(SCHEDULERS.get('easy_backfill_scheduler').__name__, 'EasyBackfillScheduler')
+
+    def test_variant(self):
+        config = load_config_file(self._write('config.py', CONFIG))
+        changed = variant(config, {'scheduler.predictor.predict_multiplier': 2, 'output_swf': 'out.swf'})
+        self.assertEqual(changed['scheduler']['predictor']['predict_multiplier'], 2)
+        self.assertEqual(changed['output_swf'], 'out.swf')
+        self.assertEqual(config['scheduler']['predictor']['predict_multiplier'], 1)
+        self.assertNotIn('output_swf', config)
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()